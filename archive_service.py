@@ -0,0 +1,356 @@
+"""
+archive_service.py
+------------------
+Eski mesajların sıkıştırılmış segment dosyalarına arşivlenmesi.
+
+messages tablosu sürekli büyür; konuşma sorguları ve indeksler bütün tablo
+üzerinde çalışır. Arşivleme işi, yaşı MESSAGE_ARCHIVE_AFTER_DAYS'i geçen
+mesajları konuşma başına append-only bir segment dosyasına taşır ve
+messages'tan siler; canlı SQLite dosyası ve indeksleri küçük kalır.
+
+Segment biçimi:
+- Konuşma başına bir dosya: <MESSAGE_ARCHIVE_DIR>/conversation_<id>.seg
+- Dosya, art arda eklenmiş bağımsız zlib bloklarından oluşur; her blok
+  eskiden yeniye sıralı en fazla ARCHIVE_BLOCK_SIZE mesajın NDJSON'udur
+- Blokların (ilk id, son id, offset, uzunluk) indeksi message_archive_blocks
+  tablosundadır; bir sayfa için sadece gereken bloklar okunur ve açılır
+
+Arşiv her konuşmada id'ye göre kesintisiz bir önektir: mesaj ancak kendisi
+ve daha küçük id'li tüm mesajlar eşik tarihinden eski ve alıcıları
+tarafından okunmuş ise taşınır (archived_through_message_id). Böylece
+okunmamış sayaçları değişmez ve sıcak ve arşiv aralıkları çakışmaz;
+read_range() bir id aralığını iki kaynaktan aynı sıralamayla birleştirir ve
+get_messages her modda (before_id, cursor, page, after_id) onu kullanır.
+
+Arşivlenen mesajlar tam metin arama indeksinden de çıkar.
+
+Arşivleme işi:
+    flask --app main archive-messages
+"""
+
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, delete, update, func, case, and_, or_
+from models import db, Conversation, Message, MessageArchiveBlock, User
+from serializers import message_query
+
+# Konfigürasyon
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_BLOCK_SIZE = 200
+
+
+def archive_dir():
+    return current_app.config.get(
+        'MESSAGE_ARCHIVE_DIR', os.path.join(current_app.instance_path, 'message_archive')
+    )
+
+
+def segment_path(conversation_id):
+    return os.path.join(archive_dir(), f'conversation_{conversation_id}.seg')
+
+
+def encode_block(messages):
+    """Mesaj satırlarını sıkıştırılmış NDJSON bloğuna çevirir."""
+    lines = [
+        json.dumps({
+            'id': message.id,
+            'sender_id': message.sender_id,
+            'content': message.content,
+            'created_at': message.created_at.isoformat()
+        }, ensure_ascii=False)
+        for message in messages
+    ]
+    return zlib.compress('\n'.join(lines).encode('utf-8'))
+
+
+def decode_block(data):
+    """Sıkıştırılmış bloğu mesaj sözlükleri listesine çevirir (eskiden yeniye)."""
+    records = []
+    for line in zlib.decompress(data).decode('utf-8').split('\n'):
+        record = json.loads(line)
+        record['created_at'] = datetime.fromisoformat(record['created_at'])
+        records.append(record)
+    return records
+
+
+def append_block(conversation_id, block):
+    """
+    Bloğu segment dosyasının sonuna ekler ve diske yazılmasını bekler.
+
+    Returns:
+        int: Bloğun dosyadaki offset'i
+    """
+    os.makedirs(archive_dir(), exist_ok=True)
+    with open(segment_path(conversation_id), 'ab') as segment:
+        offset = segment.seek(0, os.SEEK_END)
+        segment.write(block)
+        segment.flush()
+        os.fsync(segment.fileno())
+    return offset
+
+
+def archive_horizon(conversation, cutoff):
+    """
+    Konuşmada arşivlenebilecek en büyük mesaj id'si.
+
+    Eşikten yeni veya alıcısının henüz okumadığı ilk mesajdan önceki önek
+    arşivlenebilir.
+    """
+    blocked = or_(
+        Message.created_at >= cutoff,
+        and_(Message.sender_id == conversation.user1_id,
+             Message.id > conversation.user2_last_read_message_id),
+        and_(Message.sender_id == conversation.user2_id,
+             Message.id > conversation.user1_last_read_message_id)
+    )
+    first_blocked, last_id = db.session.execute(
+        select(func.min(case((blocked, Message.id))), func.max(Message.id)).where(
+            Message.conversation_id == conversation.id
+        )
+    ).one()
+
+    if first_blocked is not None:
+        return first_blocked - 1
+    return last_id or 0
+
+
+def archive_conversation(conversation, cutoff, block_size=ARCHIVE_BLOCK_SIZE):
+    """
+    Konuşmanın arşivlenebilir mesajlarını bloklar halinde segment dosyasına
+    taşır. Her blok önce dosyaya yazılır, ardından indeks satırı ve mesaj
+    silme tek transaction'da commit edilir; yarıda kesilirse dosyada
+    indekslenmemiş baytlar kalır ve sonraki blok bunların arkasına eklenir.
+
+    Returns:
+        int: Arşivlenen mesaj sayısı
+    """
+    horizon = archive_horizon(conversation, cutoff)
+    archived = 0
+
+    while True:
+        messages = db.session.execute(
+            select(Message.id, Message.sender_id, Message.content, Message.created_at).where(
+                Message.conversation_id == conversation.id,
+                Message.id <= horizon
+            ).order_by(Message.id).limit(block_size)
+        ).all()
+        if not messages:
+            return archived
+
+        block = encode_block(messages)
+        offset = append_block(conversation.id, block)
+        first_id, last_id = messages[0].id, messages[-1].id
+
+        db.session.add(MessageArchiveBlock(
+            conversation_id=conversation.id,
+            first_message_id=first_id,
+            last_message_id=last_id,
+            offset=offset,
+            length=len(block),
+            message_count=len(messages)
+        ))
+        db.session.execute(
+            delete(Message).where(
+                Message.conversation_id == conversation.id,
+                Message.id.between(first_id, last_id)
+            )
+        )
+        db.session.execute(
+            update(Conversation).where(Conversation.id == conversation.id).values(
+                archived_through_message_id=func.max(Conversation.archived_through_message_id, last_id)
+            )
+        )
+        db.session.commit()
+        archived += len(messages)
+
+
+def archive_old_messages(days=None):
+    """
+    Eşikten eski ve okunmuş mesajları olan tüm konuşmaları arşivler.
+
+    Args:
+        days (int): Yaş eşiği (gün); verilmezse MESSAGE_ARCHIVE_AFTER_DAYS
+
+    Returns:
+        int: Arşivlenen toplam mesaj sayısı
+    """
+    if days is None:
+        days = current_app.config.get('MESSAGE_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    block_size = current_app.config.get('ARCHIVE_BLOCK_SIZE', ARCHIVE_BLOCK_SIZE)
+
+    conversation_ids = db.session.execute(
+        select(Message.conversation_id).where(Message.created_at < cutoff).distinct()
+    ).scalars().all()
+
+    total = 0
+    for conversation_id in conversation_ids:
+        conversation = db.session.get(Conversation, conversation_id)
+        if conversation is not None:
+            total += archive_conversation(conversation, cutoff, block_size)
+    return total
+
+
+def read_archived(conversation, before_id, limit, after_id=0, ascending=False):
+    """
+    Arşivden before_id'den küçük (ve after_id'den büyük) mesajları yeniden
+    eskiye (ascending ile eskiden yeniye) döndürür. Sadece gereken bloklar
+    okunur.
+
+    Args:
+        conversation (Conversation): Konuşma
+        before_id (int): Üst sınır (hariç)
+        limit (int): En fazla döndürülecek mesaj
+        after_id (int): Alt sınır (hariç), örn. kullanıcının temizlediği geçmiş
+        ascending (bool): after_id'den başlayarak eskiden yeniye oku (catch-up)
+
+    Returns:
+        list: MESSAGE_COLUMNS sırasında tuple'lar
+    """
+    if limit <= 0 or conversation.archived_through_message_id <= after_id:
+        return []
+
+    ordering = (
+        MessageArchiveBlock.first_message_id.asc() if ascending
+        else MessageArchiveBlock.last_message_id.desc()
+    )
+    blocks = db.session.execute(
+        select(MessageArchiveBlock).where(
+            MessageArchiveBlock.conversation_id == conversation.id,
+            MessageArchiveBlock.first_message_id < before_id,
+            MessageArchiveBlock.last_message_id > after_id
+        ).order_by(ordering)
+    ).scalars().all()
+    if not blocks:
+        return []
+
+    records = []
+    with open(segment_path(conversation.id), 'rb') as segment:
+        for block in blocks:
+            segment.seek(block.offset)
+            block_records = decode_block(segment.read(block.length))
+            for record in (block_records if ascending else reversed(block_records)):
+                if after_id < record['id'] < before_id:
+                    records.append(record)
+            if len(records) >= limit:
+                break
+    records = records[:limit]
+
+    senders = {
+        user.id: user for user in db.session.execute(
+            select(User.id, User.name, User.avatar).where(
+                User.id.in_({record['sender_id'] for record in records})
+            )
+        )
+    }
+
+    rows = []
+    for record in records:
+        sender = senders.get(record['sender_id'])
+        recipient_watermark = (
+            conversation.user2_last_read_message_id
+            if record['sender_id'] == conversation.user1_id
+            else conversation.user1_last_read_message_id
+        )
+        rows.append((
+            record['id'], record['content'], record['sender_id'],
+            record['id'] <= recipient_watermark, record['created_at'],
+            sender.name if sender else None, sender.avatar if sender else None
+        ))
+    return rows
+
+
+def read_range(conversation, before=None, after=0, limit=50, ascending=False, offset=0):
+    """
+    Konuşmanın after < id < before aralığındaki mesajlarını sıcak kümeden ve
+    arşivden birleştirerek döndürür.
+
+    Arşiv en eski önek olduğu için yeniden eskiye okurken önce sıcak küme,
+    eksik kalırsa arşiv; eskiden yeniye (catch-up) okurken önce arşiv, sonra
+    sıcak küme okunur. Arşiv segmenti sadece sayfa ona uzanırsa açılır.
+
+    Args:
+        conversation (Conversation): Konuşma
+        before (int): Üst sınır (hariç); None ise en yeni mesaja kadar
+        after (int): Alt sınır (hariç), örn. kullanıcının temizlediği geçmiş
+        limit (int): En fazla döndürülecek mesaj
+        ascending (bool): Eskiden yeniye oku
+        offset (int): Baştan atlanacak mesaj sayısı (eski page modu; yeniden eskiye)
+
+    Returns:
+        list: MESSAGE_COLUMNS sırasında satırlar, istenen sıralamada
+    """
+    if limit <= 0:
+        return []
+
+    archived_through = conversation.archived_through_message_id
+    archive_before = archived_through + 1 if before is None else min(before, archived_through + 1)
+    hot = message_query().filter(
+        Message.conversation_id == conversation.id,
+        Message.id > max(after, archived_through)
+    )
+    if before is not None:
+        hot = hot.filter(Message.id < before)
+
+    if ascending:
+        rows = read_archived(conversation, archive_before, limit, after_id=after, ascending=True)
+        if len(rows) < limit:
+            rows += hot.order_by(Message.id.asc()).limit(limit - len(rows)).all()
+        return rows
+
+    rows = hot.order_by(Message.id.desc()).offset(offset).limit(limit).all()
+    missing = limit - len(rows)
+    if missing and archived_through > after:
+        # Sayfa sıcak kümenin sonunu geçtiyse arşivde atlanacak kısım
+        skip = max(offset - hot.order_by(None).count(), 0) if offset and not rows else 0
+        rows += read_archived(conversation, archive_before, skip + missing, after_id=after)[skip:]
+    return rows
+
+
+def count_archived(conversation, after_id=0):
+    """
+    Arşivdeki after_id'den büyük mesaj sayısı (sayfa modunun toplamı için).
+
+    Tamamı aralıkta olan bloklar message_count'tan toplanır; sadece after_id'yi
+    içine alan blok açılır.
+    """
+    if conversation.archived_through_message_id <= after_id:
+        return 0
+
+    total = db.session.execute(
+        select(func.coalesce(func.sum(MessageArchiveBlock.message_count), 0)).where(
+            MessageArchiveBlock.conversation_id == conversation.id,
+            MessageArchiveBlock.first_message_id > after_id
+        )
+    ).scalar()
+
+    partial = db.session.execute(
+        select(MessageArchiveBlock).where(
+            MessageArchiveBlock.conversation_id == conversation.id,
+            MessageArchiveBlock.first_message_id <= after_id,
+            MessageArchiveBlock.last_message_id > after_id
+        )
+    ).scalar()
+    if partial is not None:
+        with open(segment_path(conversation.id), 'rb') as segment:
+            segment.seek(partial.offset)
+            total += sum(1 for record in decode_block(segment.read(partial.length)) if record['id'] > after_id)
+    return total
+
+
+def drop_archive(conversation_id, through_id=None):
+    """
+    Arşiv indeksinden blokları kaldırır. through_id verilirse sadece tamamı
+    o id'ye kadar olan bloklar, verilmezse tüm bloklar ve segment dosyası
+    silinir (konuşma silindiğinde).
+    """
+    criteria = [MessageArchiveBlock.conversation_id == conversation_id]
+    if through_id is not None:
+        criteria.append(MessageArchiveBlock.last_message_id <= through_id)
+    db.session.execute(delete(MessageArchiveBlock).where(*criteria))
+
+    if through_id is None and os.path.exists(segment_path(conversation_id)):
+        os.remove(segment_path(conversation_id))
@@ -0,0 +1,61 @@
+"""
+background.py
+-------------
+İstek dışında çalışan bakım işleri için küçük bir arka plan iş kuyruğu.
+
+İşler süreç içi bir ThreadPoolExecutor'da, uygulama context'i içinde
+çalışır. Amaç, maliyeti veriye göre büyüyen işleri (örn. popüler bir postun
+tüm beğeni/yorumlarını silmek) istek süresinden çıkarmaktır. Yarıda kalan
+işler için ilgili CLI komutları (commands.py) aynı işi yeniden çalıştırabilir.
+
+Konfigürasyon:
+    BACKGROUND_WORKERS: Eşzamanlı iş sayısı (SQLite tek yazıcı olduğu için
+        varsayılan 1)
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from models import db
+
+# Konfigürasyon
+DEFAULT_WORKERS = 1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('BACKGROUND_WORKERS', DEFAULT_WORKERS),
+                thread_name_prefix='background'
+            )
+        return _executor
+
+
+def submit_job(fn, *args, **kwargs):
+    """
+    Fonksiyonu arka planda, uygulama context'i içinde çalıştırır.
+
+    Args:
+        fn (callable): Çalıştırılacak iş
+        *args, **kwargs: İş argümanları
+
+    Returns:
+        Future: İşin sonucu (testlerde beklemek için)
+    """
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception('Background job %s failed', fn.__name__)
+                raise
+
+    return get_executor().submit(run)
@@ -0,0 +1,59 @@
+# bench_feed_ranking.py
+# mode=ranked puanlamasının vektörel (NumPy) ve satır satır Python
+# uygulamalarını farklı aday kümesi boyutlarında karşılaştırır.
+#   python bench_feed_ranking.py
+import math
+import timeit
+import numpy as np
+from feed_ranking import score_candidates, rank_candidates, DEFAULT_WEIGHTS
+
+SIZES = [100, 500, 5000, 50000]
+REPEAT = 5
+
+
+def make_candidates(size, seed=42):
+    rng = np.random.default_rng(seed)
+    post_ids = np.arange(size, 0, -1, dtype=np.int64)
+    age_hours = rng.uniform(0, 24 * 14, size)
+    likes = rng.poisson(5, size).astype(np.float64)
+    comments = rng.poisson(2, size).astype(np.float64)
+    return post_ids, age_hours, likes, comments
+
+
+def rank_python(post_ids, age_hours, likes, comments, weights):
+    scored = []
+    for post_id, age, like, comment in zip(post_ids, age_hours, likes, comments):
+        engagement = (
+            weights['base']
+            + weights['like_weight'] * like
+            + weights['comment_weight'] * comment
+        )
+        score = engagement * math.pow(2.0, -max(age, 0.0) / weights['half_life_hours'])
+        scored.append((score, post_id))
+    scored.sort(reverse=True)
+    return [post_id for _, post_id in scored]
+
+
+def rank_numpy(post_ids, age_hours, likes, comments, weights):
+    scores = score_candidates(age_hours, likes, comments, weights)
+    return post_ids[rank_candidates(post_ids, scores)]
+
+
+def main():
+    print(f"{'adaylar':>8} {'python (ms)':>12} {'numpy (ms)':>12} {'hizlanma':>9}")
+    for size in SIZES:
+        post_ids, age_hours, likes, comments = make_candidates(size)
+        python_args = (post_ids.tolist(), age_hours.tolist(), likes.tolist(), comments.tolist(), DEFAULT_WEIGHTS)
+        numpy_args = (post_ids, age_hours, likes, comments, DEFAULT_WEIGHTS)
+
+        # İki uygulama aynı sıralamayı üretmeli
+        assert rank_python(*python_args) == rank_numpy(*numpy_args).tolist()
+
+        number = max(1, 20000 // size)
+        python_ms = min(timeit.repeat(lambda: rank_python(*python_args), number=number, repeat=REPEAT)) / number * 1000
+        numpy_ms = min(timeit.repeat(lambda: rank_numpy(*numpy_args), number=number, repeat=REPEAT)) / number * 1000
+        print(f"{size:>8} {python_ms:>12.3f} {numpy_ms:>12.3f} {python_ms / numpy_ms:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
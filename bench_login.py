@@ -0,0 +1,98 @@
+# bench_login.py
+# Eşzamanlı yük altında /api/auth/login throughput'unu şifre hash havuzu
+# açıkken ve kapalıyken (hash istek thread'inde) karşılaştırır. Aynı anda
+# ucuz bir endpoint'e gelen isteklerin gecikmesini de ölçer: hash işi istek
+# thread'lerini ve GIL'i meşgul ettikçe bu gecikme artar. Havuzun throughput
+# kazancı CPU sayısıyla ölçeklenir; en az 2 CPU gerekir, tek CPU'da süreçler
+# arası iletişim maliyeti baskındır (uygulama orada havuzu zaten kullanmaz).
+# Geçici bir SQLite dosyası kullanır, campus.db'ye dokunmaz.
+#   python bench_login.py
+#   PASSWORD_HASH_WORKERS=4 python bench_login.py   (havuz boyutu; varsayılan CPU sayısı)
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask
+from werkzeug.security import generate_password_hash
+from models import db, User
+from routes.auth import auth_bp
+from token_cache import init_token_cache
+
+THREADS = 8
+LOGINS = 64
+METHOD = 'scrypt:32768:8:1'
+
+
+def create_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['PASSWORD_HASH_METHOD'] = METHOD
+    # Karşılaştırma için havuz tek CPU'da da açık tutulur
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS') or os.cpu_count())
+    db.init_app(app)
+    init_token_cache(app)
+    app.register_blueprint(auth_bp)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(
+            name='Bench', email='bench@test.com',
+            password_hash=generate_password_hash('bench123', method=METHOD)
+        ))
+        db.session.commit()
+    return app
+
+
+def login(app):
+    response = app.test_client().post('/api/auth/login', json={
+        'email': 'bench@test.com', 'password': 'bench123'
+    })
+    assert response.status_code == 200, response.get_json()
+
+
+def probe(app):
+    start = time.perf_counter()
+    app.test_client().get('/health')
+    return time.perf_counter() - start
+
+
+def probe_until_done(app, futures):
+    """Login'ler sürerken ucuz isteklerin gecikmelerini toplar."""
+    latencies = []
+    while not all(future.done() for future in futures):
+        latencies.append(probe(app))
+    return latencies
+
+
+def run(app, use_pool):
+    app.config['PASSWORD_HASH_POOL'] = use_pool
+    login(app)  # Havuzu ısıt
+
+    with ThreadPoolExecutor(max_workers=THREADS) as logins, ThreadPoolExecutor(max_workers=1) as prober:
+        start = time.perf_counter()
+        futures = [logins.submit(login, app) for _ in range(LOGINS)]
+        latencies = prober.submit(probe_until_done, app, futures).result()
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)]
+    label = 'havuz' if use_pool else 'inline'
+    print(f"{label:7s} login: {LOGINS / elapsed:7.1f}/sn   "
+          f"ucuz istek p50: {statistics.median(latencies) * 1000:6.1f} ms  p95: {p95 * 1000:6.1f} ms")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(os.path.join(directory, 'bench.db'))
+        print(f"{THREADS} thread, {LOGINS} login, {os.cpu_count()} CPU, "
+              f"{app.config['PASSWORD_HASH_WORKERS']} hash süreci, yöntem {METHOD}")
+        if os.cpu_count() < 2:
+            print("[UYARI] Tek CPU: havuz sonucu anlamlı değil, en az 2 CPU gerekir")
+        run(app, use_pool=False)
+        run(app, use_pool=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+# bench_presence.py
+# Presence tracker'ının heartbeat ve süpürme hızını ölçer: USERS kullanıcı
+# için tekrarlı heartbeat (çoğu sadece süre yenileme), ardından süresi dolan
+# tüm kullanıcıların süpürülmesi. Saniyedeki işlem sayısını yazdırır.
+# Veritabanı kullanmaz.
+#   python bench_presence.py
+import time
+from presence import PresenceTracker
+
+USERS = 100000
+ROUNDS = 5
+
+
+def main():
+    now = [0.0]
+    tracker = PresenceTracker(presence_ttl=60, clock=lambda: now[0])
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for user_id in range(USERS):
+            tracker.heartbeat(user_id)
+        now[0] += 10
+    elapsed = time.perf_counter() - start
+    print(f"heartbeat: {USERS * ROUNDS / elapsed:,.0f} islem/sn")
+
+    start = time.perf_counter()
+    reads = sum(1 for user_id in range(USERS) if tracker.is_online(user_id))
+    elapsed = time.perf_counter() - start
+    print(f"is_online: {reads / elapsed:,.0f} islem/sn")
+
+    now[0] += 120
+    start = time.perf_counter()
+    offline, _ = tracker.sweep()
+    elapsed = time.perf_counter() - start
+    print(f"sweep:     {len(offline):,} kullanici {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+# bench_serializers.py
+# Liste endpoint'lerinde kullanılan serileştirme yollarını karşılaştırır:
+#   orm  - tam ORM nesneleri (joinedload) + elle sözlük oluşturma
+#   row  - serializers.py projeksiyon sorgusu + satır serileştirici
+# Her varlık tipi için saniyede serileştirilen kayıt sayısını yazdırır.
+# Kendi bellek içi SQLite veritabanını kullanır, campus.db'ye dokunmaz.
+#   python bench_serializers.py
+import time
+from datetime import datetime, timedelta
+from flask import Flask
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+from models import db, User, Community, Event, Post, Comment, Conversation, Message, Mentor
+from serializers import (
+    post_query, serialize_post, comment_query, serialize_comment,
+    message_query, serialize_message, mentor_query, serialize_mentor
+)
+
+ROWS = 2000
+REPEAT = 5
+
+app = Flask(__name__)
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+db.init_app(app)
+
+
+def seed():
+    db.create_all()
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [
+        {'name': f'Kullanici {i}', 'email': f'u{i}@bench.test', 'avatar': '👤'} for i in range(1, 101)
+    ])
+    db.session.execute(insert(Community), [{'name': 'Bench Kulubu', 'avatar': '💻'}])
+    db.session.execute(insert(Event), [{'community_id': 1, 'title': 'Bench', 'date': now, 'image': '🏆'}])
+    db.session.execute(insert(Post), [
+        {'user_id': i % 100 + 1, 'community_id': 1, 'event_id': 1 if i % 3 == 0 else None,
+         'content': f'Post {i}', 'type': 'text', 'created_at': now - timedelta(minutes=i)}
+        for i in range(ROWS)
+    ])
+    db.session.execute(insert(Comment), [
+        {'post_id': 1, 'user_id': i % 100 + 1, 'content': f'Yorum {i}'} for i in range(ROWS)
+    ])
+    db.session.execute(insert(Conversation), [{'user1_id': 1, 'user2_id': 2}])
+    db.session.execute(insert(Message), [
+        {'conversation_id': 1, 'sender_id': i % 2 + 1, 'content': f'Mesaj {i}'} for i in range(ROWS)
+    ])
+    db.session.execute(insert(Mentor), [
+        {'user_id': i % 100 + 1, 'title': 'Engineer', 'company': 'Bench', 'rating': 4.5} for i in range(ROWS)
+    ])
+    db.session.commit()
+
+
+def orm_posts():
+    result = []
+    for post in Post.query.options(
+        joinedload(Post.author), joinedload(Post.community), joinedload(Post.event)
+    ).order_by(Post.id).limit(ROWS):
+        data = {
+            'id': str(post.id), 'type': post.type,
+            'author': {'id': str(post.author.id), 'name': post.author.name, 'avatar': post.author.avatar},
+            'content': post.content, 'timestamp': post.created_at.isoformat(),
+            'likes': post.like_count, 'comments': post.comment_count, 'isLiked': False,
+            'mediaType': post.media_type, 'mediaUrl': post.media_url
+        }
+        if post.community:
+            data['community'] = {'id': str(post.community.id), 'name': post.community.name,
+                                 'avatar': post.community.avatar}
+        if post.event:
+            data['event'] = {'id': str(post.event.id), 'title': post.event.title,
+                             'date': post.event.date.isoformat(), 'image': post.event.image}
+        result.append(data)
+    return result
+
+
+def row_posts():
+    return [serialize_post(row) for row in post_query().order_by(Post.id).limit(ROWS)]
+
+
+def orm_comments():
+    return [{
+        'id': str(c.id), 'content': c.content, 'timestamp': c.created_at.isoformat(),
+        'author': {'id': str(c.author.id), 'name': c.author.name, 'avatar': c.author.avatar},
+        'parentId': str(c.parent_id) if c.parent_id is not None else None
+    } for c in Comment.query.options(joinedload(Comment.author)).order_by(Comment.id).limit(ROWS)]
+
+
+def row_comments():
+    return [serialize_comment(row) for row in comment_query().order_by(Comment.id).limit(ROWS)]
+
+
+def orm_messages():
+    return [{
+        'id': str(m.id), 'content': m.content, 'senderId': str(m.sender_id),
+        'isRead': m.id <= (m.conversation.user2_last_read_message_id
+                           if m.sender_id == m.conversation.user1_id
+                           else m.conversation.user1_last_read_message_id),
+        'timestamp': m.created_at.isoformat(),
+        'sender': {'id': str(m.sender.id), 'name': m.sender.name, 'avatar': m.sender.avatar}
+    } for m in Message.query.options(
+        joinedload(Message.sender), joinedload(Message.conversation)
+    ).order_by(Message.id).limit(ROWS)]
+
+
+def row_messages():
+    return [serialize_message(row) for row in message_query().order_by(Message.id).limit(ROWS)]
+
+
+def orm_mentors():
+    return [{
+        'id': str(m.id), 'name': m.user.name, 'avatar': m.user.avatar, 'title': m.title,
+        'company': m.company, 'expertise': [], 'availability': m.availability, 'rating': m.rating,
+        'sessionsCompleted': m.sessions_completed, 'bio': m.bio, 'responseTime': m.response_time,
+        'isFollowing': False
+    } for m in Mentor.query.options(joinedload(Mentor.user)).order_by(Mentor.id).limit(ROWS)]
+
+
+def row_mentors():
+    return [serialize_mentor(row, [], False) for row in mentor_query().order_by(Mentor.id).limit(ROWS)]
+
+
+def throughput(fn):
+    best = float('inf')
+    for _ in range(REPEAT):
+        db.session.expunge_all()  # Her turda identity map boş başlasın
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return ROWS / best
+
+
+def main():
+    with app.app_context():
+        seed()
+        cases = [
+            ('post', orm_posts, row_posts),
+            ('comment', orm_comments, row_comments),
+            ('message', orm_messages, row_messages),
+            ('mentor', orm_mentors, row_mentors),
+        ]
+        print(f"{'varlik':>8} {'orm (kayit/s)':>14} {'row (kayit/s)':>14} {'hizlanma':>9}")
+        for name, orm_fn, row_fn in cases:
+            # İki yol aynı çıktıyı üretmeli
+            assert orm_fn() == row_fn()
+            orm_rate = throughput(orm_fn)
+            row_rate = throughput(row_fn)
+            print(f"{name:>8} {orm_rate:>14,.0f} {row_rate:>14,.0f} {row_rate / orm_rate:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+commands.py
+-----------
+Bakım işleri için Flask CLI komutları.
+
+Kullanım:
+    flask --app main rebuild-timelines
+    flask --app main reconcile-post-counters
+    flask --app main purge-deleted-posts
+    flask --app main purge-hidden-conversations
+    flask --app main reconcile-conversations
+    flask --app main rebuild-message-search
+    flask --app main archive-messages [--days 90]
+    flask --app main purge-refresh-tokens
+    SCHEMA_CHECK=0 flask --app main upgrade-db
+"""
+
+import click
+import timeline_service
+import counter_service
+import purge_service
+import conversation_service
+import search_service
+import archive_service
+import session_service
+import schema_service
+
+
+def register_commands(app):
+    """CLI komutlarını Flask uygulamasına kaydeder."""
+
+    @app.cli.command('rebuild-timelines')
+    def rebuild_timelines():
+        """Tüm kullanıcı timeline'larını üyelik/takip verisinden yeniden oluşturur."""
+        count = timeline_service.rebuild_all()
+        click.echo(f"[OK] {count} timeline kaydi olusturuldu")
+
+    @app.cli.command('reconcile-post-counters')
+    def reconcile_post_counters():
+        """Post beğeni/yorum sayaçlarını post_likes ve comments'ten yeniden hesaplar."""
+        count = counter_service.reconcile_post_counters()
+        click.echo(f"[OK] {count} post sayaci guncellendi")
+
+    @app.cli.command('purge-deleted-posts')
+    def purge_deleted_posts():
+        """Silindi işaretli postların beğeni/yorum/timeline kayıtlarını temizler."""
+        count = purge_service.purge_deleted_posts()
+        click.echo(f"[OK] {count} silinmis post temizlendi")
+
+    @app.cli.command('reconcile-conversations')
+    def reconcile_conversations():
+        """Konuşma son mesaj özetlerini ve okunmamış sayaçlarını messages'tan yeniden hesaplar."""
+        count = conversation_service.reconcile_conversations()
+        click.echo(f"[OK] {count} konusma ozeti guncellendi")
+
+    @app.cli.command('rebuild-message-search')
+    def rebuild_message_search():
+        """Mesaj arama (FTS5) indeksini messages tablosundan yeniden oluşturur."""
+        count = search_service.rebuild_message_search()
+        click.echo(f"[OK] {count} mesaj indekslendi")
+
+    @app.cli.command('purge-hidden-conversations')
+    def purge_hidden_conversations():
+        """İki katılımcının da sildiği konuşmaların mesajlarını temizler."""
+        count = purge_service.purge_hidden_conversations()
+        click.echo(f"[OK] {count} konusma temizlendi")
+
+    @app.cli.command('archive-messages')
+    @click.option('--days', type=int, default=None, help='Yaş eşiği (gün); varsayılan MESSAGE_ARCHIVE_AFTER_DAYS')
+    def archive_messages(days):
+        """Eski ve okunmuş mesajları sıkıştırılmış arşiv segmentlerine taşır."""
+        count = archive_service.archive_old_messages(days)
+        click.echo(f"[OK] {count} mesaj arsivlendi")
+
+    @app.cli.command('purge-refresh-tokens')
+    def purge_refresh_tokens():
+        """Süresi dolmuş refresh token'ları siler."""
+        count = session_service.purge_expired_refresh_tokens()
+        click.echo(f"[OK] {count} refresh token silindi")
+
+    @app.cli.command('upgrade-db')
+    def upgrade_db():
+        """Eski şemalı veritabanına eksik kolon/indeksleri ekler ve türetilmiş verileri yeniden hesaplar."""
+        summary = schema_service.upgrade_schema()
+        for step, value in summary.items():
+            click.echo(f"  - {step}: {value}")
+        click.echo("[OK] Veritabani semasi guncel")
@@ -0,0 +1,372 @@
+"""
+conversation_service.py
+-----------------------
+Konuşma satırındaki denormalize gelen kutusu özeti.
+
+Her konuşma son mesajın id'sini, gönderenini, kısa önizlemesini ve her
+katılımcı için okunmamış mesaj sayacını taşır. Sayaçlar mesaj gönderiminde ve
+okuma yollarında tek bir atomik UPDATE ile güncellenir; böylece gelen kutusu
+konuşma başına son mesaj / COUNT sorgusu çalıştırmadan tek sorguyla okunur.
+
+Okundu bilgisi mesaj başına tutulmaz. Her katılımcının okuduğu en büyük mesaj
+id'si (watermark) konuşma satırındadır:
+- Mesaj okunmuş mu: mesaj.id <= alıcının watermark'ı
+- Okunmamış: diğer kullanıcıdan gelen ve id > watermark olan mesajlar
+- Okundu işaretleme: watermark'ı sadece ileri taşıyan tek bir UPDATE
+
+Silme kullanıcı başınadır: konuşmayı silen katılımcı için konuşma gelen
+kutusundan gizlenir ve o ana kadarki mesajlar onun için temizlenir (cleared
+id); diğer katılımcı etkilenmez. Yeni mesaj gelince konuşma tekrar görünür.
+İki katılımcının da temizlediği mesajlar purge_service ile fiziksel silinir.
+
+Kullanıcı satırı ayrıca tüm konuşmalardaki okunmamış mesaj toplamını taşır
+(uygulama rozeti). Konuşma sayacı değiştiği her yazımda toplam da aynı
+transaction içinde farkı kadar güncellenir; rozet okuması tek bir birincil
+anahtar aramasıdır.
+
+Katılımcı çifti normalize saklanır (user1_id < user2_id) ve çift üzerinde
+benzersiz indeks vardır; konuşma bulma tek indeks araması, oluşturma ise
+yarışsız bir insert-or-fetch'tir.
+
+Özetler kayarsa messages tablosundan toplu olarak yeniden hesaplanabilir:
+    flask --app main reconcile-conversations
+"""
+
+from collections import defaultdict
+from sqlalchemy import update, select, func, and_, or_, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+from models import db, Conversation, Message, User
+
+# Konfigürasyon
+PREVIEW_LENGTH = 200
+
+
+def participant_pair(user_a, user_b):
+    """İki kullanıcı ID'sini normalize (küçük, büyük) çifte çevirir."""
+    return (user_a, user_b) if user_a < user_b else (user_b, user_a)
+
+
+def find_conversation_id(user_a, user_b):
+    """Çiftin konuşma ID'si (uq_conversations_pair üzerinde tek arama), yoksa None."""
+    user1_id, user2_id = participant_pair(user_a, user_b)
+    return db.session.execute(
+        select(Conversation.id).where(
+            Conversation.user1_id == user1_id,
+            Conversation.user2_id == user2_id
+        )
+    ).scalar()
+
+
+def get_or_create_conversation(user_a, user_b):
+    """
+    Çiftin konuşmasını atomik olarak oluşturur veya mevcut olanı döndürür.
+
+    INSERT ... ON CONFLICT DO NOTHING RETURNING kullanılır; eşzamanlı iki
+    istekten sadece biri satır ekler, diğeri benzersiz indekse çarpıp mevcut
+    konuşmayı okur. Böylece aynı çift için kopya konuşma oluşamaz.
+
+    Returns:
+        tuple: (conversation_id, created)
+    """
+    user1_id, user2_id = participant_pair(user_a, user_b)
+    conversation_id = db.session.execute(
+        sqlite_insert(Conversation).values(
+            user1_id=user1_id, user2_id=user2_id
+        ).on_conflict_do_nothing(
+            index_elements=['user1_id', 'user2_id']
+        ).returning(Conversation.id)
+    ).scalar()
+
+    if conversation_id is not None:
+        return conversation_id, True
+    return find_conversation_id(user1_id, user2_id), False
+
+
+def make_preview(content):
+    """Mesaj içeriğinden gelen kutusu önizlemesi üretir."""
+    return content[:PREVIEW_LENGTH]
+
+
+def unread_column(conversation, user_id):
+    """Kullanıcının bu konuşmadaki okunmamış sayacı kolonu."""
+    if conversation.user1_id == user_id:
+        return Conversation.user1_unread_count
+    return Conversation.user2_unread_count
+
+
+def other_participant(conversation, user_id):
+    """Konuşmadaki diğer kullanıcının ID'si."""
+    return conversation.user2_id if conversation.user1_id == user_id else conversation.user1_id
+
+
+def conversation_partners(user_id):
+    """
+    Kullanıcıyla konuşması olan kullanıcıların ID'leri (presence olaylarının
+    alıcıları). Çift indeksleri üzerinde tek sorgu.
+    """
+    return db.session.execute(
+        select(case(
+            (Conversation.user1_id == user_id, Conversation.user2_id),
+            else_=Conversation.user1_id
+        )).where(
+            or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id)
+        )
+    ).scalars().all()
+
+
+def partners_by_user(user_ids):
+    """
+    Birden çok kullanıcının konuşma partnerleri tek sorguda (süresi dolan
+    presence durumlarının toplu yayını için).
+
+    Returns:
+        dict: {user_id: [partner ID'leri]}
+    """
+    user_ids = set(user_ids)
+    partners = defaultdict(list)
+    if not user_ids:
+        return partners
+
+    for user1_id, user2_id in db.session.execute(
+        select(Conversation.user1_id, Conversation.user2_id).where(
+            or_(Conversation.user1_id.in_(user_ids), Conversation.user2_id.in_(user_ids))
+        )
+    ):
+        if user1_id in user_ids:
+            partners[user1_id].append(user2_id)
+        if user2_id in user_ids:
+            partners[user2_id].append(user1_id)
+    return partners
+
+
+def adjust_unread_total(user_id, delta):
+    """
+    Kullanıcının toplam okunmamış sayacını delta kadar değiştirir.
+
+    Args:
+        user_id (int): Kullanıcı ID'si
+        delta: Sayı veya SQL ifadesi (örn. konuşma sayacı alt sorgusu)
+    """
+    db.session.execute(
+        update(User).where(User.id == user_id).values(
+            {User.unread_message_count: func.max(User.unread_message_count + delta, 0)}
+        )
+    )
+
+
+def unread_total(user_id):
+    """Kullanıcının toplam okunmamış mesaj sayısı (tek PK araması)."""
+    return db.session.execute(
+        select(User.unread_message_count).where(User.id == user_id)
+    ).scalar()
+
+
+def conversation_unread(conversation, user_id, *criteria):
+    """Kullanıcının konuşmadaki mevcut okunmamış sayacı (skaler alt sorgu, yoksa 0)."""
+    return func.coalesce(
+        select(unread_column(conversation, user_id)).where(
+            Conversation.id == conversation.id, *criteria
+        ).scalar_subquery(),
+        0
+    )
+
+
+def record_message(conversation, message):
+    """
+    Yeni mesajı konuşma özetine yazar ve alıcının konuşma ve toplam okunmamış
+    sayaçlarını artırır.
+
+    Mesaj flush edilmiş olmalıdır (id ve created_at atanmış).
+
+    Args:
+        conversation (Conversation): Konuşma
+        message (Message): Gönderilen mesaj
+
+    Returns:
+        int: Alıcı kullanıcının ID'si
+    """
+    recipient_id = other_participant(conversation, message.sender_id)
+    recipient_column = unread_column(conversation, recipient_id)
+    db.session.execute(
+        update(Conversation).where(Conversation.id == conversation.id).values({
+            Conversation.last_message_id: message.id,
+            Conversation.last_message_sender_id: message.sender_id,
+            Conversation.last_message_preview: make_preview(message.content),
+            Conversation.last_message_at: message.created_at,
+            recipient_column: recipient_column + 1,
+            # Gizlenmiş konuşma yeni mesajla tekrar görünür
+            Conversation.user1_hidden: False,
+            Conversation.user2_hidden: False
+        })
+    )
+    adjust_unread_total(recipient_id, 1)
+    return recipient_id
+
+
+def watermark_column(conversation, user_id):
+    """Kullanıcının bu konuşmadaki okuma watermark'ı kolonu."""
+    if conversation.user1_id == user_id:
+        return Conversation.user1_last_read_message_id
+    return Conversation.user2_last_read_message_id
+
+
+def hidden_column(conversation, user_id):
+    """Kullanıcının gizleme bayrağı kolonu."""
+    if conversation.user1_id == user_id:
+        return Conversation.user1_hidden
+    return Conversation.user2_hidden
+
+
+def cleared_column(conversation, user_id):
+    """Kullanıcı için temizlenmiş son mesaj id'si kolonu."""
+    if conversation.user1_id == user_id:
+        return Conversation.user1_cleared_message_id
+    return Conversation.user2_cleared_message_id
+
+
+def cleared_message_id(conversation, user_id):
+    """Kullanıcının bu konuşmada göremeyeceği en büyük mesaj id'si."""
+    if conversation.user1_id == user_id:
+        return conversation.user1_cleared_message_id
+    return conversation.user2_cleared_message_id
+
+
+def unread_after(conversation_id, user_id, watermark):
+    """Diğer kullanıcıdan gelen ve watermark'tan yeni mesaj sayısı (skaler alt sorgu)."""
+    return select(func.count(Message.id)).where(
+        Message.conversation_id == conversation_id,
+        Message.sender_id != user_id,
+        Message.id > watermark
+    ).scalar_subquery()
+
+
+def advance_read_watermark(conversation, user_id, message_id):
+    """
+    Kullanıcının okuma watermark'ını message_id'ye ilerletir.
+
+    Tek bir monotonik UPDATE çalışır: watermark zaten message_id veya daha
+    ilerideyse satır değişmez. Okunmamış sayacı aynı UPDATE içinde
+    watermark'tan yeni mesajlardan yeniden hesaplanır ve kullanıcının toplam
+    sayacı eski/yeni konuşma sayacı farkı kadar düzeltilir.
+
+    Args:
+        conversation (Conversation): Konuşma
+        user_id (int): Okuyan katılımcı
+        message_id (int): Okunan en yeni mesaj id'si
+
+    Returns:
+        bool: Watermark ilerlediyse True
+    """
+    column = watermark_column(conversation, user_id)
+    unread = unread_column(conversation, user_id)
+
+    # Önce eski konuşma sayacı toplamdan düşülür; bu ilk yazım SQLite yazma
+    # kilidini aldığı için sonraki iki ifade arasında başka yazım araya giremez
+    adjust_unread_total(user_id, -conversation_unread(conversation, user_id, column < message_id))
+
+    advanced = db.session.execute(
+        update(Conversation).where(
+            Conversation.id == conversation.id,
+            column < message_id
+        ).values({
+            column: message_id,
+            unread: unread_after(conversation.id, user_id, message_id)
+        }).returning(unread)
+    ).first()
+
+    if advanced is None:
+        return False
+
+    adjust_unread_total(user_id, advanced[0])
+    return True
+
+
+def hide_conversation(conversation, user_id):
+    """
+    Konuşmayı kullanıcı için siler: gelen kutusundan gizler, son mesaja
+    kadarki geçmişi temizler ve okunmamış sayacını sıfırlar (toplamdan
+    düşerek). Mesaj satırlarına dokunmaz.
+
+    Returns:
+        bool: Diğer katılımcı da konuşmayı gizlemişse True (purge edilebilir)
+    """
+    last_message_id = conversation.last_message_id or 0
+    adjust_unread_total(user_id, -conversation_unread(conversation, user_id))
+    row = db.session.execute(
+        update(Conversation).where(Conversation.id == conversation.id).values({
+            hidden_column(conversation, user_id): True,
+            cleared_column(conversation, user_id): func.max(
+                cleared_column(conversation, user_id), last_message_id
+            ),
+            watermark_column(conversation, user_id): func.max(
+                watermark_column(conversation, user_id), last_message_id
+            ),
+            unread_column(conversation, user_id): 0
+        }).returning(Conversation.user1_hidden, Conversation.user2_hidden)
+    ).first()
+    return bool(row and row.user1_hidden and row.user2_hidden)
+
+
+def reconcile_conversations():
+    """
+    Tüm konuşmaların son mesaj özetini ve okunmamış sayaçlarını messages
+    tablosu ve okuma watermark'larından tek bir UPDATE ile, ardından
+    kullanıcıların toplam okunmamış sayaçlarını konuşmalardan yeniden hesaplar.
+
+    Returns:
+        int: Güncellenen konuşma sayısı
+    """
+    latest = aliased(Message)
+    last_message = select(latest.id).where(
+        latest.conversation_id == Conversation.id
+    ).order_by(
+        latest.created_at.desc(), latest.id.desc()
+    ).limit(1).correlate(Conversation).scalar_subquery()
+
+    def last_message_field(column):
+        return select(column).where(Message.id == last_message).scalar_subquery()
+
+    def unread_for(user_column, watermark):
+        return select(func.count(Message.id)).where(
+            and_(
+                Message.conversation_id == Conversation.id,
+                Message.sender_id != user_column,
+                Message.id > watermark
+            )
+        ).scalar_subquery()
+
+    result = db.session.execute(
+        update(Conversation).values({
+            # Tüm mesajları arşivlenmiş konuşmalar mevcut özetini korur
+            Conversation.last_message_id: func.coalesce(last_message, Conversation.last_message_id),
+            Conversation.last_message_sender_id: func.coalesce(
+                last_message_field(Message.sender_id), Conversation.last_message_sender_id
+            ),
+            Conversation.last_message_preview: func.coalesce(
+                func.substr(last_message_field(Message.content), 1, PREVIEW_LENGTH),
+                Conversation.last_message_preview
+            ),
+            Conversation.last_message_at: func.coalesce(
+                last_message_field(Message.created_at), Conversation.last_message_at,
+                Conversation.created_at
+            ),
+            Conversation.user1_unread_count: unread_for(
+                Conversation.user1_id, Conversation.user1_last_read_message_id
+            ),
+            Conversation.user2_unread_count: unread_for(
+                Conversation.user2_id, Conversation.user2_last_read_message_id
+            )
+        })
+    )
+
+    as_user1 = select(func.coalesce(func.sum(Conversation.user1_unread_count), 0)).where(
+        Conversation.user1_id == User.id
+    ).scalar_subquery()
+    as_user2 = select(func.coalesce(func.sum(Conversation.user2_unread_count), 0)).where(
+        Conversation.user2_id == User.id
+    ).scalar_subquery()
+    db.session.execute(update(User).values({User.unread_message_count: as_user1 + as_user2}))
+
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,86 @@
+"""
+counter_service.py
+------------------
+Post üzerindeki denormalize sayaçlar (like_count, comment_count).
+
+Sayaçlar her beğeni/yorum yazımında tek bir atomik
+"UPDATE posts SET x = x + 1" ile güncellenir; okuma tarafı (feed, topluluk
+listesi) böylece COUNT(*) çalıştırmadan sayıyı post satırından okur.
+
+Sayaçlar kayarsa (örn. elle yapılan veri düzeltmeleri) reconcile komutu
+post_likes/comments tablolarından toplu olarak yeniden hesaplar:
+    flask --app main reconcile-post-counters
+"""
+
+from sqlalchemy import update, select, func, bindparam
+from models import db, Post, PostLike, Comment
+
+
+def increment_post_counter(post_id, column, delta=1):
+    """
+    Post sayacını veritabanında atomik olarak artırır/azaltır.
+
+    Args:
+        post_id (int): Post ID'si
+        column: Post.like_count veya Post.comment_count
+        delta (int): Artış miktarı (azaltmak için negatif)
+
+    Returns:
+        int: Sayacın güncel değeri
+    """
+    return db.session.execute(
+        update(Post).where(Post.id == post_id).values(
+            {column: func.max(column + delta, 0)}
+        ).returning(column)
+    ).scalar()
+
+
+def apply_post_counter_deltas(column_name, deltas):
+    """
+    Birden çok postun sayacını tek bir executemany UPDATE ile günceller.
+
+    Args:
+        column_name (str): 'like_count' veya 'comment_count'
+        deltas (dict): {post_id: artış}
+
+    Returns:
+        None
+    """
+    params = [
+        {'target_id': post_id, 'delta': delta}
+        for post_id, delta in deltas.items() if delta
+    ]
+    if not params:
+        return
+
+    posts = Post.__table__
+    column = posts.c[column_name]
+    db.session.execute(
+        update(posts).where(posts.c.id == bindparam('target_id')).values(
+            {column: func.max(column + bindparam('delta'), 0)}
+        ),
+        params
+    )
+
+
+def reconcile_post_counters():
+    """
+    Tüm postların sayaçlarını post_likes ve comments tablolarından tek bir
+    UPDATE ile yeniden hesaplar.
+
+    Returns:
+        int: Güncellenen post sayısı
+    """
+    like_count = select(func.count(PostLike.id)).where(
+        PostLike.post_id == Post.id
+    ).scalar_subquery()
+    comment_count = select(func.count(Comment.id)).where(
+        Comment.post_id == Post.id
+    ).scalar_subquery()
+
+    result = db.session.execute(
+        update(Post).values(like_count=like_count, comment_count=comment_count)
+    )
+    db.session.commit()
+
+    return result.rowcount
@@ -0,0 +1,216 @@
+"""
+event_hub.py
+------------
+Gerçek zamanlı mesaj teslimi için süreç içi pub/sub hub'ı.
+
+İstemciler GET /api/stream ile Server-Sent Events bağlantısı açar ve yeni
+mesajlar, okundu bilgileri ve konuşma güncellemeleri push edilir; konuşma
+ekranlarının periyodik yoklaması gerekmez.
+
+Yapı:
+- Her olay global artan bir id alır ve alıcı kullanıcıların kısa geçmişine
+  (ring buffer) yazılır. Yeniden bağlanan istemci Last-Event-ID gönderir ve
+  kaçırdığı olaylar kuyruğun başına eklenir. Geçmiş hem kullanıcı başına
+  (STREAM_BACKLOG olay) hem kullanıcı sayısı olarak (STREAM_HISTORY_USERS, en
+  uzun süredir olay almayan düşer) sınırlıdır.
+- Her bağlantı sınırlı bir kuyruğa sahiptir. Boşta bekleyen bağlantı kuyrukta
+  bloklanır (heartbeat zaman aşımıyla). Kuyruğu dolan yavaş istemci kapatılır
+  ve Last-Event-ID ile geri gelir.
+- Thread'li sunucuda (Werkzeug, gthread worker) her açık akış bir iş
+  parçacığını bağlantı boyunca tutar. Bu yüzden worker başına bağlantı sayısı
+  STREAM_MAX_CONNECTIONS ile sınırlıdır; sınırdaki yeni bağlantı
+  StreamLimitReached alır (endpoint 503 + Retry-After döner) ve normal
+  istekler için iş parçacığı kalır.
+- Olay id'leri süreç belleğindedir ve yeniden başlatmada 0'dan başlar; geçmiş
+  de kaybolur. Yeniden başlatmadan önceki bir Last-Event-ID ile kaçırılan
+  olaylar geri getirilemez; istemci bağlanınca konuşmaları yeniden yüklemelidir.
+- Yayınlar commit sonrası yapılır; böylece istemci veritabanında olmayan bir
+  mesajı görmez.
+
+Not: Hub süreç içidir. Birden çok worker ile çalışırken kullanıcının bağlantısı
+ile yazma isteği aynı süreçte olmalıdır (sticky routing) veya hub paylaşımlı
+bir broker ile değiştirilmelidir.
+
+Konfigürasyon:
+    STREAM_HEARTBEAT_INTERVAL: Heartbeat aralığı (saniye)
+    STREAM_BACKLOG: Kullanıcı başına resume için tutulan olay sayısı
+    STREAM_QUEUE_SIZE: Bağlantı başına bekleyen olay sınırı
+    STREAM_HISTORY_USERS: Geçmişi tutulan kullanıcı sınırı
+    STREAM_MAX_CONNECTIONS: Worker başına açık akış sınırı
+"""
+
+import json
+import queue
+import threading
+from collections import defaultdict, deque, OrderedDict
+from flask import current_app
+
+# Konfigürasyon
+DEFAULT_HEARTBEAT_INTERVAL = 15  # saniye
+DEFAULT_BACKLOG = 100
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_HISTORY_USERS = 10000
+DEFAULT_MAX_CONNECTIONS = 100
+
+# Kuyrukta "bağlantı kapandı" işareti; get()'in zaman aşımı (None) ile karışmaz
+CLOSED = object()
+
+
+class StreamLimitReached(Exception):
+    """Worker'ın akış bağlantısı sınırı dolu; istemci sonra tekrar bağlanmalı."""
+
+
+class Subscription:
+    """Tek bir stream bağlantısı."""
+
+    def __init__(self, user_id, queue_size):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Yavaş istemci: bağlantıyı kapat, Last-Event-ID ile devam eder
+            self.close()
+
+    def close(self):
+        self.closed = True
+        try:
+            self.queue.put_nowait(CLOSED)
+        except queue.Full:
+            pass
+
+    def get(self, timeout):
+        """
+        Sıradaki olayı döndürür; zaman aşımında None (heartbeat zamanı),
+        bağlantı kapatıldıysa CLOSED.
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventHub:
+    """Kullanıcı başına abonelik ve olay geçmişi tutan fan-out hub'ı."""
+
+    def __init__(self, backlog=DEFAULT_BACKLOG, queue_size=DEFAULT_QUEUE_SIZE,
+                 history_users=DEFAULT_HISTORY_USERS, max_connections=DEFAULT_MAX_CONNECTIONS):
+        self.backlog = backlog
+        self.queue_size = queue_size
+        self.history_users = history_users
+        self.max_connections = max_connections
+        self._subscribers = defaultdict(set)
+        self._connections = 0
+        self._history = OrderedDict()  # user_id -> deque; LRU
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def publish(self, user_ids, event_type, data):
+        """
+        Olayı verilen kullanıcıların tüm bağlantılarına iletir.
+
+        Args:
+            user_ids (iterable): Alıcı kullanıcı ID'leri
+            event_type (str): SSE olay adı (örn. 'message', 'read')
+            data (dict): JSON olarak gönderilecek veri
+
+        Returns:
+            int: Olayın id'si
+        """
+        with self._lock:
+            self._last_id += 1
+            event = (self._last_id, event_type, json.dumps(data, ensure_ascii=False))
+            for user_id in set(user_ids):
+                self._remember(user_id, event)
+                for subscription in self._subscribers.get(user_id, ()):
+                    subscription.push(event)
+            return event[0]
+
+    def _remember(self, user_id, event):
+        history = self._history.pop(user_id, None)
+        if history is None:
+            history = deque(maxlen=self.backlog)
+        history.append(event)
+        self._history[user_id] = history
+        while len(self._history) > self.history_users:
+            self._history.popitem(last=False)
+
+    def subscribe(self, user_id, last_event_id=None):
+        """
+        Kullanıcı için yeni bağlantı açar.
+
+        last_event_id verilirse geçmişteki daha yeni olaylar kuyruğa önceden
+        eklenir. Kayıt ve geçmiş okuma aynı kilit altında yapıldığı için arada
+        yayınlanan olay kaybolmaz.
+
+        Raises:
+            StreamLimitReached: Açık bağlantı sayısı max_connections'a ulaştı
+        """
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            if self._connections >= self.max_connections:
+                raise StreamLimitReached()
+            self._connections += 1
+            if last_event_id is not None:
+                for event in self._history.get(user_id, ()):
+                    if event[0] > last_event_id:
+                        subscription.push(event)
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None and subscription in subscribers:
+                self._connections -= 1
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def close(self):
+        """Tüm bağlantıları kapatır (kapanışta); akışlar CLOSED ile sonlanır."""
+        with self._lock:
+            subscriptions = [s for subscribers in self._subscribers.values() for s in subscribers]
+        for subscription in subscriptions:
+            subscription.close()
+
+    def connection_count(self):
+        with self._lock:
+            return self._connections
+
+
+def init_event_hub(app, hub=None):
+    """
+    Event hub'ını uygulamaya bağlar.
+
+    Args:
+        app (Flask): Uygulama
+        hub: Opsiyonel hub; verilmezse konfigürasyondan EventHub oluşturulur
+    """
+    if hub is None:
+        hub = EventHub(
+            backlog=app.config.get('STREAM_BACKLOG', DEFAULT_BACKLOG),
+            queue_size=app.config.get('STREAM_QUEUE_SIZE', DEFAULT_QUEUE_SIZE),
+            history_users=app.config.get('STREAM_HISTORY_USERS', DEFAULT_HISTORY_USERS),
+            max_connections=app.config.get('STREAM_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)
+        )
+    app.extensions['event_hub'] = hub
+
+
+def get_event_hub():
+    return current_app.extensions['event_hub']
+
+
+def publish(user_ids, event_type, data):
+    """Kısayol: olayı verilen kullanıcılara yayınlar."""
+    if user_ids:
+        return get_event_hub().publish(user_ids, event_type, data)
+
+
+def format_event(event):
+    """(id, tür, json) olayını SSE metin bloğuna çevirir."""
+    event_id, event_type, payload = event
+    return f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'
@@ -0,0 +1,170 @@
+"""
+feed_cache.py
+-------------
+Serileştirilmiş /api/feed cevapları için kullanıcı başına cache.
+
+Mobil istemciler feed'i sürekli yokluyor ve cevapların çoğu bir öncekiyle
+aynı. Cache, (user_id, cursor, limit, ...) anahtarıyla serileştirilmiş
+sayfayı (postlar + sayfalama alanları) tutar; isabet durumunda timeline ve
+projeksiyon sorguları çalışmaz. Sık değişen beğeni/yorum sayıları ve isLiked
+sayfanın parçası sayılmaz: her cevapta tek bir IN sorgusuyla post
+satırından tazelenir (routes/feed.py refresh_counters). ETag son gövdeden
+hesaplanır; istemcinin If-None-Match başlığı eşleşirse 304 Not Modified döner.
+
+Geçersizleştirme kullanıcı başına "generation" sayacı ile yapılır: bir
+kullanıcının feed'inin içeriğini değiştiren yazımlarda (yeni post, silme,
+takip) sayaç artırılır ve o kullanıcının eski anahtarlarına bir daha
+ulaşılmaz. Beğeni ve yorumlar geçersizleştirme yapmaz; aksi halde tek bir
+beğeni postun tüm kitlesinin (üyeler + takipçiler) cache'ini düşürürdü; eski kayıtlar LRU/TTL ile düşer. Anahtar sorgudan önce bir kez
+okunur ve cevap aynı anahtarla yazılır: sorgu sırasında gelen bir
+geçersizleştirme eski gövdenin yeni nesle yazılmasına yol açmaz.
+
+Backend takılabilir: get/set/get_counter/incr metodlarını sağlayan herhangi
+bir nesne (örn. paylaşımlı bir Redis istemcisi sarmalayıcısı) kullanılabilir;
+paylaşımlı backend'ler sayfa sözlüğünü kendileri serileştirir. Varsayılan
+MemoryBackend süreç içi LRU + TTL'dir; sayfa nesnesi paylaşıldığı için
+okuyanlar onu değiştirmez.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+from flask import current_app, request
+
+# Konfigürasyon
+DEFAULT_TTL = 30  # saniye
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class MemoryBackend:
+    """Süreç içi, thread-safe LRU + TTL cache backend'i."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Sayaçlar da LRU ile sınırlıdır. Düşen bir sayaç yeniden okunduğunda
+        # 0'dan değil, düşenlerin hepsinden büyük bir değerden başlar; böylece
+        # eski nesillerle yazılmış kayıtlar tekrar geçerli hale gelmez
+        self._counters = OrderedDict()
+        self._counter_floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _counter(self, key):
+        value = self._counters.get(key)
+        if value is None:
+            return self._counter_floor
+        self._counters.move_to_end(key)
+        return value
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counter(key)
+
+    def incr(self, key):
+        with self._lock:
+            value = self._counter(key) + 1
+            self._counters[key] = value
+            self._counters.move_to_end(key)
+            while len(self._counters) > self.max_entries:
+                _, dropped = self._counters.popitem(last=False)
+                self._counter_floor = max(self._counter_floor, dropped + 1)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+            self._counter_floor = 0
+
+
+class FeedCache:
+    """Kullanıcı başına feed cevap cache'i."""
+
+    def __init__(self, backend, ttl=DEFAULT_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    def _key(self, user_id, variant):
+        generation = self.backend.get_counter(f'feed:gen:{user_id}')
+        return f'feed:{user_id}:{generation}:{variant}'
+
+    def get(self, user_id, variant):
+        """
+        Önbellekteki cevabı arar.
+
+        Returns:
+            tuple: (key, sayfa sözlüğü veya None) - ıskalamada key set()'e verilir
+        """
+        key = self._key(user_id, variant)
+        return key, self.backend.get(key)
+
+    def set(self, key, page):
+        """Sayfayı get()'in döndürdüğü (sorgu öncesi nesil) anahtarla yazar."""
+        self.backend.set(key, page, self.ttl)
+
+    def invalidate(self, user_ids):
+        """Verilen kullanıcıların tüm cache'li feed sayfalarını geçersiz kılar."""
+        for user_id in set(user_ids):
+            self.backend.incr(f'feed:gen:{user_id}')
+
+
+def init_feed_cache(app, backend=None):
+    """
+    Feed cache'ini uygulamaya bağlar.
+
+    Args:
+        app (Flask): Uygulama
+        backend: Opsiyonel cache backend'i; verilmezse MemoryBackend
+    """
+    if backend is None:
+        backend = MemoryBackend(app.config.get('FEED_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+    app.extensions['feed_cache'] = FeedCache(backend, app.config.get('FEED_CACHE_TTL', DEFAULT_TTL))
+
+
+def get_feed_cache():
+    return current_app.extensions['feed_cache']
+
+
+def request_variant():
+    """
+    İsteğin user_id dışındaki parametrelerinden (cursor, limit, page, ...)
+    sıralı ve kararlı bir cache anahtarı parçası üretir.
+    """
+    params = sorted(
+        (key, value) for key, value in request.args.items(multi=True) if key != 'user_id'
+    )
+    return urlencode(params)
+
+
+def compute_etag(body):
+    """Cevap gövdesinden güçlü (strong) ETag değeri üretir."""
+    return hashlib.sha1(body).hexdigest()
+
+
+def invalidate_feeds(user_ids):
+    """Kısayol: verilen kullanıcıların feed cache'ini geçersiz kılar."""
+    if user_ids:
+        get_feed_cache().invalidate(user_ids)
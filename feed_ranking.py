@@ -0,0 +1,200 @@
+"""
+feed_ranking.py
+---------------
+Etkileşime göre sıralanmış feed modu (/api/feed?mode=ranked).
+
+Kullanıcının timeline'ından sınırlı bir aday kümesi (son N post) tek bir
+kolon-projeksiyonlu sorguyla çekilir ve NumPy dizileri üzerinde vektörel
+olarak puanlanır:
+
+    skor = (base + like_weight * beğeni + comment_weight * yorum)
+           * 0.5 ** (yaş_saat / half_life_hours)
+
+İlk sayfanın sıralaması (post_id, skor) snapshot'ı olarak feed cache
+backend'inde saklanır ve cursor snapshot'ı ve sırayı taşır; sonraki sayfalar
+aynı sıralamadan dilimlenir, sayfalar arasında değişen sayılar bir postu
+atlatmaz veya tekrarlatmaz. Cursor ayrıca referans zamanı, skor ve id'yi
+taşır: snapshot düşmüşse sonraki sayfa bunlarla yeniden puanlanır (yaklaşık
+kararlı).
+
+Ağırlıklar FEED_RANKING_WEIGHTS, aday sayısı FEED_RANKING_CANDIDATES,
+snapshot ömrü FEED_RANKING_SNAPSHOT_TTL konfigürasyonundan okunur. Performans ölçümü için: python bench_feed_ranking.py
+"""
+
+import secrets
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from models import db, Post, TimelineEntry
+from pagination import encode_cursor, decode_cursor_payload, invalid_cursor
+from serializers import post_query
+from feed_cache import get_feed_cache
+
+# Konfigürasyon
+DEFAULT_CANDIDATES = 500
+DEFAULT_SNAPSHOT_TTL = 600  # saniye
+DEFAULT_WEIGHTS = {
+    'base': 1.0,
+    'like_weight': 1.0,
+    'comment_weight': 2.0,
+    'half_life_hours': 24.0
+}
+
+
+def get_weights():
+    weights = dict(DEFAULT_WEIGHTS)
+    weights.update(current_app.config.get('FEED_RANKING_WEIGHTS', {}))
+    return weights
+
+
+def score_candidates(age_hours, likes, comments, weights):
+    """
+    Aday postları vektörel olarak puanlar.
+
+    Args:
+        age_hours (ndarray): Postların saat cinsinden yaşı
+        likes (ndarray): Beğeni sayıları
+        comments (ndarray): Yorum sayıları
+        weights (dict): base, like_weight, comment_weight, half_life_hours
+
+    Returns:
+        ndarray: Her aday için skor
+    """
+    engagement = (
+        weights['base']
+        + weights['like_weight'] * likes
+        + weights['comment_weight'] * comments
+    )
+    decay = np.exp2(-np.maximum(age_hours, 0.0) / weights['half_life_hours'])
+    return engagement * decay
+
+
+def rank_candidates(post_ids, scores):
+    """
+    Adayları skora göre azalan, eşitlikte id'ye göre azalan sıralar.
+
+    Returns:
+        ndarray: Sıralı pozisyon indeksleri
+    """
+    # np.lexsort son anahtara göre birincil sıralar
+    return np.lexsort((-post_ids, -scores))
+
+
+def decode_ranked_cursor(cursor):
+    """Ranked cursor'ı (snapshot, sıra, referans zamanı, skor, post_id) olarak çözer."""
+    snapshot, offset, ref_time, score, post_id = decode_cursor_payload(cursor, 5)
+    try:
+        return str(snapshot), int(offset), datetime.fromisoformat(ref_time), float(score), int(post_id)
+    except (ValueError, TypeError):
+        invalid_cursor()
+
+
+def snapshot_key(user_id, snapshot):
+    return f'ranked:{user_id}:{snapshot}'
+
+
+def rank_timeline(user_id, ref_time, seek_score=None, seek_id=None):
+    """
+    Aday kümesini ref_time'a göre puanlar ve sıralar.
+
+    Args:
+        user_id (int): Kullanıcı ID'si
+        ref_time (datetime): Puanlamanın referans zamanı
+        seek_score (float): Verilirse sadece (skor, id) < (seek_score, seek_id) adaylar
+        seek_id (int): Cursor'daki son post
+
+    Returns:
+        tuple: Sıralı (post_id, skor) çiftleri
+    """
+    # Aday kümesi: timeline'daki son N post, sadece puanlama kolonları
+    rows = db.session.query(
+        Post.id, Post.created_at, Post.like_count, Post.comment_count
+    ).join(
+        TimelineEntry, TimelineEntry.post_id == Post.id
+    ).filter(
+        TimelineEntry.user_id == user_id,
+        Post.deleted_at.is_(None)
+    ).order_by(
+        TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc()
+    ).limit(
+        current_app.config.get('FEED_RANKING_CANDIDATES', DEFAULT_CANDIDATES)
+    ).all()
+
+    if not rows:
+        return ()
+
+    post_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    created = np.array([row[1] for row in rows], dtype='datetime64[us]')
+    likes = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+    comments = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+
+    age_hours = (np.datetime64(ref_time, 'us') - created) / np.timedelta64(1, 'h')
+    scores = score_candidates(age_hours, likes, comments, get_weights())
+    order = rank_candidates(post_ids, scores)
+
+    # Cursor'dan sonraki adaylar: (skor, id) < (seek_score, seek_id)
+    if seek_id is not None:
+        ranked_scores = scores[order]
+        ranked_ids = post_ids[order]
+        after = (ranked_scores < seek_score) | (
+            (ranked_scores == seek_score) & (ranked_ids < seek_id)
+        )
+        order = order[after]
+
+    return tuple(zip(post_ids[order].tolist(), scores[order].tolist()))
+
+
+def ranked_page(user_id, limit, cursor=None):
+    """
+    Kullanıcının sıralanmış feed sayfasını döndürür.
+
+    İlk sayfada sıralamanın tamamı (post_id, skor) snapshot'ı olarak
+    FEED_RANKING_SNAPSHOT_TTL süreyle saklanır ve sonraki sayfalar bu
+    snapshot'tan dilimlenir: sayfalar arasında değişen beğeni/yorum sayıları
+    bir postu atlatmaz veya tekrarlatmaz. Snapshot yoksa (süresi doldu, başka
+    worker) cursor'daki (referans zamanı, skor, id) ile güncel sayılar
+    yeniden puanlanır; bu yedek yolda sıralama sadece yaklaşık olarak
+    kararlıdır.
+
+    Args:
+        user_id (int): Kullanıcı ID'si
+        limit (int): Sayfa boyutu
+        cursor (str): Önceki sayfanın next_cursor değeri
+
+    Returns:
+        tuple: (posts, meta) - posts skor sırasında post_query() satırları
+    """
+    limit = max(limit, 1)
+    backend = get_feed_cache().backend
+    ranked = None
+    if cursor:
+        snapshot, offset, ref_time, seek_score, seek_id = decode_ranked_cursor(cursor)
+        ranked = backend.get(snapshot_key(user_id, snapshot))
+
+    if ranked is None:
+        if cursor:
+            ranked = rank_timeline(user_id, ref_time, seek_score, seek_id)
+        else:
+            ref_time = datetime.utcnow()
+            ranked = rank_timeline(user_id, ref_time)
+        snapshot, offset = secrets.token_hex(8), 0
+        backend.set(
+            snapshot_key(user_id, snapshot), ranked,
+            current_app.config.get('FEED_RANKING_SNAPSHOT_TTL', DEFAULT_SNAPSHOT_TTL)
+        )
+
+    page = ranked[offset:offset + limit]
+    page_ids = [post_id for post_id, _ in page]
+
+    # Snapshot'tan sonra silinen postlar sayfadan düşer
+    posts_by_id = {
+        post.id: post for post in post_query().filter(Post.id.in_(page_ids), Post.deleted_at.is_(None))
+    }
+    posts = [posts_by_id[post_id] for post_id in page_ids if post_id in posts_by_id]
+
+    next_cursor = None
+    if len(ranked) > offset + limit:
+        last_id, last_score = page[-1]
+        next_cursor = encode_cursor([snapshot, offset + limit, ref_time, last_score, last_id])
+
+    return posts, {'next_cursor': next_cursor, 'has_more': next_cursor is not None, 'mode': 'ranked'}
@@ -10,54 +10,169 @@ from routes.auth import auth_bp
 from routes.messages import messages_bp
 from routes.upload import upload_bp
 from routes.discover import discover_bp
+from routes.batch import batch_bp
+from routes.stream import stream_bp
+from routes.presence import presence_bp, start_presence_sweeper
+from routes.users import users_bp
+from commands import register_commands
+from feed_cache import init_feed_cache
+from event_hub import init_event_hub
+from presence import init_presence
+from token_cache import init_token_cache
+from revocation import init_revocation
+from rate_limit import init_rate_limit
+from user_cache import init_user_cache
+from schema_service import check_schema
 import os
 
-app = Flask(__name__)
-
-# Upload klasörü
 UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
-# Configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///campus.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['MAX_CONTENT_LENGTH'] = 20 * 1024 * 1024  # 20MB max file size
-
-# CORS
-CORS(app)
-
-# Database
-db.init_app(app)
-
-# Blueprints
-app.register_blueprint(auth_bp)
-app.register_blueprint(feed_bp)
-app.register_blueprint(communities_bp)
-app.register_blueprint(events_bp)
-app.register_blueprint(mentors_bp)
-app.register_blueprint(messages_bp)
-app.register_blueprint(upload_bp)
-app.register_blueprint(discover_bp)
-
-# Database tabloları oluştur
-with app.app_context():
-    db.create_all()
-    print("[OK] Database tablolari olusturuldu!")
-
-@app.route('/')
-def index():
-    return {'message': 'Campus Social API', 'status': 'running'}, 200
-
-@app.route('/health')
-def health():
-    return {'status': 'healthy'}, 200
-
-@app.route('/uploads/<filename>')
-def uploaded_file(filename):
-    """Serve uploaded files"""
-    return send_from_directory(UPLOAD_FOLDER, filename)
+
+
+def create_app():
+    """
+    Uygulamayı kurar: konfigürasyon, eklentiler, blueprint'ler ve tablolar.
+
+    Şifre hash havuzunun (password_service) spawn ile başlayan worker'ları
+    __main__ modülünü '__mp_main__' adıyla yeniden import eder; uygulama bu
+    yüzden modül seviyesinde koşulsuz değil, sadece ana süreçte kurulur.
+    """
+    app = Flask(__name__)
+
+    # Upload klasörü
+    if not os.path.exists(UPLOAD_FOLDER):
+        os.makedirs(UPLOAD_FOLDER)
+
+    # Configuration
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///campus.db')  # Testler geçici dosya verir
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SCHEMA_CHECK'] = os.environ.get('SCHEMA_CHECK', '1') != '0'  # upgrade-db için 0
+    app.config['SECRET_KEY'] = 'your-secret-key-here'
+    app.config['MAX_CONTENT_LENGTH'] = 20 * 1024 * 1024  # 20MB max file size
+    app.config['TIMELINE_MAX_DEPTH'] = 500  # Kullanıcı başına tutulacak feed kaydı
+    app.config['FEED_CACHE_TTL'] = 30  # saniye
+    app.config['FEED_CACHE_MAX_ENTRIES'] = 10000
+    app.config['BACKGROUND_WORKERS'] = 1  # Arka plan bakım işleri
+    app.config['FEED_RANKING_CANDIDATES'] = 500  # mode=ranked aday kümesi
+    app.config['FEED_RANKING_SNAPSHOT_TTL'] = 600  # Sayfalar arası sabit sıralama (saniye)
+    app.config['FEED_RANKING_WEIGHTS'] = {
+        'base': 1.0,
+        'like_weight': 1.0,
+        'comment_weight': 2.0,
+        'half_life_hours': 24.0
+    }
+    app.config['STREAM_HEARTBEAT_INTERVAL'] = 15  # saniye
+    app.config['STREAM_BACKLOG'] = 100  # Last-Event-ID resume için kullanıcı başına olay
+    app.config['STREAM_QUEUE_SIZE'] = 1000  # Bağlantı başına bekleyen olay sınırı
+    app.config['STREAM_HISTORY_USERS'] = 10000  # Last-Event-ID geçmişi tutulan kullanıcı sınırı
+    app.config['STREAM_MAX_CONNECTIONS'] = 100  # Worker başına açık akış (her biri bir iş parçacığı tutar)
+    app.config['MESSAGE_ARCHIVE_AFTER_DAYS'] = 90  # Bundan eski okunmuş mesajlar arşivlenir
+    app.config['ARCHIVE_BLOCK_SIZE'] = 200  # Sıkıştırılmış blok başına mesaj
+    app.config['PRESENCE_TTL'] = 60  # Son heartbeat'ten sonra çevrimiçi sayılma (saniye)
+    app.config['TYPING_TTL'] = 6  # Son typing isteğinden sonra "yazıyor" (saniye)
+    app.config['PRESENCE_SWEEP_INTERVAL'] = 1  # Süresi dolan durumların yayını (saniye)
+    app.config['TOKEN_CACHE_TTL'] = 300  # Doğrulanmış token snapshot'ı (saniye)
+    app.config['TOKEN_CACHE_MAX_ENTRIES'] = 10000
+    app.config['USER_CACHE_TTL'] = 60  # /api/users profil kartı (saniye)
+    app.config['USER_CACHE_MAX_ENTRIES'] = 10000
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt:32768:8:1'  # Değişirse girişte yeniden hash'lenir
+    # None: CPU sayısı kadar süreç (tek CPU'da havuz yok, hash istek thread'inde); 0: havuz yok
+    workers = os.environ.get('PASSWORD_HASH_WORKERS')
+    app.config['PASSWORD_HASH_WORKERS'] = int(workers) if workers else None
+    app.config['PASSWORD_HASH_MAX_PENDING'] = 64  # Bekleyen hash işi sınırı (aşılırsa 503)
+    app.config['ACCESS_TOKEN_TTL'] = 15 * 60  # saniye
+    app.config['REFRESH_TOKEN_TTL'] = 30 * 24 * 3600  # saniye; her kullanımda döndürülür
+    app.config['REVOCATION_FILTER_BITS'] = 1 << 20  # İptal edilmiş oturum Bloom filtresi
+    app.config['REVOCATION_FILTER_HASHES'] = 7
+    app.config['REVOCATION_REBUILD_INTERVAL'] = 30  # saniye; diğer worker'ların iptalleri
+    app.config['RATE_LIMIT_ENABLED'] = True
+    app.config['RATE_LIMITS'] = {  # Blueprint başına kullanıcı limiti: rate token/sn, burst kapasite
+        'default': {'rate': 20, 'burst': 60},
+        'feed': {'rate': 10, 'burst': 40},
+        'auth': {'rate': 1, 'burst': 10},  # Şifre hash'leme pahalı
+        'batch': {'rate': 2, 'burst': 10},
+        'upload': {'rate': 1, 'burst': 5},
+        'presence': {'rate': 5, 'burst': 20},
+        'stream': {'rate': 0.2, 'burst': 5},  # Yeniden bağlanma fırtınası
+    }
+    app.config['RATE_LIMIT_IP_MULTIPLIER'] = 5  # IP limiti = kullanıcı limiti x 5 (NAT arkası kullanıcılar)
+    app.config['RATE_LIMIT_MAX_KEYS'] = 100000
+    app.config['MAX_IN_FLIGHT_REQUESTS'] = 64  # Aşılırsa 503 + Retry-After
+
+    # CORS
+    CORS(app)
+
+    # Hız sınırı ve load shedding (tüm blueprint'lerden önce)
+    init_rate_limit(app)
+
+    # Database
+    db.init_app(app)
+
+    # Feed cevap cache'i
+    init_feed_cache(app)
+
+    # Gerçek zamanlı olay hub'ı (SSE)
+    init_event_hub(app)
+
+    # Çevrimiçi / yazıyor durumları (bellekte, TTL)
+    init_presence(app)
+
+    # Doğrulanmış token cache'i (token_required)
+    init_token_cache(app)
+
+    # İptal edilmiş oturumlar (Bloom filtresi)
+    init_revocation(app)
+
+    # Sıcak kullanıcıların profil kartları (/api/users)
+    init_user_cache(app)
+
+    # Blueprints
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(feed_bp)
+    app.register_blueprint(communities_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(mentors_bp)
+    app.register_blueprint(messages_bp)
+    app.register_blueprint(upload_bp)
+    app.register_blueprint(discover_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(stream_bp)
+    app.register_blueprint(presence_bp)
+    app.register_blueprint(users_bp)
+
+    # Süresi dolan çevrimiçi/yazıyor durumlarının yayını (arka plan thread'i)
+    start_presence_sweeper(app)
+
+    # CLI komutları
+    register_commands(app)
+
+    # Database tabloları oluştur
+    with app.app_context():
+        db.create_all()
+        # Eski şemalı veritabanında istek almadan dur (create_all kolon eklemez)
+        if app.config['SCHEMA_CHECK']:
+            check_schema()
+        print("[OK] Database tablolari olusturuldu!")
+
+    @app.route('/')
+    def index():
+        return {'message': 'Campus Social API', 'status': 'running'}, 200
+
+    @app.route('/health')
+    def health():
+        return {'status': 'healthy'}, 200
+
+    @app.route('/uploads/<filename>')
+    def uploaded_file(filename):
+        """Serve uploaded files"""
+        return send_from_directory(UPLOAD_FOLDER, filename)
+
+    return app
+
+
+# Hash havuzu worker'larında uygulama (create_all, thread'ler) kurulmaz
+if __name__ != '__mp_main__':
+    app = create_app()
+
 
 if __name__ == '__main__':
     # host='0.0.0.0' - Tüm network interfacelerinde dinle (mobil cihazlar için)
@@ -1,5 +1,6 @@
 # models.py
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, DDL
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -37,12 +38,32 @@ class User(db.Model):
     name = db.Column(db.String(100), nullable=False)
     avatar = db.Column(db.String(200))
     email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(256))  # werkzeug biçimi: yöntem$salt$hash
     bio = db.Column(db.Text)
     department = db.Column(db.String(100))
     year = db.Column(db.Integer)
     age = db.Column(db.Integer)
     interests = db.Column(db.Text)  # JSON string olarak saklanacak
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    unread_message_count = db.Column(db.Integer, nullable=False, default=0)  # Tüm konuşmalardaki okunmamış mesajlar
+
+class RefreshToken(db.Model):
+    """Döndürülen (rotating) refresh token; token'ın kendisi değil SHA-256 özeti saklanır."""
+    __tablename__ = 'refresh_tokens'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    session_id = db.Column(db.String(32), nullable=False)  # Aynı oturumun döndürülen token zinciri
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked_at = db.Column(db.DateTime)  # Döndürüldü veya oturum kapatıldı
+    replaced_by_id = db.Column(db.Integer, db.ForeignKey('refresh_tokens.id'))  # Döndürmede yeni token
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_refresh_tokens_session', 'session_id'),
+        db.Index('ix_refresh_tokens_user', 'user_id'),
+        db.Index('ix_refresh_tokens_revoked', 'revoked_at'),
+    )
 
 class Community(db.Model):
     __tablename__ = 'communities'
@@ -53,6 +74,10 @@ class Community(db.Model):
     category = db.Column(db.String(50))
     established = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_communities_created_id', 'created_at', 'id'),
+    )
     
     members = db.relationship('User', secondary=community_members, backref='communities')
     followers = db.relationship('User', secondary=community_followers, backref='following_communities')
@@ -69,6 +94,10 @@ class Event(db.Model):
     description = db.Column(db.Text)
     capacity = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_events_date_id', 'date', 'id'),
+    )
     
     community = db.relationship('Community', backref='events')
     interested_users = db.relationship('User', secondary=event_interests, backref='interested_events')
@@ -83,6 +112,9 @@ class Post(db.Model):
     type = db.Column(db.String(20), nullable=False)
     media_type = db.Column(db.String(20))  # 'image', 'video', None
     media_url = db.Column(db.String(500))  # URL veya path
+    like_count = db.Column(db.Integer, nullable=False, default=0)  # Denormalize sayaç
+    comment_count = db.Column(db.Integer, nullable=False, default=0)  # Denormalize sayaç
+    deleted_at = db.Column(db.DateTime)  # Soft delete; bağlı satırlar arka planda temizlenir
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     author = db.relationship('User', backref='posts')
@@ -97,17 +129,43 @@ class PostLike(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Kullanıcı bir postu bir kez beğenebilir; eşzamanlı beğeniler ON CONFLICT ile tek satır
+    __table_args__ = (
+        db.UniqueConstraint('post_id', 'user_id', name='uq_post_likes_post_user'),
+    )
+
 class Comment(db.Model):
     __tablename__ = 'comments'
     id = db.Column(db.Integer, primary_key=True)
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    parent_id = db.Column(db.Integer, db.ForeignKey('comments.id'), nullable=True)  # Yanıt ise üst yorum
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_comments_post_parent_created_id', 'post_id', 'parent_id', 'created_at', 'id'),
+        db.Index('ix_comments_parent_created_id', 'parent_id', 'created_at', 'id'),
+    )
+
     author = db.relationship('User', backref='comments')
     post_ref = db.relationship('Post', backref='comments')
 
+class TimelineEntry(db.Model):
+    __tablename__ = 'timeline_entries'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)  # Post'un created_at değeri (sıralama anahtarı)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'post_id', name='uq_timeline_user_post'),
+        db.Index('ix_timeline_user_created', 'user_id', 'created_at', 'post_id'),
+        db.Index('ix_timeline_post', 'post_id'),
+    )
+
+    post = db.relationship('Post')
+
 class CommunityTag(db.Model):
     __tablename__ = 'community_tags'
     id = db.Column(db.Integer, primary_key=True)
@@ -128,6 +186,12 @@ class Mentor(db.Model):
     sessions_completed = db.Column(db.Integer, default=0)
     response_time = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # rating boş olabilir: sıralama/seek coalesce(rating, 0) üzerindendir
+    # (NULL'lar en sonda); indeks aynı ifade üzerinde kurulur
+    __table_args__ = (
+        db.Index('ix_mentors_rating_id', db.func.coalesce(rating, db.literal_column('0.0')), id),
+    )
     
     user = db.relationship('User', backref='mentor_profile')
     followers = db.relationship('User', secondary=mentor_followers, backref='following_mentors')
@@ -143,11 +207,40 @@ class MentorExpertise(db.Model):
 class Conversation(db.Model):
     __tablename__ = 'conversations'
     id = db.Column(db.Integer, primary_key=True)
+    # Normalize çift: user1_id her zaman küçük olan kullanıcı ID'si
     user1_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     user2_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     last_message_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Gelen kutusu özeti (mesaj yazımında güncellenir)
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_message_sender_id = db.Column(db.Integer, nullable=True)
+    last_message_preview = db.Column(db.String(200), nullable=True)
+    user1_unread_count = db.Column(db.Integer, nullable=False, default=0)
+    user2_unread_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Okuma watermark'ları: katılımcının okuduğu en büyük mesaj id'si
+    user1_last_read_message_id = db.Column(db.Integer, nullable=False, default=0)
+    user2_last_read_message_id = db.Column(db.Integer, nullable=False, default=0)
+
+    # Kullanıcı başına silme (gizleme): gizleyen kullanıcı konuşmayı gelen
+    # kutusunda görmez ve cleared id'ye kadarki mesajlar onun için silinmiştir
+    user1_hidden = db.Column(db.Boolean, nullable=False, default=False)
+    user2_hidden = db.Column(db.Boolean, nullable=False, default=False)
+    user1_cleared_message_id = db.Column(db.Integer, nullable=False, default=0)
+    user2_cleared_message_id = db.Column(db.Integer, nullable=False, default=0)
+
+    # Bu id'ye kadarki mesajlar messages tablosundan arşiv segmentine taşındı
+    archived_through_message_id = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user1_id', 'user2_id', name='uq_conversations_pair'),
+        db.CheckConstraint('user1_id < user2_id', name='ck_conversations_pair_order'),
+        db.Index('ix_conversations_user1_last', 'user1_id', 'last_message_at', 'id'),
+        db.Index('ix_conversations_user2_last', 'user2_id', 'last_message_at', 'id'),
+    )
+
     user1 = db.relationship('User', foreign_keys=[user1_id], backref='conversations_as_user1')
     user2 = db.relationship('User', foreign_keys=[user2_id], backref='conversations_as_user2')
     messages = db.relationship('Message', backref='conversation', lazy='dynamic', cascade='all, delete-orphan')
@@ -158,7 +251,53 @@ class Message(db.Model):
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id'), nullable=False)
     sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
-    is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    sender = db.relationship('User', backref='sent_messages')
\ No newline at end of file
+    __table_args__ = (
+        db.Index('ix_messages_conv_created_id', 'conversation_id', 'created_at', 'id'),
+        db.Index('ix_messages_conv_id', 'conversation_id', 'id'),
+        # Arşivlenip silinen mesajların id'leri tekrar kullanılmamalı
+        {'sqlite_autoincrement': True},
+    )
+
+    sender = db.relationship('User', backref='sent_messages')
+
+class MessageArchiveBlock(db.Model):
+    """Arşivlenmiş mesaj bloğunun segment dosyasındaki yeri (offset indeksi)."""
+    __tablename__ = 'message_archive_blocks'
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id'), nullable=False)
+    first_message_id = db.Column(db.Integer, nullable=False)
+    last_message_id = db.Column(db.Integer, nullable=False)
+    offset = db.Column(db.Integer, nullable=False)  # Segment dosyasındaki bayt konumu
+    length = db.Column(db.Integer, nullable=False)  # Sıkıştırılmış blok boyutu
+    message_count = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_archive_blocks_conv_last', 'conversation_id', 'last_message_id'),
+    )
+
+# Mesaj arama indeksi: messages tablosuna bağlı (external content) FTS5 tablosu.
+# Trigger'lar her INSERT/UPDATE/DELETE'i indekse yansıtır; tablo create_all ile
+# birlikte kurulur, mevcut veritabanları için: flask --app main rebuild-message-search
+MESSAGE_SEARCH_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        content, content='messages', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+)
+
+for statement in MESSAGE_SEARCH_DDL:
+    event.listen(Message.__table__, 'after_create', DDL(statement))
+event.listen(Message.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS messages_fts'))
@@ -0,0 +1,208 @@
+"""
+pagination.py
+-------------
+Liste endpoint'leri için keyset (cursor) sayfalama.
+
+OFFSET/LIMIT + COUNT(*) yerine, son döndürülen satırın sıralama anahtarını
+(örn. (created_at, id)) opak bir cursor olarak istemciye verir ve sonraki
+sayfayı "(created_at, id) < (cursor)" seek koşuluyla getirir. Derin sayfalar
+ilk sayfa kadar ucuzdur ve yeni satırlar eklendiğinde öğeler sayfalar arasında
+kaymaz.
+
+Cursor modu, istekte `cursor` parametresi bulunduğunda (ilk sayfa için boş
+olabilir) etkinleşir; aksi halde endpoint'ler eski page/limit cevabını verir.
+Toplam sayı sadece `include_total=1` ile istendiğinde hesaplanır.
+
+Örnek:
+    GET /api/feed?user_id=1&cursor=&limit=10
+    GET /api/feed?user_id=1&cursor=<next_cursor>&limit=10
+"""
+
+import base64
+import json
+from datetime import datetime
+from flask import request, jsonify, abort, make_response
+from sqlalchemy import tuple_
+
+
+class CursorPage:
+    """Keyset sayfalama sonucu."""
+
+    def __init__(self, items, next_cursor, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+    def meta(self):
+        """Cevaba eklenecek sayfalama alanları."""
+        data = {
+            'next_cursor': self.next_cursor,
+            'has_more': self.has_more
+        }
+        if self.total is not None:
+            data['total_items'] = self.total
+        return data
+
+
+def is_cursor_request():
+    """İstek cursor modunda mı (`cursor` parametresi gönderilmiş mi)?"""
+    return 'cursor' in request.args
+
+
+def include_total_requested():
+    """İstemci toplam sayıyı açıkça istedi mi?"""
+    return request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
+
+
+def encode_cursor(values):
+    """
+    Sıralama anahtarı değerlerini opak bir cursor string'ine çevirir.
+
+    Args:
+        values (tuple): Son satırın sıralama değerleri (örn. (created_at, id))
+
+    Returns:
+        str: URL-safe base64 cursor
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def invalid_cursor():
+    """İsteği 400 Geçersiz cursor cevabıyla sonlandırır."""
+    abort(make_response(jsonify({'error': 'Geçersiz cursor'}), 400))
+
+
+def decode_cursor_payload(cursor, length):
+    """
+    Cursor string'ini ham değer listesine çevirir.
+
+    Args:
+        cursor (str): encode_cursor ile üretilmiş cursor
+        length (int): Beklenen değer sayısı
+
+    Returns:
+        list: Ham (JSON) değerler; geçersiz cursor'da 400 ile sonlanır
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        invalid_cursor()
+
+    if not isinstance(payload, list) or len(payload) != length:
+        invalid_cursor()
+    return payload
+
+
+def decode_cursor(cursor, columns):
+    """
+    Cursor string'ini kolon tiplerine göre sıralama değerlerine çevirir.
+
+    Geçersiz cursor'da 400 cevabıyla isteği sonlandırır.
+
+    Args:
+        cursor (str): encode_cursor ile üretilmiş cursor
+        columns (list): Sıralama kolonları
+
+    Returns:
+        tuple: Sıralama değerleri
+    """
+    payload = decode_cursor_payload(cursor, len(columns))
+    try:
+        values = []
+        for column, value in zip(columns, payload):
+            if value is not None and column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            values.append(value)
+        return tuple(values)
+
+    except (ValueError, TypeError):
+        invalid_cursor()
+
+
+def keyset_paginate(query, columns, cursor=None, limit=10, descending=True,
+                    key=None, include_total=False):
+    """
+    Sorguyu verilen sıralama kolonları üzerinden keyset ile sayfalar.
+
+    Args:
+        query (Query): Filtrelenmiş, henüz sıralanmamış sorgu
+        columns (list): Sıralama kolonları, örn. [Post.created_at, Post.id].
+            Son kolon benzersiz olmalıdır (genellikle id).
+        cursor (str): Önceki sayfanın next_cursor değeri; ilk sayfa için boş
+        limit (int): Sayfa boyutu
+        descending (bool): Tüm kolonlarda azalan sıralama
+        key (callable): Bir öğeden sıralama değerlerini döndüren fonksiyon.
+            Verilmezse kolon isimleriyle öğe attribute'ları okunur.
+        include_total (bool): Toplam sayıyı da hesapla (ekstra COUNT sorgusu)
+
+    Returns:
+        CursorPage: items, next_cursor ve (istenirse) total
+    """
+    limit = max(limit, 1)
+    if key is None:
+        key = lambda item: tuple(getattr(item, column.key) for column in columns)
+
+    total = query.order_by(None).count() if include_total else None
+
+    if cursor:
+        seek_values = decode_cursor(cursor, columns)
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*seek_values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*seek_values))
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+
+    items = rows[:limit]
+    next_cursor = encode_cursor(key(items[-1])) if len(rows) > limit else None
+
+    return CursorPage(items, next_cursor, total)
+
+
+def paginate_request(query, columns, limit, descending=True, key=None):
+    """
+    İsteğe göre keyset veya klasik page/limit sayfalama uygular.
+
+    `cursor` parametresi varsa keyset, yoksa eski istemciler için
+    Flask-SQLAlchemy paginate() kullanılır. Her iki modda da aynı sıralama
+    (kolonlar + benzersiz id) geçerlidir.
+
+    Args:
+        query (Query): Filtrelenmiş, henüz sıralanmamış sorgu
+        columns (list): Sıralama kolonları
+        limit (int): Sayfa boyutu
+        descending (bool): Azalan sıralama
+        key (callable): Öğeden sıralama değerlerini döndüren fonksiyon
+
+    Returns:
+        tuple: (items, meta) - meta cevaba eklenecek sayfalama alanlarıdır
+    """
+    if is_cursor_request():
+        page = keyset_paginate(
+            query, columns,
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            descending=descending,
+            key=key,
+            include_total=include_total_requested()
+        )
+        return page.items, page.meta()
+
+    page_number = request.args.get('page', 1, type=int)
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    page = query.order_by(*ordering).paginate(
+        page=page_number, per_page=limit, error_out=False
+    )
+    return page.items, {
+        'page': page_number,
+        'total_pages': page.pages,
+        'total_items': page.total
+    }
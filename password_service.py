@@ -0,0 +1,140 @@
+"""
+password_service.py
+-------------------
+Şifre hash'leme ve doğrulama; hash işi ayrı süreçlerde çalışır.
+
+scrypt/PBKDF2 bilerek yavaştır (giriş başına onlarca ms CPU). Bu iş istek
+thread'inde yapılırsa o süre boyunca worker'ı ve GIL'i meşgul eder. Burada
+hash'leme sınırlı bir ProcessPoolExecutor'da yapılır; istek thread'i sadece
+sonucu bekler.
+
+- Maliyet PASSWORD_HASH_METHOD ile ayarlanır (werkzeug biçimi, parametreleri
+  tam yazılmalı: 'scrypt:32768:8:1' veya 'pbkdf2:sha256:600000')
+- Eşzamanlı bekleyen hash işi PASSWORD_HASH_MAX_PENDING ile sınırlıdır;
+  sınır aşılırsa PasswordPoolBusy yükselir (endpoint 503 döner)
+- Giriş başarılı olduğunda saklanan hash farklı bir yöntem/maliyetle
+  üretilmişse şifre yeni ayarla yeniden hash'lenir (needs_rehash; yöntem ve
+  parametreleri ayrıştırılıp varsayılanlarla tamamlanarak karşılaştırılır)
+- Havuz boyutu PASSWORD_HASH_WORKERS'tır; None ise CPU sayısı. Tek CPU'da
+  süreçler arası iletişim kazancı yer, bu yüzden None + tek CPU ve 0 iş
+  istek thread'inde yapar. PASSWORD_HASH_POOL = False da havuzu kapatır
+  (testler, tek süreçli ortamlar)
+
+Konfigürasyon:
+    PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_POOL
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+# Konfigürasyon
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+# werkzeug'un yöntem adından sonra yazılmayan parametreler için varsayılanları
+METHOD_DEFAULTS = {
+    'scrypt': ('32768', '8', '1'),
+    'pbkdf2': ('sha256', str(DEFAULT_PBKDF2_ITERATIONS)),
+}
+DEFAULT_MAX_PENDING = 64
+WAIT_TIMEOUT = 5  # saniye; havuzda yer açılmasını bekleme süresi
+
+_executor = None
+_pending = None
+_executor_lock = threading.Lock()
+_dummy_hashes = {}
+
+
+class PasswordPoolBusy(Exception):
+    """Hash havuzu dolu; istek daha sonra tekrar denenmeli."""
+
+
+def hash_workers():
+    """Havuzdaki süreç sayısı; 0 ise hash istek thread'inde yapılır."""
+    workers = current_app.config.get('PASSWORD_HASH_WORKERS')
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        return cpus if cpus > 1 else 0
+    return workers
+
+
+def get_executor():
+    global _executor, _pending
+    with _executor_lock:
+        if _executor is None:
+            # spawn: worker'lar uygulamayı ve açık SQLite bağlantılarını fork etmez
+            _executor = ProcessPoolExecutor(
+                max_workers=hash_workers(),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _pending = threading.BoundedSemaphore(
+                current_app.config.get('PASSWORD_HASH_MAX_PENDING', DEFAULT_MAX_PENDING)
+            )
+        return _executor
+
+
+def run_hash_job(fn, *args, **kwargs):
+    """Hash fonksiyonunu havuzda (veya havuz kapalıysa burada) çalıştırır."""
+    if not current_app.config.get('PASSWORD_HASH_POOL', True) or not hash_workers():
+        return fn(*args, **kwargs)
+
+    executor = get_executor()
+    if not _pending.acquire(timeout=WAIT_TIMEOUT):
+        raise PasswordPoolBusy()
+    try:
+        return executor.submit(fn, *args, **kwargs).result()
+    finally:
+        _pending.release()
+
+
+def hash_method():
+    return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+
+
+def hash_password(password):
+    """Şifreyi yapılandırılmış yöntem ve maliyetle hash'ler."""
+    return run_hash_job(generate_password_hash, password, method=hash_method())
+
+
+def dummy_hash():
+    """Yapılandırılmış yöntemle üretilmiş, hiçbir şifreyle eşleşmeyen hash (yöntem başına bir kez)."""
+    method = hash_method()
+    if method not in _dummy_hashes:
+        _dummy_hashes[method] = hash_password(os.urandom(16).hex())
+    return _dummy_hashes[method]
+
+
+def verify_password(password_hash, password):
+    """
+    Şifre saklanan hash ile eşleşiyor mu?
+
+    password_hash yoksa (kullanıcı bulunamadı, şifresi belirlenmemiş) sahte
+    hash doğrulanır ve False döner; yanıt süresi kullanıcının varlığını
+    ele vermez.
+    """
+    if not password_hash:
+        run_hash_job(check_password_hash, dummy_hash(), password)
+        return False
+    return run_hash_job(check_password_hash, password_hash, password)
+
+
+def parse_method(method):
+    """
+    werkzeug yöntem dizesini (ad, parametreler) çiftine çevirir; yazılmayan
+    parametreler varsayılanlarla tamamlanır, sayılar normalize edilir.
+    'scrypt' ve 'scrypt:32768:8:1' aynı sonucu verir.
+    """
+    name, *params = method.split(':')
+    defaults = METHOD_DEFAULTS.get(name, ())
+    params = params + list(defaults[len(params):])
+    return name, tuple(int(param) if param.isdigit() else param for param in params)
+
+
+def needs_rehash(password_hash):
+    """Hash, yapılandırılmış yöntem/maliyetten farklı mı üretilmiş?"""
+    if '$' not in password_hash:
+        return True
+    return parse_method(password_hash.split('$', 1)[0]) != parse_method(hash_method())
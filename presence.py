@@ -0,0 +1,223 @@
+"""
+presence.py
+-----------
+Çevrimiçi ve "yazıyor…" durumları için süreç içi, süreli (TTL) durum deposu.
+
+Bu sinyaller çok sık güncellenir (istemci başına her birkaç saniyede bir) ve
+kısa ömürlüdür; SQLite'a yazılmaları yazma kilidini boşuna meşgul eder.
+Durum bellekte tutulur ve son heartbeat'ten TTL kadar sonra kendiliğinden
+düşer.
+
+Yapı:
+- ExpiringStore: anahtar -> (son geçerlilik, değer) sözlüğü ve süre dolumları
+  için zamanlayıcı çarkı (timer wheel). Güncelleme O(1)'dir: anahtarın
+  deadline'ı yazılır ve deadline'ın düştüğü çark dilimine eklenir; eski
+  dilimlerde kalan kopyalar süpürmede atlanır. Süpürme sadece geçen dilimleri
+  dolaşır, maliyeti düşen anahtar sayısıyla orantılıdır.
+- PresenceTracker: çevrimiçi kullanıcılar ve (konuşma, kullanıcı) yazıyor
+  durumları için iki ExpiringStore. Metotlar durum geçişlerini (çevrimiçi
+  oldu, yazmaya başladı) döndürür; olaylar sadece geçişlerde yayınlanır,
+  her heartbeat'te değil.
+
+Not: Depo, event_hub gibi süreç içidir. Birden çok worker ile çalışırken
+heartbeat'ler ve okumalar aynı sürece yönlendirilmeli veya tracker aynı
+arayüzü sağlayan paylaşımlı bir depo (örn. anahtar TTL'li Redis) ile
+değiştirilmelidir (init_presence(app, tracker)).
+
+Süresi dolan durumlar istekten bağımsız bir daemon thread'de (start_sweeper)
+PRESENCE_SWEEP_INTERVAL saniyede bir süpürülür; boşta bir sunucuda da
+çevrimdışı/yazmayı bıraktı olayları zamanında gider.
+
+Konfigürasyon:
+    PRESENCE_TTL: Son heartbeat'ten sonra çevrimiçi sayılma süresi (saniye)
+    TYPING_TTL: Son typing isteğinden sonra "yazıyor" sayılma süresi (saniye)
+    PRESENCE_SWEEP_INTERVAL: Süpürme aralığı (saniye)
+"""
+
+import math
+import threading
+import time
+from flask import current_app
+
+# Konfigürasyon
+DEFAULT_PRESENCE_TTL = 60  # saniye
+DEFAULT_TYPING_TTL = 6  # saniye
+WHEEL_RESOLUTION = 1.0  # saniye (çark dilimi)
+DEFAULT_SWEEP_INTERVAL = WHEEL_RESOLUTION
+
+
+class ExpiringStore:
+    """Sabit TTL'li, timer wheel ile süresi dolan anahtar deposu."""
+
+    def __init__(self, ttl, resolution=WHEEL_RESOLUTION, clock=time.monotonic):
+        self.ttl = ttl
+        self.resolution = resolution
+        self.clock = clock
+        self._entries = {}
+        self._wheel = [set() for _ in range(math.ceil(ttl / resolution) + 2)]
+        self._swept_tick = self._tick(clock())
+        self._lock = threading.Lock()
+
+    def _tick(self, moment):
+        return int(moment // self.resolution)
+
+    def touch(self, key, value=None):
+        """
+        Anahtarın süresini yeniler.
+
+        Returns:
+            bool: Anahtar yeni mi eklendi (daha önce yok veya süresi dolmuştu)
+        """
+        now = self.clock()
+        deadline = now + self.ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            self._entries[key] = (deadline, value)
+            self._wheel[self._tick(deadline) % len(self._wheel)].add(key)
+            return entry is None or entry[0] <= now
+
+    def discard(self, key):
+        """Anahtarı hemen kaldırır. Returns: bool - canlı bir anahtar kaldırıldı mı."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry is not None and entry[0] > self.clock()
+
+    def get(self, key):
+        """Canlı anahtarın değeri; yoksa veya süresi dolduysa None."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            return None
+        return entry[1]
+
+    def __contains__(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > self.clock()
+
+    def sweep(self):
+        """
+        Süresi dolan anahtarları kaldırır.
+
+        Returns:
+            list: (anahtar, değer) çiftleri
+        """
+        now = self.clock()
+        current_tick = self._tick(now)
+        expired = []
+        with self._lock:
+            # Sadece tamamen geçmiş dilimler; uzun aralıkta çark bir kez döner
+            first_tick = max(self._swept_tick + 1, current_tick - len(self._wheel))
+            for tick in range(first_tick, current_tick):
+                index = tick % len(self._wheel)
+                bucket, self._wheel[index] = self._wheel[index], set()
+                for key in bucket:
+                    entry = self._entries.get(key)
+                    if entry is None:
+                        continue
+                    if entry[0] <= now:
+                        del self._entries[key]
+                        expired.append((key, entry[1]))
+                    elif self._tick(entry[0]) % len(self._wheel) == index:
+                        # Aynı dilime düşen sonraki tur
+                        self._wheel[index].add(key)
+            self._swept_tick = max(self._swept_tick, current_tick - 1)
+        return expired
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PresenceTracker:
+    """Çevrimiçi ve yazıyor durumları."""
+
+    def __init__(self, presence_ttl=DEFAULT_PRESENCE_TTL, typing_ttl=DEFAULT_TYPING_TTL,
+                 clock=time.monotonic):
+        self.online = ExpiringStore(presence_ttl, clock=clock)
+        self.typing = ExpiringStore(typing_ttl, clock=clock)
+
+    def heartbeat(self, user_id):
+        """Returns: bool - kullanıcı bu heartbeat ile çevrimiçi oldu mu."""
+        return self.online.touch(user_id)
+
+    def go_offline(self, user_id):
+        return self.online.discard(user_id)
+
+    def is_online(self, user_id):
+        return user_id in self.online
+
+    def online_among(self, user_ids):
+        """Verilen kullanıcılardan çevrimiçi olanların kümesi."""
+        return {user_id for user_id in user_ids if user_id in self.online}
+
+    def start_typing(self, conversation_id, user_id, recipient_id):
+        """Returns: bool - kullanıcı bu istekle yazmaya başladı mı."""
+        return self.typing.touch((conversation_id, user_id), recipient_id)
+
+    def stop_typing(self, conversation_id, user_id):
+        """Returns: bool - kullanıcı yazıyor durumundaydı mı."""
+        return self.typing.discard((conversation_id, user_id))
+
+    def is_typing(self, conversation_id, user_id):
+        return (conversation_id, user_id) in self.typing
+
+    def sweep(self):
+        """
+        Süresi dolan durumları temizler.
+
+        Returns:
+            tuple: (çevrimdışı olan kullanıcı ID'leri,
+                    [(konuşma ID, kullanıcı ID, alıcı ID)] yazmayı bırakanlar)
+        """
+        offline = [user_id for user_id, _ in self.online.sweep()]
+        stopped = [
+            (conversation_id, user_id, recipient_id)
+            for (conversation_id, user_id), recipient_id in self.typing.sweep()
+        ]
+        return offline, stopped
+
+
+def init_presence(app, tracker=None):
+    """
+    Presence tracker'ını uygulamaya bağlar.
+
+    Args:
+        app (Flask): Uygulama
+        tracker: Opsiyonel tracker; verilmezse konfigürasyondan PresenceTracker oluşturulur
+    """
+    if tracker is None:
+        tracker = PresenceTracker(
+            presence_ttl=app.config.get('PRESENCE_TTL', DEFAULT_PRESENCE_TTL),
+            typing_ttl=app.config.get('TYPING_TTL', DEFAULT_TYPING_TTL)
+        )
+    app.extensions['presence'] = tracker
+
+
+def get_presence():
+    return current_app.extensions['presence']
+
+
+def start_sweeper(app, on_expired):
+    """
+    Süresi dolan durumları periyodik olarak süpüren daemon thread'i başlatır.
+
+    Args:
+        app (Flask): Uygulama; süpürme ve on_expired uygulama context'inde çalışır
+        on_expired (callable): on_expired(offline, stopped) - sweep() sonucunu yayınlar
+
+    Returns:
+        threading.Event: set edildiğinde thread durur
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(app.config.get('PRESENCE_SWEEP_INTERVAL', DEFAULT_SWEEP_INTERVAL)):
+            with app.app_context():
+                try:
+                    offline, stopped = get_presence().sweep()
+                    if offline or stopped:
+                        on_expired(offline, stopped)
+                except Exception:
+                    current_app.logger.exception('Presence sweep failed')
+
+    threading.Thread(target=run, name='presence-sweeper', daemon=True).start()
+    app.extensions['presence_sweeper'] = stop
+    return stop
@@ -0,0 +1,161 @@
+"""
+purge_service.py
+----------------
+Silinen postların beğeni, yorum ve timeline kayıtlarının ve iki katılımcının
+da sildiği konuşma mesajlarının arka planda temizlenmesi.
+
+delete_post postu sadece silindi olarak işaretler (deleted_at) ve tüm okuma
+yolları silinmiş postları filtreler; böylece silme isteğinin süresi postun
+etkileşim miktarından bağımsızdır. Bağlı satırlar burada set tabanlı
+"DELETE ... WHERE post_id = ?" ifadeleriyle, SQLite yazma kilidini uzun süre
+tutmamak için parçalar halinde silinir; en son post satırı kaldırılır.
+
+Konuşmalar da aynı şekilde silinir: mesajlar ORM ilişkisi üzerinden
+yüklenmeden, sadece iki katılımcının da temizlediği aralıkta (id <= min
+cleared id) set tabanlı DELETE ile kaldırılır; aynı aralıktaki arşiv blokları
+da düşürülür. Konuşma satırı (ve arşiv segmenti) ancak iki taraf da hâlâ
+gizliyse ve mesajı kalmadıysa silinir.
+
+Yarıda kalan temizlikler için:
+    flask --app main purge-deleted-posts
+    flask --app main purge-hidden-conversations
+"""
+
+from sqlalchemy import select, delete, exists, func
+from models import db, Post, PostLike, Comment, TimelineEntry, Conversation, Message
+from archive_service import drop_archive
+
+# Konfigürasyon
+PURGE_CHUNK_SIZE = 5000
+INLINE_PURGE_LIMIT = 1000  # Bundan küçük konuşmalar istek içinde tek DELETE ile silinir
+
+
+def delete_in_chunks(model, column, value, *criteria, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    model tablosundan column == value (ve ek koşullara uyan) satırları parça
+    parça siler.
+
+    Her parça ayrı commit edilir.
+
+    Returns:
+        int: Silinen toplam satır sayısı
+    """
+    total = 0
+    while True:
+        chunk = select(model.id).where(column == value, *criteria).limit(chunk_size)
+        deleted = db.session.execute(
+            delete(model).where(model.id.in_(chunk))
+        ).rowcount
+        db.session.commit()
+
+        total += deleted
+        if deleted < chunk_size:
+            return total
+
+
+def purge_post(post_id):
+    """
+    Silindi olarak işaretlenmiş postun bağlı satırlarını ve kendisini siler.
+
+    Args:
+        post_id (int): Silinmiş post
+
+    Returns:
+        dict: Tablo başına silinen satır sayıları
+    """
+    post = db.session.get(Post, post_id)
+    if post is None or post.deleted_at is None:
+        return {}
+
+    counts = {
+        'timeline_entries': delete_in_chunks(TimelineEntry, TimelineEntry.post_id, post_id),
+        'post_likes': delete_in_chunks(PostLike, PostLike.post_id, post_id),
+        'comments': delete_in_chunks(Comment, Comment.post_id, post_id),
+    }
+
+    db.session.execute(delete(Post).where(Post.id == post_id, Post.deleted_at.isnot(None)))
+    db.session.commit()
+
+    return counts
+
+
+def count_up_to(query_column, criteria, limit):
+    """Koşula uyan satırları en fazla limit+1'e kadar sayar (sınırlı tarama)."""
+    bounded = select(query_column).where(*criteria).limit(limit + 1).subquery()
+    return db.session.execute(select(func.count()).select_from(bounded)).scalar()
+
+
+def purge_conversation(conversation_id, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    İki katılımcının da temizlediği mesajları ve (iki taraf da gizlediyse)
+    konuşmanın kendisini siler.
+
+    Args:
+        conversation_id (int): Konuşma ID'si
+        chunk_size (int): DELETE başına en fazla satır
+
+    Returns:
+        int: Silinen mesaj sayısı
+    """
+    conversation = db.session.get(Conversation, conversation_id)
+    if conversation is None:
+        return 0
+
+    horizon = min(conversation.user1_cleared_message_id, conversation.user2_cleared_message_id)
+    deleted = delete_in_chunks(
+        Message, Message.conversation_id, conversation_id, Message.id <= horizon,
+        chunk_size=chunk_size
+    )
+    drop_archive(conversation_id, through_id=horizon)
+
+    # Arada yeni mesaj geldiyse konuşma tekrar görünür ve silinmez
+    removed = db.session.execute(
+        delete(Conversation).where(
+            Conversation.id == conversation_id,
+            Conversation.user1_hidden == True,
+            Conversation.user2_hidden == True,
+            ~exists().where(Message.conversation_id == conversation_id)
+        )
+    ).rowcount
+    if removed:
+        drop_archive(conversation_id)
+    db.session.commit()
+
+    return deleted
+
+
+def purge_deleted_posts():
+    """
+    Silindi olarak işaretlenmiş ve henüz temizlenmemiş tüm postları temizler.
+
+    Returns:
+        int: Temizlenen post sayısı
+    """
+    post_ids = db.session.execute(
+        select(Post.id).where(Post.deleted_at.isnot(None))
+    ).scalars().all()
+
+    for post_id in post_ids:
+        purge_post(post_id)
+
+    return len(post_ids)
+
+
+def purge_hidden_conversations():
+    """
+    İki katılımcının da gizlediği tüm konuşmaları temizler.
+
+    Returns:
+        int: Temizlenen konuşma sayısı
+    """
+    conversation_ids = db.session.execute(
+        select(Conversation.id).where(
+            Conversation.user1_hidden == True,
+            Conversation.user2_hidden == True
+        )
+    ).scalars().all()
+
+    for conversation_id in conversation_ids:
+        purge_conversation(conversation_id)
+
+    return len(conversation_ids)
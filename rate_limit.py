@@ -0,0 +1,180 @@
+"""
+rate_limit.py
+-------------
+Kullanıcı ve IP başına token bucket hız sınırı ve aşırı yükte istek reddi
+(load shedding).
+
+Hatalı bir istemcinin /api/feed veya beğeni endpoint'lerini döngüde
+çağırması worker'ları doldurur ve herkesin gecikmesini artırır. Her istek
+before_request'te iki kontrolden geçer:
+
+1. Load shedding: işlenmekte olan istek sayısı MAX_IN_FLIGHT_REQUESTS'e
+   ulaştıysa istek hiç işlenmeden 503 + Retry-After ile reddedilir. Uzun
+   yaşayan SSE bağlantıları (stream) sayılmaz.
+2. Token bucket: istek hem kullanıcının hem IP'nin bucket'ından bir token
+   harcar. Bucket'lar blueprint başınadır (RATE_LIMITS; tanımsız blueprint'ler
+   'default' sınırını kullanır). Token yoksa 429 + Retry-After döner.
+
+Kullanıcı bucket'ı sadece imzası doğrulanmış bir access token'ın (JWT)
+kullanıcısına açılır. Gövde/parametredeki user_id veya rastgele bir
+Authorization başlığı kimlik sayılmaz; aksi halde istemci her istekte farklı
+bir değer göndererek kullanıcı sınırını atlatabilirdi. Token daha önce
+token_required'da doğrulanmışsa kullanıcı token cache'inden okunur; JWT sadece
+ıskalamada çözülür. Kimliği
+doğrulanamayan istekler sadece IP sınırına tabidir. IP
+bucket'ları kullanıcı sınırının RATE_LIMIT_IP_MULTIPLIER katıdır (kampüs
+ağında birçok kullanıcı aynı IP'nin arkasında olabilir).
+
+Bucket'lar süreç içi ve sınırlıdır (RATE_LIMIT_MAX_KEYS, en eski dokunulan
+düşer; dolu bir bucket ile hiç olmayan bucket aynıdır). Birden çok worker
+ile her worker kendi payını uygular; ortak sınır için aynı take() arayüzüyle
+paylaşımlı bir depo takılabilir (init_rate_limit(app, store)).
+
+Konfigürasyon:
+    RATE_LIMIT_ENABLED, RATE_LIMITS, RATE_LIMIT_IP_MULTIPLIER,
+    RATE_LIMIT_MAX_KEYS, MAX_IN_FLIGHT_REQUESTS
+"""
+
+import jwt
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request, jsonify, g
+from token_cache import get_token_cache
+
+# Konfigürasyon
+DEFAULT_LIMITS = {'default': {'rate': 20, 'burst': 60}}  # rate: token/sn, burst: kapasite
+DEFAULT_IP_MULTIPLIER = 5
+DEFAULT_MAX_KEYS = 100000
+DEFAULT_MAX_IN_FLIGHT = 64
+SHED_RETRY_AFTER = 1  # saniye
+UNLIMITED_ENDPOINTS = {'stream.stream'}  # Uzun yaşayan bağlantılar in-flight sayılmaz
+
+
+class TokenBucketStore:
+    """Anahtar başına token bucket'ları; süreç içi, thread-safe, sınırlı boyutlu."""
+
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        """
+        Bucket'tan bir token harcar.
+
+        Returns:
+            float: 0 ise izin verildi; değilse bir sonraki token için beklenecek saniye
+        """
+        now = self.clock()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class AdmissionControl:
+    """İşlenmekte olan istek sayacı."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def enter(self, limit):
+        with self._lock:
+            if self.in_flight >= limit:
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def request_identity():
+    """
+    İsteği yapan kullanıcının bucket anahtarı.
+
+    Returns:
+        str: Geçerli access token'ın kullanıcısı için 'user:<id>'; token yok,
+             imzası/süresi geçersizse None (sadece IP sınırı)
+    """
+    authorization = request.headers.get('Authorization', '')
+    if not authorization.startswith('Bearer '):
+        return None
+
+    # Doğrulanmış token: özet araması, imza doğrulaması yok
+    user_id = get_token_cache().user_id(authorization[7:])
+    if user_id is not None:
+        return f'user:{user_id}'
+
+    try:
+        data = jwt.decode(authorization[7:], current_app.config['SECRET_KEY'], algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        return None
+    user_id = data.get('user_id')
+    return f'user:{user_id}' if user_id else None
+
+
+def too_many(message, retry_after, status):
+    response = jsonify({'error': message})
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, status
+
+
+def init_rate_limit(app, store=None):
+    """
+    Hız sınırı ve load shedding middleware'ini uygulamaya bağlar.
+
+    Args:
+        app (Flask): Uygulama
+        store: Opsiyonel bucket deposu; verilmezse TokenBucketStore
+    """
+    if store is None:
+        store = TokenBucketStore(app.config.get('RATE_LIMIT_MAX_KEYS', DEFAULT_MAX_KEYS))
+    admission = AdmissionControl()
+    app.extensions['rate_limit'] = (store, admission)
+
+    @app.before_request
+    def limit_request():
+        config = current_app.config
+        if not config.get('RATE_LIMIT_ENABLED', True) or request.method == 'OPTIONS':
+            return None
+
+        if request.endpoint not in UNLIMITED_ENDPOINTS:
+            if not admission.enter(config.get('MAX_IN_FLIGHT_REQUESTS', DEFAULT_MAX_IN_FLIGHT)):
+                return too_many('Sunucu meşgul, lütfen tekrar deneyin', SHED_RETRY_AFTER, 503)
+            g.rate_limit_admitted = True
+
+        # Konfigürasyonda 'default' yoksa modülün varsayılanı kullanılır
+        limits = {**DEFAULT_LIMITS, **config.get('RATE_LIMITS', {})}
+        group = request.blueprint or 'default'
+        limit = limits.get(group) or limits['default']
+        multiplier = config.get('RATE_LIMIT_IP_MULTIPLIER', DEFAULT_IP_MULTIPLIER)
+
+        wait = store.take(f'ip:{request.remote_addr}:{group}', limit['rate'] * multiplier,
+                          limit['burst'] * multiplier)
+        identity = request_identity()
+        if not wait and identity:
+            wait = store.take(f'{identity}:{group}', limit['rate'], limit['burst'])
+        if wait:
+            return too_many('Çok fazla istek, lütfen yavaşlayın', wait, 429)
+        return None
+
+    @app.teardown_request
+    def release_request(exc):
+        if g.pop('rate_limit_admitted', False):
+            admission.leave()
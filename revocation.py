@@ -0,0 +1,132 @@
+"""
+revocation.py
+-------------
+İptal edilmiş oturumlar için süreç içi Bloom filtresi.
+
+Access token'lar veritabanına gitmeden doğrulanır; iptal edilen bir oturumun
+token'ı ise süresi dolana kadar (ACCESS_TOKEN_TTL) reddedilmelidir. Filtre,
+son ACCESS_TOKEN_TTL içinde iptal edilmiş oturum kimliklerinden kurulur:
+
+- Filtre "yok" derse oturum kesinlikle iptal edilmemiştir; veritabanına
+  gidilmez (sıcak yolun neredeyse tamamı)
+- "Olabilir" derse (gerçek iptal veya yanlış pozitif) veritabanında tek bir
+  EXISTS sorgusuyla doğrulanır
+- Bu süreçte yapılan iptaller filtreye hemen eklenir; diğer worker'lar
+  filtreyi REVOCATION_REBUILD_INTERVAL saniyede bir refresh_tokens
+  tablosundan yeniden kurar. Daha eski iptallerin access token'ları zaten
+  dolmuş olduğundan filtre küçük kalır.
+
+Konfigürasyon:
+    REVOCATION_FILTER_BITS, REVOCATION_FILTER_HASHES,
+    REVOCATION_REBUILD_INTERVAL
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from session_service import recently_revoked_sessions, is_session_revoked, access_token_ttl
+
+# Konfigürasyon
+DEFAULT_FILTER_BITS = 1 << 20  # 128 KB; ~100k iptalde %1'in altında yanlış pozitif
+DEFAULT_FILTER_HASHES = 7
+DEFAULT_REBUILD_INTERVAL = 30  # saniye
+
+
+class BloomFilter:
+    """Sabit boyutlu Bloom filtresi (double hashing)."""
+
+    def __init__(self, bits=DEFAULT_FILTER_BITS, hashes=DEFAULT_FILTER_HASHES):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray((bits + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.sha256(value.encode()).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        step = int.from_bytes(digest[8:16], 'big') | 1
+        return [(first + i * step) % self.bits for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevocationList:
+    """Bloom filtresi önünde, pozitiflerde veritabanına düşen iptal kontrolü."""
+
+    def __init__(self, bits=DEFAULT_FILTER_BITS, hashes=DEFAULT_FILTER_HASHES,
+                 rebuild_interval=DEFAULT_REBUILD_INTERVAL):
+        self.bits = bits
+        self.hashes = hashes
+        self.rebuild_interval = rebuild_interval
+        self.checks = 0
+        self.database_checks = 0
+        self._filter = None
+        self._built_at = 0.0
+        self._local = {}  # Bu süreçte iptal edilen oturum -> zaman
+        self._lock = threading.Lock()
+
+    def rebuild(self):
+        """Filtreyi son access token ömrü içindeki iptallerden yeniden kurar."""
+        ttl = access_token_ttl()
+        bloom = BloomFilter(self.bits, self.hashes)
+        for session_id in recently_revoked_sessions(datetime.utcnow() - timedelta(seconds=ttl)):
+            bloom.add(session_id)
+        with self._lock:
+            # Sorgu sırasında bu süreçte yapılan iptaller kaybolmasın
+            now = time.monotonic()
+            self._local = {sid: at for sid, at in self._local.items() if now - at < ttl}
+            for session_id in self._local:
+                bloom.add(session_id)
+            self._filter = bloom
+            self._built_at = now
+
+    def _current_filter(self):
+        if self._filter is None or time.monotonic() - self._built_at > self.rebuild_interval:
+            self.rebuild()
+        return self._filter
+
+    def add(self, session_ids):
+        """Bu süreçte iptal edilen oturumları hemen filtreye ekler."""
+        self._current_filter()
+        with self._lock:
+            for session_id in session_ids:
+                self._local[session_id] = time.monotonic()
+                self._filter.add(session_id)
+
+    def is_revoked(self, session_id):
+        """Oturum iptal edilmiş mi? Sadece filtre pozitifse veritabanına gider."""
+        self.checks += 1
+        if session_id not in self._current_filter():
+            return False
+        self.database_checks += 1
+        return is_session_revoked(session_id)
+
+    def stats(self):
+        return {'checks': self.checks, 'databaseChecks': self.database_checks}
+
+
+def init_revocation(app, revocation_list=None):
+    """
+    Oturum iptal filtresini uygulamaya bağlar.
+
+    Args:
+        app (Flask): Uygulama
+        revocation_list: Opsiyonel liste; verilmezse konfigürasyondan RevocationList oluşturulur
+    """
+    if revocation_list is None:
+        revocation_list = RevocationList(
+            bits=app.config.get('REVOCATION_FILTER_BITS', DEFAULT_FILTER_BITS),
+            hashes=app.config.get('REVOCATION_FILTER_HASHES', DEFAULT_FILTER_HASHES),
+            rebuild_interval=app.config.get('REVOCATION_REBUILD_INTERVAL', DEFAULT_REBUILD_INTERVAL)
+        )
+    app.extensions['revocation'] = revocation_list
+
+
+def get_revocation_list():
+    return current_app.extensions['revocation']
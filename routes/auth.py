@@ -1,16 +1,56 @@
 # routes/auth.py
 from flask import Blueprint, jsonify, request
 from models import db, User, Community
-from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
 from datetime import datetime, timedelta
 from functools import wraps
+from sqlalchemy.exc import IntegrityError
+from token_cache import get_token_cache
+from password_service import hash_password, verify_password, needs_rehash, PasswordPoolBusy
+from session_service import (
+    create_refresh_token, rotate_refresh_token, find_refresh_token, revoke_session,
+    revoke_user_sessions, access_token_ttl, InvalidRefreshToken
+)
+from revocation import get_revocation_list
+from user_cache import get_user_cache
 
 auth_bp = Blueprint('auth', __name__)
 
 SECRET_KEY = 'your-secret-key-here'  # Bu değer main.py'deki SECRET_KEY ile aynı olmalı
 
 
+def pool_busy():
+    """Hash havuzu dolu: istemci kısa süre sonra tekrar denemeli."""
+    response = jsonify({'error': 'Sunucu meşgul, lütfen tekrar deneyin'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+def create_access_token(user_id, session_id):
+    """Kısa ömürlü access token; oturum kimliği (sid) iptal kontrolü içindir."""
+    return jwt.encode({
+        'user_id': user_id,
+        'sid': session_id,
+        'exp': datetime.utcnow() + timedelta(seconds=access_token_ttl())
+    }, SECRET_KEY, algorithm='HS256')
+
+
+def token_response(refresh_token, refresh_row):
+    """Refresh token satırının oturumu için cevaba eklenecek token alanları."""
+    return {
+        'token': create_access_token(refresh_row.user_id, refresh_row.session_id),
+        'refresh_token': refresh_token,
+        'expires_in': access_token_ttl()
+    }
+
+
+def issue_tokens(user_id):
+    """Yeni oturum açar (commit eder) ve token alanlarını döndürür."""
+    refresh_token, refresh_row = create_refresh_token(user_id)
+    db.session.commit()
+    return token_response(refresh_token, refresh_row)
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -19,20 +59,40 @@ def token_required(f):
         if not token:
             return jsonify({'error': 'Token gerekli'}), 401
 
-        try:
-            if token.startswith('Bearer '):
-                token = token[7:]
+        if token.startswith('Bearer '):
+            token = token[7:]
+
+        # Daha önce doğrulanmış token: JWT çözümü ve kullanıcı sorgusu yok
+        cache = get_token_cache()
+        current_user = cache.get(token)
+
+        if current_user is None:
+            try:
+                data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
 
-            data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            current_user = User.query.get(data['user_id'])
+                # Oturumsuz eski token'lar iptal edilemez; süreleri dolana kadar
+                # kabul edilir, exp'siz olanlar hiç kabul edilmez
+                if not data.get('sid') and 'exp' not in data:
+                    return jsonify({'error': 'Geçersiz token'}), 401
 
-            if not current_user:
-                return jsonify({'error': 'Kullanıcı bulunamadı'}), 401
+                # Versiyon sorgudan önce: arada profil değişirse snapshot eski versiyonla yazılır ve düşer
+                version = cache.version(data['user_id'])
+                current_user = User.query.get(data['user_id'])
 
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token süresi doldu'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Geçersiz token'}), 401
+                if not current_user:
+                    return jsonify({'error': 'Kullanıcı bulunamadı'}), 401
+
+                # Handler'lar her iki yolda da aynı snapshot tipini alır
+                current_user = cache.set(token, current_user, data.get('exp'), data.get('sid'), version)
+
+            except jwt.ExpiredSignatureError:
+                return jsonify({'error': 'Token süresi doldu'}), 401
+            except jwt.InvalidTokenError:
+                return jsonify({'error': 'Geçersiz token'}), 401
+
+        # İptal kontrolü bellekte (Bloom filtresi); sadece pozitifte veritabanına gidilir
+        if current_user.session_id and get_revocation_list().is_revoked(current_user.session_id):
+            return jsonify({'error': 'Oturum sonlandırıldı'}), 401
 
         return f(current_user, *args, **kwargs)
 
@@ -55,25 +115,34 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({'error': 'Bu email zaten kayıtlı'}), 409
 
+    # Hash ayrı süreçte hesaplanır; istek thread'i sadece bekler
+    try:
+        password_hash = hash_password(password)
+    except PasswordPoolBusy:
+        return pool_busy()
+
     # Yeni kullanıcı oluştur
     new_user = User(
         name=name,
         email=email,
-        avatar=avatar
+        avatar=avatar,
+        password_hash=password_hash
     )
 
+    # Kontrol ile insert arasında aynı email'le eşzamanlı kayıt: unique kısıtı yakalar
     db.session.add(new_user)
-    db.session.commit()
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Bu email zaten kayıtlı'}), 409
 
-    # JWT token oluştur
-    token = jwt.encode({
-        'user_id': new_user.id,
-        'exp': datetime.utcnow() + timedelta(days=30)
-    }, SECRET_KEY, algorithm='HS256')
+    # Kısa ömürlü access token + döndürülen refresh token
+    tokens = issue_tokens(new_user.id)
 
     return jsonify({
         'message': 'Kayıt başarılı',
-        'token': token,
+        **tokens,
         'user': {
             'id': str(new_user.id),
             'name': new_user.name,
@@ -95,21 +164,25 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if not user:
-        return jsonify({'error': 'Kullanıcı bulunamadı'}), 404
+    try:
+        # Bilinmeyen email de hash doğrulamasından geçer ve aynı hatayı alır:
+        # yanıt ve süre hangi email'lerin kayıtlı olduğunu ele vermez
+        if not verify_password(user.password_hash if user else None, password) or not user:
+            return jsonify({'error': 'Email veya şifre hatalı'}), 401
 
-    # Şimdilik şifre kontrolü yapmıyoruz (User modelinde password field'ı yok)
-    # İleride password field'ı eklendiğinde check_password_hash kullanılabilir
+        # Maliyet ayarı değiştiyse şifre yeni ayarla saklanır
+        if needs_rehash(user.password_hash):
+            user.password_hash = hash_password(password)
+            db.session.commit()
+    except PasswordPoolBusy:
+        return pool_busy()
 
-    # JWT token oluştur
-    token = jwt.encode({
-        'user_id': user.id,
-        'exp': datetime.utcnow() + timedelta(days=30)
-    }, SECRET_KEY, algorithm='HS256')
+    # Kısa ömürlü access token + döndürülen refresh token
+    tokens = issue_tokens(user.id)
 
     return jsonify({
         'message': 'Giriş başarılı',
-        'token': token,
+        **tokens,
         'user': {
             'id': str(user.id),
             'name': user.name,
@@ -138,20 +211,88 @@ def get_current_user(current_user):
 def update_profile(current_user):
     data = request.get_json()
 
+    # current_user cache'ten gelen snapshot'tır; değişiklik ORM nesnesine yapılır
+    user = User.query.get_or_404(current_user.id)
+
     if 'name' in data:
-        current_user.name = data['name']
+        user.name = data['name']
 
     if 'avatar' in data:
-        current_user.avatar = data['avatar']
+        user.avatar = data['avatar']
 
     db.session.commit()
 
+    # Eski snapshot'lar ve profil kartı tüm worker'larda düşer
+    get_token_cache().invalidate_user(user.id)
+    get_user_cache().invalidate(user.id)
+
     return jsonify({
         'message': 'Profil güncellendi',
         'user': {
-            'id': str(current_user.id),
-            'name': current_user.name,
-            'email': current_user.email,
-            'avatar': current_user.avatar
+            'id': str(user.id),
+            'name': user.name,
+            'email': user.email,
+            'avatar': user.avatar
         }
     }), 200
+
+
+@auth_bp.route('/api/auth/token-cache/stats', methods=['GET'])
+@token_required
+def token_cache_stats(current_user):
+    return jsonify(get_token_cache().stats()), 200
+
+
+@auth_bp.route('/api/auth/refresh', methods=['POST'])
+def refresh():
+    data = request.get_json()
+    refresh_token = data.get('refresh_token')
+
+    if not refresh_token:
+        return jsonify({'error': 'refresh_token gerekli'}), 400
+
+    # Refresh token tek kullanımlık: yenisiyle değiştirilir
+    try:
+        new_refresh_token, new_row = rotate_refresh_token(refresh_token)
+        db.session.commit()
+    except InvalidRefreshToken as e:
+        if e.revoked_token is not None:
+            # Tekrar kullanım: oturumun access token'ları da hemen reddedilmeli
+            forget_sessions(e.revoked_token.user_id, [e.revoked_token.session_id])
+        return jsonify({'error': str(e)}), 401
+
+    return jsonify(token_response(new_refresh_token, new_row)), 200
+
+
+def forget_sessions(user_id, session_ids):
+    """İptal edilen oturumları bu süreçte hemen; diğer worker'larda filtre yeniden kurulunca reddeder."""
+    get_revocation_list().add(session_ids)
+    get_token_cache().invalidate_user(user_id)
+
+
+@auth_bp.route('/api/auth/logout', methods=['POST'])
+def logout():
+    data = request.get_json()
+    refresh_token = data.get('refresh_token')
+    logout_all = data.get('all', False)
+
+    if not refresh_token:
+        return jsonify({'error': 'refresh_token gerekli'}), 400
+
+    token = find_refresh_token(refresh_token)
+    if token is None:
+        return jsonify({'error': 'Geçersiz refresh token'}), 401
+
+    # all: kullanıcının tüm cihazlardaki oturumları
+    if logout_all:
+        session_ids = revoke_user_sessions(token.user_id)
+    else:
+        revoke_session(token.session_id)
+        session_ids = [token.session_id]
+    db.session.commit()
+
+    forget_sessions(token.user_id, session_ids)
+
+    return jsonify({
+        'message': 'Çıkış yapıldı'
+    }), 200
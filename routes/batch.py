@@ -0,0 +1,331 @@
+"""
+routes/batch.py
+---------------
+Post, beğeni ve yorumlar için toplu yazma endpoint'leri.
+
+Çevrimdışı kalıp yeniden bağlanan istemciler ve import scriptleri, biriken
+işlemleri tek istekte gönderir. Her batch için kullanıcılar ve postlar tek
+bir IN sorgusuyla doğrulanır, geçerli öğeler tek transaction içinde toplu
+INSERT ile yazılır ve öğe başına sonuç döner.
+
+Endpoints:
+- POST /api/posts/batch     - Toplu post oluştur
+- POST /api/likes/batch     - Toplu beğeni / beğeni kaldırma
+- POST /api/comments/batch  - Toplu yorum ekle
+
+Maksimum batch boyutu: 500 öğe
+"""
+
+from collections import defaultdict
+from flask import Blueprint, jsonify, request
+from sqlalchemy import insert, delete, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, Post, PostLike, Comment, User
+from timeline_service import fan_out_posts
+from counter_service import apply_post_counter_deltas
+from feed_cache import invalidate_feeds
+from validation import parse_id
+
+batch_bp = Blueprint('batch', __name__)
+
+# Konfigürasyon
+MAX_BATCH_SIZE = 500
+POST_TYPES = ('text', 'event', 'announcement', 'community')
+MEDIA_TYPES = (None, 'image', 'video')
+
+
+def read_batch(field):
+    """
+    İstek gövdesinden batch listesini okur ve boyutunu kontrol eder.
+
+    Returns:
+        tuple: (items, error_response) - hata yoksa error_response None
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get(field)
+
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({'error': f'{field} listesi gerekli'}), 400)
+
+    if len(items) > MAX_BATCH_SIZE:
+        return None, (jsonify({'error': f'Maksimum batch boyutu: {MAX_BATCH_SIZE}'}), 400)
+
+    return items, None
+
+
+def existing_ids(model, ids, *criteria):
+    """Verilen ID'lerden veritabanında bulunanları tek sorguyla döndürür."""
+    ids = set(i for i in ids if i is not None)
+    if not ids:
+        return set()
+    return set(db.session.execute(
+        db.select(model.id).where(model.id.in_(ids), *criteria)
+    ).scalars())
+
+
+def load_parents(parent_ids):
+    """Üst yorumları (id, post_id, parent_id) tek sorguyla getirir: {id: satır}."""
+    parent_ids = set(i for i in parent_ids if i is not None)
+    if not parent_ids:
+        return {}
+    return {
+        row.id: row for row in db.session.execute(
+            db.select(Comment.id, Comment.post_id, Comment.parent_id).where(Comment.id.in_(parent_ids))
+        )
+    }
+
+
+def error_result(index, message):
+    return {'index': index, 'status': 'error', 'error': message}
+
+
+def batch_response(results):
+    succeeded = sum(1 for result in results if result['status'] != 'error')
+    return jsonify({
+        'results': results,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded
+    }), 200
+
+
+def post_item_error(item):
+    """Post öğesinin alanlarını doğrular; geçerliyse None, değilse hata mesajı."""
+    if not isinstance(item.get('content'), str) or not item['content']:
+        return 'content gerekli'
+    if item.get('type', 'text') not in POST_TYPES:
+        return f"type şunlardan biri olmalı: {', '.join(POST_TYPES)}"
+    if item.get('media_type') not in MEDIA_TYPES:
+        return 'media_type image, video veya null olmalı'
+    if not isinstance(item.get('media_url'), (str, type(None))):
+        return 'media_url metin olmalı'
+    for field in ('community_id', 'event_id'):
+        if item.get(field) is not None and parse_id(item[field]) is None:
+            return f'Geçersiz {field}'
+    return None
+
+
+@batch_bp.route('/api/posts/batch', methods=['POST'])
+def create_posts_batch():
+    """
+    Request:
+        {"posts": [{"user_id": 1, "content": "...", "type": "text",
+                    "community_id": 1, "event_id": null,
+                    "media_type": null, "media_url": null}, ...]}
+
+    Response (200 OK):
+        {"results": [{"index": 0, "status": "created", "id": "12"},
+                     {"index": 1, "status": "error", "error": "..."}],
+         "succeeded": 1, "failed": 1}
+    """
+    items, error = read_batch('posts')
+    if error:
+        return error
+
+    valid_users = existing_ids(User, [parse_id(item.get('user_id')) for item in items if isinstance(item, dict)])
+
+    results = [None] * len(items)
+    rows = []
+    row_indexes = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = error_result(index, 'Geçersiz öğe')
+            continue
+
+        user_id = parse_id(item.get('user_id'))
+        if not user_id:
+            results[index] = error_result(index, 'Geçerli user_id gerekli')
+            continue
+        error = post_item_error(item)
+        if error:
+            results[index] = error_result(index, error)
+            continue
+        if user_id not in valid_users:
+            results[index] = error_result(index, 'Kullanıcı bulunamadı')
+            continue
+
+        rows.append({
+            'user_id': user_id,
+            'content': item['content'],
+            'type': item.get('type', 'text'),
+            'community_id': parse_id(item.get('community_id')),
+            'event_id': parse_id(item.get('event_id')),
+            'media_type': item.get('media_type'),
+            'media_url': item.get('media_url')
+        })
+        row_indexes.append(index)
+
+    audience = set()
+    if rows:
+        # Tek transaction: toplu INSERT + timeline fan-out
+        created = db.session.execute(
+            insert(Post).returning(
+                Post.id, Post.community_id, Post.created_at,
+                sort_by_parameter_order=True
+            ),
+            rows
+        ).all()
+        audience = fan_out_posts(created)
+        db.session.commit()
+
+        for index, post in zip(row_indexes, created):
+            results[index] = {'index': index, 'status': 'created', 'id': str(post.id)}
+
+    invalidate_feeds(audience)
+    return batch_response(results)
+
+
+@batch_bp.route('/api/likes/batch', methods=['POST'])
+def likes_batch():
+    """
+    Öğeler hedef durumu belirtir ("liked": true/false, varsayılan true);
+    böylece tekrar gönderilen işlemler idempotenttir. Aynı (post, kullanıcı)
+    çifti için batch'teki son öğe geçerlidir.
+
+    Request:
+        {"likes": [{"post_id": 1, "user_id": 2, "liked": true}, ...]}
+
+    Response (200 OK):
+        {"results": [{"index": 0, "status": "ok", "postId": "1", "isLiked": true}],
+         "succeeded": 1, "failed": 0}
+    """
+    items, error = read_batch('likes')
+    if error:
+        return error
+
+    dict_items = [item for item in items if isinstance(item, dict)]
+    valid_posts = existing_ids(
+        Post, [parse_id(item.get('post_id')) for item in dict_items], Post.deleted_at.is_(None)
+    )
+    valid_users = existing_ids(User, [parse_id(item.get('user_id')) for item in dict_items])
+
+    results = [None] * len(items)
+    desired = {}  # (post_id, user_id) -> hedef durum
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = error_result(index, 'Geçersiz öğe')
+            continue
+
+        post_id = parse_id(item.get('post_id'))
+        user_id = parse_id(item.get('user_id'))
+        if not post_id or not user_id:
+            results[index] = error_result(index, 'Geçerli post_id ve user_id gerekli')
+            continue
+        if post_id not in valid_posts:
+            results[index] = error_result(index, 'Post bulunamadı')
+            continue
+        if user_id not in valid_users:
+            results[index] = error_result(index, 'Kullanıcı bulunamadı')
+            continue
+
+        desired[(post_id, user_id)] = bool(item.get('liked', True))
+        results[index] = {'index': index, 'status': 'ok', 'postId': str(post_id), 'pair': (post_id, user_id)}
+
+    # Sonuçlar çiftin batch sonundaki durumunu gösterir
+    for result in results:
+        if result['status'] == 'ok':
+            result['isLiked'] = desired[result.pop('pair')]
+
+    if desired:
+        # Koşullu yazımlar: sayaçlar sadece gerçekten eklenen/silinen satırlardan
+        # hesaplanır; çakışan batch'ler aynı beğeniyi iki kez saymaz
+        to_like = [
+            {'post_id': post_id, 'user_id': user_id}
+            for (post_id, user_id), liked in desired.items() if liked
+        ]
+        to_unlike = [pair for pair, liked in desired.items() if not liked]
+
+        deltas = defaultdict(int)
+        if to_like:
+            for post_id in db.session.execute(
+                sqlite_insert(PostLike).values(to_like).on_conflict_do_nothing().returning(PostLike.post_id)
+            ).scalars():
+                deltas[post_id] += 1
+        if to_unlike:
+            for post_id in db.session.execute(
+                delete(PostLike).where(
+                    tuple_(PostLike.post_id, PostLike.user_id).in_(to_unlike)
+                ).returning(PostLike.post_id)
+            ).scalars():
+                deltas[post_id] -= 1
+        apply_post_counter_deltas('like_count', deltas)
+        db.session.commit()
+
+    return batch_response(results)
+
+
+@batch_bp.route('/api/comments/batch', methods=['POST'])
+def create_comments_batch():
+    """
+    parent_id verilirse yorum o yorumun thread'ine yanıttır; tek yorumda
+    olduğu gibi yanıta verilen yanıt thread köküne bağlanır.
+
+    Request:
+        {"comments": [{"post_id": 1, "user_id": 2, "content": "...",
+                       "parent_id": null}, ...]}
+
+    Response (200 OK):
+        {"results": [{"index": 0, "status": "created", "id": "7"}],
+         "succeeded": 1, "failed": 0}
+    """
+    items, error = read_batch('comments')
+    if error:
+        return error
+
+    dict_items = [item for item in items if isinstance(item, dict)]
+    valid_posts = existing_ids(
+        Post, [parse_id(item.get('post_id')) for item in dict_items], Post.deleted_at.is_(None)
+    )
+    valid_users = existing_ids(User, [parse_id(item.get('user_id')) for item in dict_items])
+    parents = load_parents([parse_id(item.get('parent_id')) for item in dict_items])
+
+    results = [None] * len(items)
+    rows = []
+    row_indexes = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = error_result(index, 'Geçersiz öğe')
+            continue
+
+        post_id = parse_id(item.get('post_id'))
+        user_id = parse_id(item.get('user_id'))
+        if not post_id or not user_id:
+            results[index] = error_result(index, 'Geçerli post_id ve user_id gerekli')
+            continue
+        if not isinstance(item.get('content'), str) or not item['content']:
+            results[index] = error_result(index, 'content gerekli')
+            continue
+        if post_id not in valid_posts:
+            results[index] = error_result(index, 'Post bulunamadı')
+            continue
+        if user_id not in valid_users:
+            results[index] = error_result(index, 'Kullanıcı bulunamadı')
+            continue
+
+        parent_id = None
+        if item.get('parent_id') is not None:
+            parent = parents.get(parse_id(item['parent_id']))
+            if parent is None or parent.post_id != post_id:
+                results[index] = error_result(index, 'Üst yorum bu posta ait değil')
+                continue
+            # Thread'ler tek seviyelidir: yanıta verilen yanıt thread köküne bağlanır
+            parent_id = parent.parent_id or parent.id
+
+        rows.append({'post_id': post_id, 'user_id': user_id, 'parent_id': parent_id, 'content': item['content']})
+        row_indexes.append(index)
+
+    if rows:
+        created_ids = db.session.execute(
+            insert(Comment).returning(Comment.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+
+        deltas = defaultdict(int)
+        for row in rows:
+            deltas[row['post_id']] += 1
+        apply_post_counter_deltas('comment_count', deltas)
+        db.session.commit()
+
+        for index, comment_id in zip(row_indexes, created_ids):
+            results[index] = {'index': index, 'status': 'created', 'id': str(comment_id)}
+
+    return batch_response(results)
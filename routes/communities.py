@@ -2,6 +2,9 @@
 from flask import Blueprint, jsonify, request
 from models import db, Community, User, CommunityTag, Post, Event
 from sqlalchemy import or_
+from timeline_service import backfill_user, remove_community
+from feed_cache import invalidate_feeds
+from pagination import paginate_request
 
 communities_bp = Blueprint('communities', __name__)
 
@@ -10,7 +13,6 @@ def get_communities():
     user_id = request.args.get('user_id', type=int)
     category = request.args.get('category')
     search = request.args.get('search', '')
-    page = request.args.get('page', 1, type=int)
     limit = request.args.get('limit', 10, type=int)
     
     if not user_id:
@@ -33,12 +35,12 @@ def get_communities():
         )
     
     # Pagination
-    communities = query.order_by(Community.created_at.desc()).paginate(
-        page=page, per_page=limit, error_out=False
+    communities, page_meta = paginate_request(
+        query, [Community.created_at, Community.id], limit
     )
     
     result = []
-    for community in communities.items:
+    for community in communities:
         # Kullanıcının bu topluluğu takip edip etmediğini kontrol et
         is_following = user_id in [follower.id for follower in community.followers]
         
@@ -53,7 +55,8 @@ def get_communities():
         
         # Recent posts
         recent_posts = Post.query.filter(
-            Post.community_id == community.id
+            Post.community_id == community.id,
+            Post.deleted_at.is_(None)
         ).order_by(Post.created_at.desc()).limit(5).all()
         
         community_data = {
@@ -75,7 +78,8 @@ def get_communities():
                 'id': str(post.id),
                 'content': post.content,
                 'timestamp': post.created_at.isoformat(),
-                'likes': post.likes.count()
+                'likes': post.like_count,
+                'comments': post.comment_count
             } for post in recent_posts]
         }
         
@@ -83,9 +87,7 @@ def get_communities():
     
     return jsonify({
         'communities': result,
-        'page': page,
-        'total_pages': communities.pages,
-        'total_items': communities.total
+        **page_meta
     }), 200
 
 
@@ -106,14 +108,19 @@ def toggle_follow(community_id):
     if is_following:
         # Takibi kaldır
         community.followers.remove(user)
+        db.session.flush()
+        remove_community(user.id, community.id)
         db.session.commit()
         is_following = False
     else:
-        # Takip et
+        # Takip et ve topluluğun son postlarını timeline'a ekle
         community.followers.append(user)
+        db.session.flush()
+        backfill_user(user.id, community.id)
         db.session.commit()
         is_following = True
     
+    invalidate_feeds([user.id])
     members_count = len(community.followers)
     
     return jsonify({
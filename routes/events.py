@@ -2,6 +2,7 @@
 from flask import Blueprint, jsonify, request
 from models import db, Event, User, Community
 from sqlalchemy import or_
+from pagination import paginate_request
 
 events_bp = Blueprint('events', __name__)
 
@@ -10,7 +11,6 @@ def get_events():
     user_id = request.args.get('user_id', type=int)
     filter_type = request.args.get('filter', 'all')  # 'all' or 'interested'
     search = request.args.get('search', '')
-    page = request.args.get('page', 1, type=int)
     limit = request.args.get('limit', 10, type=int)
     
     if not user_id:
@@ -35,12 +35,12 @@ def get_events():
         )
     
     # Pagination
-    events = query.order_by(Event.date.asc()).paginate(
-        page=page, per_page=limit, error_out=False
+    events, page_meta = paginate_request(
+        query, [Event.date, Event.id], limit, descending=False
     )
     
     result = []
-    for event in events.items:
+    for event in events:
         # Kullanıcının bu etkinliğe ilgi gösterip göstermediğini kontrol et
         is_interested = user in event.interested_users
         
@@ -63,9 +63,7 @@ def get_events():
     
     return jsonify({
         'events': result,
-        'page': page,
-        'total_pages': events.pages,
-        'total_items': events.total
+        **page_meta
     }), 200
 
 
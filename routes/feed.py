@@ -1,71 +1,188 @@
 # routes/feed.py
-from flask import Blueprint, jsonify, request
-from models import db, Post, PostLike, Comment, User, Community, Event
+from flask import Blueprint, jsonify, request, current_app
+from models import db, Post, PostLike, Comment, User, Community, Event, TimelineEntry
+from timeline_service import fan_out_post, post_audience
+from feed_cache import get_feed_cache, invalidate_feeds, request_variant, compute_etag
+from background import submit_job
+from purge_service import purge_post
+from datetime import datetime
+from pagination import paginate_request
+from feed_ranking import ranked_page
+from counter_service import increment_post_counter
+from validation import parse_id
+from serializers import post_query, serialize_post, comment_query, serialize_comment, COMMENT_COLUMNS
+from sqlalchemy import func, delete, exists, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 feed_bp = Blueprint('feed', __name__)
 
+# Konfigürasyon
+DEFAULT_REPLY_PREVIEW = 3  # Thread başına önizlenen yanıt sayısı
+MAX_REPLY_PREVIEW = 20
+
+
+def hydrate_posts(posts, user_id):
+    """
+    Sayfadaki post satırları için kullanıcının beğeni durumunu toplu getirir.
+
+    Post başına sorgu atmak yerine tüm sayfa için tek bir IN sorgusu çalışır.
+    Beğeni ve yorum sayıları post satırındaki denormalize sayaçlardan okunur.
+
+    Returns:
+        set: Kullanıcının beğendiği post ID'leri
+    """
+    post_ids = [post.id for post in posts]
+    if not post_ids:
+        return set()
+
+    return set(
+        row.post_id for row in db.session.query(PostLike.post_id).filter(
+            PostLike.user_id == user_id,
+            PostLike.post_id.in_(post_ids)
+        )
+    )
+
+
+def refresh_counters(posts, user_id):
+    """
+    Cache'ten gelen sayfanın sayaçlarını ve beğeni durumunu günceller.
+
+    Cache'te sayfanın sırası ve içeriği tutulur; beğeni/yorum sayıları ve
+    isLiked her cevapta tek bir IN sorgusuyla post satırından okunur. Böylece
+    beğeni ve yorumlar postun tüm kitlesinin feed cache'ini düşürmez.
+    Bu arada silinmiş postlar sayfadan çıkarılır.
+
+    Args:
+        posts (list): Cache'teki serileştirilmiş postlar (değiştirilmez)
+        user_id (int): İsteği yapan kullanıcı
+
+    Returns:
+        list: Güncel sayaçlı post sözlükleri
+    """
+    if not posts:
+        return []
+
+    is_liked = exists().where(PostLike.post_id == Post.id, PostLike.user_id == user_id)
+    counters = {
+        row.id: row for row in db.session.execute(
+            select(Post.id, Post.like_count, Post.comment_count, is_liked.label('is_liked')).where(
+                Post.id.in_([int(post['id']) for post in posts]),
+                Post.deleted_at.is_(None)
+            )
+        )
+    }
+    refreshed = []
+    for post in posts:
+        row = counters.get(int(post['id']))
+        if row is not None:
+            refreshed.append({
+                **post,
+                'likes': row.like_count,
+                'comments': row.comment_count,
+                'isLiked': bool(row.is_liked)
+            })
+    return refreshed
+
+
+def load_reply_previews(parent_ids, per_thread):
+    """
+    Sayfadaki üst yorumların ilk K yanıtını ve toplam yanıt sayılarını getirir.
+
+    Thread başına sorgu atmak yerine tek bir pencereli sorgu çalışır:
+    ROW_NUMBER() OVER (PARTITION BY parent_id ...) ile her thread'in ilk K
+    yanıtı, COUNT(*) OVER (PARTITION BY parent_id) ile toplam yanıt sayısı
+    aynı taramada hesaplanır. Yazarlar projeksiyondaki JOIN ile gelir.
+
+    Args:
+        parent_ids (list): Üst yorum ID'leri
+        per_thread (int): Thread başına döndürülecek yanıt sayısı (K)
+
+    Returns:
+        tuple: (replies, counts) - parent_id -> yanıt sözlükleri, parent_id -> yanıt sayısı
+    """
+    replies = {parent_id: [] for parent_id in parent_ids}
+    counts = dict.fromkeys(parent_ids, 0)
+    if not parent_ids:
+        return replies, counts
+
+    row_number = func.row_number().over(
+        partition_by=Comment.parent_id,
+        order_by=(Comment.created_at.asc(), Comment.id.asc())
+    ).label('reply_rank')
+    reply_count = func.count().over(partition_by=Comment.parent_id).label('reply_count')
+
+    ranked = comment_query().add_columns(row_number, reply_count).filter(
+        Comment.parent_id.in_(parent_ids)
+    ).subquery()
+
+    rows = db.session.query(ranked).filter(
+        ranked.c.reply_rank <= max(per_thread, 1)
+    ).order_by(ranked.c.parent_id, ranked.c.reply_rank)
+
+    width = len(COMMENT_COLUMNS)
+    for row in rows:
+        counts[row.parent_id] = row.reply_count
+        if row.reply_rank <= per_thread:
+            replies[row.parent_id].append(serialize_comment(tuple(row)[:width]))
+
+    return replies, counts
+
+
+def get_live_post_or_404(post_id):
+    """Silinmemiş postu getirir; yoksa veya silinmişse 404."""
+    return Post.query.filter(Post.id == post_id, Post.deleted_at.is_(None)).first_or_404()
+
+
 @feed_bp.route('/api/feed', methods=['GET'])
 def get_feed():
     user_id = request.args.get('user_id', type=int)
-    page = request.args.get('page', 1, type=int)
     limit = request.args.get('limit', 10, type=int)
+    mode = request.args.get('mode', 'latest')  # 'latest' veya 'ranked'
     
     if not user_id:
         return jsonify({'error': 'user_id gerekli'}), 400
-    
-    # Kullanıcının takip ettiği toplulukların postlarını getir
-    posts = Post.query.join(Community).filter(
-        Community.members.any(id=user_id)
-    ).order_by(Post.created_at.desc()).paginate(
-        page=page, per_page=limit, error_out=False
-    )
-    
-    result = []
-    for post in posts.items:
-        # Kullanıcının bu postu beğenip beğenmediğini kontrol et
-        is_liked = PostLike.query.filter_by(
-            post_id=post.id, 
-            user_id=user_id
-        ).first() is not None
-        
-        post_data = {
-            'id': str(post.id),
-            'type': post.type,
-            'author': {
-                'name': post.author.name,
-                'avatar': post.author.avatar
-            },
-            'content': post.content,
-            'timestamp': post.created_at.isoformat(),
-            'likes': post.likes.count(),
-            'isLiked': is_liked,
-            'mediaType': post.media_type,
-            'mediaUrl': post.media_url
-        }
-
-        if post.community:
-            post_data['community'] = {
-                'id': str(post.community.id),
-                'name': post.community.name,
-                'avatar': post.community.avatar
-            }
-        
-        if post.event:
-            post_data['event'] = {
-                'id': str(post.event.id),
-                'title': post.event.title,
-                'date': post.event.date.isoformat(),
-                'image': post.event.image
-            }
-        
-        result.append(post_data)
-    
-    return jsonify({
-        'posts': result,
-        'page': page,
-        'total_pages': posts.pages,
-        'total_items': posts.total
-    }), 200
+
+    # Cache isabetinde sayfa sorgusu çalışmaz; sadece sayaçlar tazelenir
+    cache = get_feed_cache()
+    variant = request_variant()
+    cache_key, page = cache.get(user_id, variant)
+    if page is not None:
+        page = {**page, 'posts': refresh_counters(page['posts'], user_id)}
+    else:
+        page = load_feed_page(user_id, mode, limit)
+        cache.set(cache_key, page)
+
+    # ETag son gövdeden: sayaç değişince istemci yeni gövdeyi alır
+    response = jsonify(page)
+    response.set_etag(compute_etag(response.get_data()))
+    return response.make_conditional(request)
+
+
+def load_feed_page(user_id, mode, limit):
+    """Feed sayfasını veritabanından okur ve serileştirir (cache ıskalaması)."""
+    if mode == 'ranked':
+        # Etkileşim x zaman skoruna göre sıralı sayfa
+        posts, page_meta = ranked_page(user_id, limit, request.args.get('cursor'))
+    else:
+        # Kullanıcının materialize edilmiş timeline'ından sıralı dilimi getir
+        # Yazar, topluluk ve etkinlik aynı projeksiyon sorgusunda (lazy load yok)
+        query = post_query().join(
+            TimelineEntry, TimelineEntry.post_id == Post.id
+        ).filter(
+            TimelineEntry.user_id == user_id,
+            Post.deleted_at.is_(None)
+        )
+        posts, page_meta = paginate_request(
+            query, [TimelineEntry.created_at, TimelineEntry.post_id], limit,
+            key=lambda post: (post.created_at, post.id)
+        )
+
+    # Beğeni durumu tüm sayfa için toplu
+    liked_ids = hydrate_posts(posts, user_id)
+    return {
+        'posts': [serialize_post(post, post.id in liked_ids) for post in posts],
+        **page_meta
+    }
 
 
 @feed_bp.route('/api/posts', methods=['POST'])
@@ -86,7 +203,7 @@ def create_post():
         return jsonify({'error': 'content gerekli'}), 400
 
     # Kullanıcının var olduğunu kontrol et
-    user = User.query.get_or_404(user_id)
+    User.query.get_or_404(user_id)
 
     # Yeni post oluştur
     new_post = Post(
@@ -100,38 +217,15 @@ def create_post():
     )
 
     db.session.add(new_post)
+    db.session.flush()
+
+    # Topluluk üye ve takipçilerinin timeline'ına yaz (aynı transaction)
+    audience = fan_out_post(new_post)
     db.session.commit()
+    invalidate_feeds(audience)
 
     # Oluşturulan postu döndür
-    post_data = {
-        'id': str(new_post.id),
-        'type': new_post.type,
-        'author': {
-            'name': user.name,
-            'avatar': user.avatar
-        },
-        'content': new_post.content,
-        'timestamp': new_post.created_at.isoformat(),
-        'likes': 0,
-        'isLiked': False,
-        'mediaType': new_post.media_type,
-        'mediaUrl': new_post.media_url
-    }
-
-    if new_post.community:
-        post_data['community'] = {
-            'id': str(new_post.community.id),
-            'name': new_post.community.name,
-            'avatar': new_post.community.avatar
-        }
-
-    if new_post.event:
-        post_data['event'] = {
-            'id': str(new_post.event.id),
-            'title': new_post.event.title,
-            'date': new_post.event.date.isoformat(),
-            'image': new_post.event.image
-        }
+    post_data = serialize_post(post_query().filter(Post.id == new_post.id).one())
 
     return jsonify({
         'message': 'Post başarıyla oluşturuldu',
@@ -147,14 +241,19 @@ def delete_post(post_id):
     if not user_id:
         return jsonify({'error': 'user_id gerekli'}), 400
 
-    post = Post.query.get_or_404(post_id)
+    post = get_live_post_or_404(post_id)
 
     # Sadece post sahibi silebilir
     if post.user_id != user_id:
         return jsonify({'error': 'Bu postu silme yetkiniz yok'}), 403
 
-    db.session.delete(post)
+    # Postu hemen silindi işaretle (tüm okumalardan düşer); beğeni, yorum ve
+    # timeline kayıtları arka planda set tabanlı DELETE ile temizlenir
+    post.deleted_at = datetime.utcnow()
+    audience = post_audience(post.id)
     db.session.commit()
+    invalidate_feeds(audience)
+    submit_job(purge_post, post.id)
 
     return jsonify({
         'message': 'Post başarıyla silindi'
@@ -169,25 +268,31 @@ def toggle_like(post_id):
     if not user_id:
         return jsonify({'error': 'user_id gerekli'}), 400
 
-    post = Post.query.get_or_404(post_id)
-    existing_like = PostLike.query.filter_by(
-        post_id=post_id,
-        user_id=user_id
-    ).first()
+    get_live_post_or_404(post_id)
 
-    if existing_like:
+    # Kontrol-sonra-yaz yerine koşullu yazım: sayaç sadece gerçekten silinen
+    # veya eklenen satır için değişir (eşzamanlı iki istek sayacı kaydırmaz)
+    deleted = db.session.execute(
+        delete(PostLike).where(PostLike.post_id == post_id, PostLike.user_id == user_id)
+    ).rowcount
+
+    if deleted:
         # Beğeniyi kaldır
-        db.session.delete(existing_like)
-        db.session.commit()
+        likes_count = increment_post_counter(post_id, Post.like_count, -1)
         is_liked = False
     else:
-        # Beğeni ekle
-        new_like = PostLike(post_id=post_id, user_id=user_id)
-        db.session.add(new_like)
-        db.session.commit()
+        # Beğeni ekle (aynı anda eklenmişse satır zaten var)
+        inserted = db.session.execute(
+            sqlite_insert(PostLike).values(post_id=post_id, user_id=user_id).on_conflict_do_nothing()
+        ).rowcount
+        if inserted:
+            likes_count = increment_post_counter(post_id, Post.like_count, 1)
+        else:
+            likes_count = db.session.execute(
+                db.select(Post.like_count).where(Post.id == post_id)
+            ).scalar()
         is_liked = True
-
-    likes_count = post.likes.count()
+    db.session.commit()
 
     return jsonify({
         'likes': likes_count,
@@ -197,34 +302,49 @@ def toggle_like(post_id):
 
 @feed_bp.route('/api/posts/<int:post_id>/comments', methods=['GET'])
 def get_comments(post_id):
-    page = request.args.get('page', 1, type=int)
     limit = request.args.get('limit', 20, type=int)
+    reply_limit = request.args.get('replies', DEFAULT_REPLY_PREVIEW, type=int)
+    reply_limit = min(max(reply_limit, 0), MAX_REPLY_PREVIEW)
 
-    post = Post.query.get_or_404(post_id)
+    post = get_live_post_or_404(post_id)
 
-    comments = Comment.query.filter_by(post_id=post_id).order_by(
-        Comment.created_at.desc()
-    ).paginate(page=page, per_page=limit, error_out=False)
+    # Sadece üst seviye yorumlar sayfalanır; yanıtlar thread altında gelir
+    comments, page_meta = paginate_request(
+        comment_query().filter(Comment.post_id == post_id, Comment.parent_id.is_(None)),
+        [Comment.created_at, Comment.id], limit
+    )
+
+    replies, reply_counts = load_reply_previews([comment.id for comment in comments], reply_limit)
 
     result = []
-    for comment in comments.items:
-        comment_data = {
-            'id': str(comment.id),
-            'content': comment.content,
-            'timestamp': comment.created_at.isoformat(),
-            'author': {
-                'id': str(comment.author.id),
-                'name': comment.author.name,
-                'avatar': comment.author.avatar
-            }
-        }
+    for comment in comments:
+        comment_data = serialize_comment(comment)
+        comment_data['replies'] = replies[comment.id]
+        comment_data['replyCount'] = reply_counts[comment.id]
         result.append(comment_data)
 
     return jsonify({
         'comments': result,
-        'page': page,
-        'total_pages': comments.pages,
-        'total_items': comments.total
+        **page_meta
+    }), 200
+
+
+@feed_bp.route('/api/posts/<int:post_id>/comments/<int:comment_id>/replies', methods=['GET'])
+def get_replies(post_id, comment_id):
+    limit = request.args.get('limit', 20, type=int)
+
+    get_live_post_or_404(post_id)
+    parent = Comment.query.filter_by(id=comment_id, post_id=post_id).first_or_404()
+
+    # Yanıtlar eskiden yeniye; önizlemenin devamı cursor ile okunur
+    replies, page_meta = paginate_request(
+        comment_query().filter(Comment.parent_id == parent.id),
+        [Comment.created_at, Comment.id], limit, descending=False
+    )
+
+    return jsonify({
+        'replies': [serialize_comment(reply) for reply in replies],
+        **page_meta
     }), 200
 
 
@@ -233,6 +353,7 @@ def create_comment(post_id):
     data = request.get_json()
     user_id = data.get('user_id')
     content = data.get('content')
+    parent_id = data.get('parent_id')
 
     if not user_id:
         return jsonify({'error': 'user_id gerekli'}), 400
@@ -240,28 +361,36 @@ def create_comment(post_id):
     if not content:
         return jsonify({'error': 'content gerekli'}), 400
 
-    post = Post.query.get_or_404(post_id)
+    if parent_id is not None:
+        parent_id = parse_id(parent_id)
+        if parent_id is None:
+            return jsonify({'error': 'Geçersiz parent_id'}), 400
+
+    post = get_live_post_or_404(post_id)
     user = User.query.get_or_404(user_id)
 
+    if parent_id is not None:
+        parent = db.session.get(Comment, parent_id)
+        if not parent or parent.post_id != post_id:
+            return jsonify({'error': 'Üst yorum bu posta ait değil'}), 400
+        # Thread'ler tek seviyelidir: yanıta verilen yanıt thread köküne bağlanır
+        parent_id = parent.parent_id or parent.id
+
     new_comment = Comment(
         post_id=post_id,
         user_id=user_id,
+        parent_id=parent_id,
         content=content
     )
 
     db.session.add(new_comment)
+    increment_post_counter(post_id, Post.comment_count, 1)
     db.session.commit()
 
-    comment_data = {
-        'id': str(new_comment.id),
-        'content': new_comment.content,
-        'timestamp': new_comment.created_at.isoformat(),
-        'author': {
-            'id': str(user.id),
-            'name': user.name,
-            'avatar': user.avatar
-        }
-    }
+    comment_data = serialize_comment((
+        new_comment.id, new_comment.content, new_comment.created_at,
+        user.id, user.name, user.avatar, new_comment.parent_id
+    ))
 
     return jsonify({
         'message': 'Yorum başarıyla eklendi',
@@ -286,7 +415,10 @@ def delete_comment(post_id, comment_id):
     if comment.post_id != post_id:
         return jsonify({'error': 'Yorum bu posta ait değil'}), 400
 
+    # Üst yorum silinirse thread'in yanıtları da silinir
+    removed = 1 + Comment.query.filter(Comment.parent_id == comment.id).delete(synchronize_session=False)
     db.session.delete(comment)
+    increment_post_counter(post_id, Post.comment_count, -removed)
     db.session.commit()
 
     return jsonify({
@@ -1,23 +1,32 @@
 # routes/mentors.py
 from flask import Blueprint, jsonify, request
-from models import db, Mentor, User, MentorExpertise
+from collections import defaultdict
+from sqlalchemy import func, literal_column
+from models import db, Mentor, User, MentorExpertise, mentor_followers
+from pagination import paginate_request
+from serializers import mentor_query, serialize_mentor
 
 mentors_bp = Blueprint('mentors', __name__)
 
+
+def mentor_rating_key():
+    """Sıralama ifadesi; NULL rating'li mentorlar seek'te kaybolmaz (ix_mentors_rating_id)."""
+    return func.coalesce(Mentor.rating, literal_column('0.0'))
+
+
 @mentors_bp.route('/api/mentors', methods=['GET'])
 def get_mentors():
     user_id = request.args.get('user_id', type=int)
     filter_type = request.args.get('filter', 'all')  # 'all', 'available', 'following'
-    page = request.args.get('page', 1, type=int)
     limit = request.args.get('limit', 10, type=int)
     
     if not user_id:
         return jsonify({'error': 'user_id gerekli'}), 400
     
-    user = User.query.get_or_404(user_id)
+    User.query.get_or_404(user_id)
     
-    # Base query
-    query = Mentor.query
+    # Base query (mentor + kullanıcı tek JOIN)
+    query = mentor_query()
     
     # Filter by availability
     if filter_type == 'available':
@@ -27,41 +36,38 @@ def get_mentors():
     elif filter_type == 'following':
         query = query.filter(Mentor.followers.any(id=user_id))
     
-    # Pagination
-    mentors = query.order_by(Mentor.rating.desc()).paginate(
-        page=page, per_page=limit, error_out=False
+    # Pagination (rating'i boş mentorlar 0 puanla en sonda)
+    mentors, page_meta = paginate_request(
+        query, [mentor_rating_key(), Mentor.id], limit,
+        key=lambda mentor: (mentor.rating or 0.0, mentor.id)
     )
     
-    result = []
-    for mentor in mentors.items:
-        # Kullanıcının bu mentoru takip edip etmediğini kontrol et
-        is_following = user in mentor.followers
-        
-        # Expertise
-        expertise = [exp.skill for exp in mentor.expertise]
-        
-        mentor_data = {
-            'id': str(mentor.id),
-            'name': mentor.user.name,
-            'avatar': mentor.user.avatar,
-            'title': mentor.title,
-            'company': mentor.company,
-            'expertise': expertise,
-            'availability': mentor.availability,
-            'rating': mentor.rating,
-            'sessionsCompleted': mentor.sessions_completed,
-            'bio': mentor.bio,
-            'responseTime': mentor.response_time,
-            'isFollowing': is_following
-        }
-        
-        result.append(mentor_data)
+    mentor_ids = [mentor.id for mentor in mentors]
+
+    # Expertise ve takip durumu tüm sayfa için toplu
+    expertise = defaultdict(list)
+    followed_ids = set()
+    if mentor_ids:
+        for mentor_id, skill in db.session.query(
+            MentorExpertise.mentor_id, MentorExpertise.skill
+        ).filter(MentorExpertise.mentor_id.in_(mentor_ids)).order_by(MentorExpertise.id):
+            expertise[mentor_id].append(skill)
+
+        followed_ids = set(db.session.execute(
+            db.select(mentor_followers.c.mentor_id).where(
+                mentor_followers.c.user_id == user_id,
+                mentor_followers.c.mentor_id.in_(mentor_ids)
+            )
+        ).scalars())
+    
+    result = [
+        serialize_mentor(mentor, expertise[mentor.id], mentor.id in followed_ids)
+        for mentor in mentors
+    ]
     
     return jsonify({
         'mentors': result,
-        'page': page,
-        'total_pages': mentors.pages,
-        'total_items': mentors.total
+        **page_meta
     }), 200
 
 
@@ -1,121 +1,225 @@
 # routes/messages.py
 from flask import Blueprint, jsonify, request
 from models import db, Conversation, Message, User
-from sqlalchemy import or_, and_
+from pagination import paginate_request, is_cursor_request, decode_cursor, encode_cursor
+from serializers import (
+    message_query, serialize_message, conversation_query, serialize_conversation,
+    serialize_search_result
+)
+from conversation_service import (
+    record_message, advance_read_watermark, other_participant, get_or_create_conversation,
+    hide_conversation, cleared_message_id, unread_total
+)
+from purge_service import purge_conversation, count_up_to, INLINE_PURGE_LIMIT
+from background import submit_job
+from event_hub import publish
+from search_service import search_messages
+from archive_service import read_range, count_archived
+from presence import get_presence
 
 messages_bp = Blueprint('messages', __name__)
 
 
+def seek_messages(conversation, user_id, limit, after_id=None, before_id=None):
+    """
+    Mesajları id üzerinden seek ederek getirir; COUNT çalışmaz.
+
+    after_id: id > after_id olan yeni mesajlar (yeniden bağlanan istemci için
+    catch-up). before_id: id < before_id olan eski mesajlar (geçmişte geri
+    kaydırma). Her iki yol da (conversation_id, id) indeksinde sabit maliyetli
+    bir aralık taramasıdır; aralık arşive uzanırsa read_range segmentten devam
+    eder.
+
+    Returns:
+        tuple: (messages, meta) - messages eskiden yeniye sıralı
+    """
+    limit = max(limit, 1)
+    cleared = cleared_message_id(conversation, user_id)
+
+    if after_id is not None:
+        rows = read_range(conversation, after=max(after_id, cleared), limit=limit + 1, ascending=True)
+        messages = rows[:limit]
+        return messages, {
+            'has_more': len(rows) > limit,
+            'next_after_id': str(messages[-1][0]) if messages else str(after_id)
+        }
+
+    rows = read_range(conversation, before=before_id, after=cleared, limit=limit + 1)
+    messages = list(reversed(rows[:limit]))
+    return messages, {
+        'has_more': len(rows) > limit,
+        'next_before_id': str(messages[0][0]) if messages else None
+    }
+
+
 @messages_bp.route('/api/conversations', methods=['GET'])
 def get_conversations():
     user_id = request.args.get('user_id', type=int)
+    limit = request.args.get('limit', 50, type=int)
 
     if not user_id:
         return jsonify({'error': 'user_id gerekli'}), 400
 
-    # Kullanıcının tüm konuşmalarını getir
-    conversations = Conversation.query.filter(
-        or_(
-            Conversation.user1_id == user_id,
-            Conversation.user2_id == user_id
-        )
-    ).order_by(Conversation.last_message_at.desc()).all()
-
-    result = []
-    for conv in conversations:
-        # Diğer kullanıcıyı bul
-        other_user = conv.user2 if conv.user1_id == user_id else conv.user1
-
-        # Son mesajı al
-        last_message = conv.messages.order_by(Message.created_at.desc()).first()
-
-        # Okunmamış mesaj sayısını hesapla
-        unread_count = conv.messages.filter(
-            and_(
-                Message.sender_id != user_id,
-                Message.is_read == False
-            )
-        ).count()
-
-        conv_data = {
-            'id': str(conv.id),
-            'otherUser': {
-                'id': str(other_user.id),
-                'name': other_user.name,
-                'avatar': other_user.avatar
-            },
-            'lastMessage': {
-                'content': last_message.content,
-                'timestamp': last_message.created_at.isoformat(),
-                'senderId': str(last_message.sender_id)
-            } if last_message else None,
-            'unreadCount': unread_count,
-            'lastMessageAt': conv.last_message_at.isoformat() if conv.last_message_at else conv.created_at.isoformat()
-        }
+    # Gelen kutusu tek sorgu: diğer katılımcı JOIN ile, son mesaj ve
+    # okunmamış sayı konuşma satırındaki özetten
+    conversations, page_meta = paginate_request(
+        conversation_query(user_id),
+        [Conversation.last_message_at, Conversation.id], limit
+    )
 
-        result.append(conv_data)
+    # Çevrimiçi durumu bellekteki presence tracker'ından
+    online_ids = get_presence().online_among(conv.other_id for conv in conversations)
 
     return jsonify({
-        'conversations': result
+        'conversations': [
+            serialize_conversation(conv, conv.other_id in online_ids) for conv in conversations
+        ],
+        **page_meta
     }), 200
 
 
+def publish_unread(user_id):
+    """Kullanıcının güncel okunmamış rozet sayısını akışına yayınlar."""
+    publish([user_id], 'unread', {'unreadCount': unread_total(user_id)})
+
+
+@messages_bp.route('/api/messages/unread-count', methods=['GET'])
+def get_unread_count():
+    user_id = request.args.get('user_id', type=int)
+
+    if not user_id:
+        return jsonify({'error': 'user_id gerekli'}), 400
+
+    # Kullanıcı satırındaki sayaç; messages taranmaz
+    unread_count = unread_total(user_id)
+    if unread_count is None:
+        return jsonify({'error': 'Kullanıcı bulunamadı'}), 404
+
+    return jsonify({
+        'unreadCount': unread_count
+    }), 200
+
+
+@messages_bp.route('/api/messages/search', methods=['GET'])
+def search():
+    user_id = request.args.get('user_id', type=int)
+    q = request.args.get('q', '').strip()
+    limit = request.args.get('limit', 20, type=int)
+
+    if not user_id:
+        return jsonify({'error': 'user_id gerekli'}), 400
+
+    if not q:
+        return jsonify({'error': 'q gerekli'}), 400
+
+    # FTS5 + bm25; sadece kullanıcının konuşmaları
+    results, page_meta = search_messages(user_id, q, limit, request.args.get('cursor'))
+
+    return jsonify({
+        'results': [serialize_search_result(row) for row in results],
+        **page_meta
+    }), 200
+
+
+def page_with_archive(conversation, user_id, query, limit):
+    """
+    Eski page/limit modu; sıcak küme biten sayfalar arşivden devam eder ve
+    toplamlar arşivlenmiş mesajları da sayar.
+
+    Returns:
+        tuple: (messages, meta) - messages yeniden eskiye sıralı
+    """
+    limit = max(limit, 1)
+    page_number = max(request.args.get('page', 1, type=int), 1)
+    cleared = cleared_message_id(conversation, user_id)
+    hot_total = query.order_by(None).count()
+    total = hot_total + count_archived(conversation, after_id=cleared)
+
+    # Arşive uzanan sayfalarda baştaki mesajlar atlanır (eski mod, derin sayfa pahalı)
+    messages = read_range(conversation, after=cleared, limit=limit, offset=(page_number - 1) * limit)
+
+    return messages, {
+        'page': page_number,
+        'total_pages': -(-total // limit),
+        'total_items': total
+    }
+
+
 @messages_bp.route('/api/conversations/<int:conversation_id>/messages', methods=['GET'])
 def get_messages(conversation_id):
     user_id = request.args.get('user_id', type=int)
-    page = request.args.get('page', 1, type=int)
     limit = request.args.get('limit', 50, type=int)
+    after_id = request.args.get('after_id', type=int)
+    before_id = request.args.get('before_id', type=int)
 
     if not user_id:
         return jsonify({'error': 'user_id gerekli'}), 400
 
+    if after_id is not None and before_id is not None:
+        return jsonify({'error': 'after_id ve before_id birlikte kullanılamaz'}), 400
+
     conversation = Conversation.query.get_or_404(conversation_id)
 
     # Kullanıcının bu konuşmaya erişimi var mı kontrol et
     if conversation.user1_id != user_id and conversation.user2_id != user_id:
         return jsonify({'error': 'Bu konuşmaya erişim yetkiniz yok'}), 403
 
-    # Mesajları getir
-    messages = Message.query.filter_by(
-        conversation_id=conversation_id
-    ).order_by(Message.created_at.desc()).paginate(
-        page=page, per_page=limit, error_out=False
+    # Konuşmayı son mesaja kadar okundu işaretle (tek monotonik UPDATE)
+    last_message_id = conversation.last_message_id
+    other_user_id = other_participant(conversation, user_id)
+    if last_message_id and advance_read_watermark(conversation, user_id, last_message_id):
+        db.session.commit()
+        # Gönderene okundu bilgisi
+        publish([other_user_id], 'read', {
+            'conversationId': str(conversation_id),
+            'readerId': str(user_id),
+            'lastReadMessageId': str(last_message_id)
+        })
+        publish_unread(user_id)
+
+    if after_id is not None or before_id is not None:
+        messages, page_meta = seek_messages(conversation, user_id, limit, after_id, before_id)
+        return jsonify({
+            'messages': [serialize_message(msg) for msg in messages],
+            **page_meta
+        }), 200
+
+    # Kullanıcının sildiği geçmiş gösterilmez
+    cleared = cleared_message_id(conversation, user_id)
+    visible_messages = message_query().filter(
+        Message.conversation_id == conversation_id,
+        Message.id > cleared
     )
 
-    # Okunmamış mesajları okundu olarak işaretle
-    unread_messages = Message.query.filter(
-        and_(
-            Message.conversation_id == conversation_id,
-            Message.sender_id != user_id,
-            Message.is_read == False
+    # Mesajları getir; kullanıcının görebildiği arşivlenmiş geçmiş varsa sayfa modu onu da sayar
+    if not is_cursor_request() and conversation.archived_through_message_id > cleared:
+        messages, page_meta = page_with_archive(conversation, user_id, visible_messages, limit)
+    else:
+        messages, page_meta = paginate_request(
+            visible_messages, [Message.created_at, Message.id], limit
         )
-    ).all()
-
-    for msg in unread_messages:
-        msg.is_read = True
-    db.session.commit()
 
-    result = []
-    for msg in messages.items:
-        msg_data = {
-            'id': str(msg.id),
-            'content': msg.content,
-            'senderId': str(msg.sender_id),
-            'isRead': msg.is_read,
-            'timestamp': msg.created_at.isoformat(),
-            'sender': {
-                'id': str(msg.sender.id),
-                'name': msg.sender.name,
-                'avatar': msg.sender.avatar
-            }
-        }
-        result.append(msg_data)
+    # Cursor modunda sıcak küme bittiyse sayfa arşivden devam eder
+    if is_cursor_request() and not page_meta['has_more'] and conversation.archived_through_message_id:
+        if messages:
+            bound = messages[-1].id
+        elif request.args.get('cursor'):
+            bound = decode_cursor(request.args.get('cursor'), [Message.created_at, Message.id])[1]
+        else:
+            bound = conversation.archived_through_message_id + 1
+        missing = max(limit, 1) - len(messages)
+        older = read_range(conversation, before=bound, after=cleared, limit=missing + 1)
+        messages = list(messages) + older[:missing]
+        if len(older) > missing:
+            last = messages[-1]
+            page_meta['next_cursor'] = encode_cursor([last[4], last[0]])
+            page_meta['has_more'] = True
+
+    result = [serialize_message(msg) for msg in messages]
 
     return jsonify({
         'messages': list(reversed(result)),  # En eski mesaj en üstte
-        'page': page,
-        'total_pages': messages.pages,
-        'total_items': messages.total
+        **page_meta
     }), 200
 
 
@@ -128,44 +232,29 @@ def create_or_get_conversation():
     if not user1_id or not user2_id:
         return jsonify({'error': 'user1_id ve user2_id gerekli'}), 400
 
-    if user1_id == user2_id:
-        return jsonify({'error': 'Kendinizle konuşma başlatamazsınız'}), 400
-
     # Kullanıcılar var mı kontrol et
     user1 = User.query.get_or_404(user1_id)
     user2 = User.query.get_or_404(user2_id)
 
-    # Mevcut konuşmayı kontrol et
-    existing_conv = Conversation.query.filter(
-        or_(
-            and_(Conversation.user1_id == user1_id, Conversation.user2_id == user2_id),
-            and_(Conversation.user1_id == user2_id, Conversation.user2_id == user1_id)
-        )
-    ).first()
-
-    if existing_conv:
-        return jsonify({
-            'conversation': {
-                'id': str(existing_conv.id),
-                'created': False
-            }
-        }), 200
-
-    # Yeni konuşma oluştur
-    new_conv = Conversation(
-        user1_id=user1_id,
-        user2_id=user2_id
-    )
+    if user1.id == user2.id:
+        return jsonify({'error': 'Kendinizle konuşma başlatamazsınız'}), 400
 
-    db.session.add(new_conv)
+    # Normalize çift üzerinde atomik insert-or-fetch
+    conversation_id, created = get_or_create_conversation(user1.id, user2.id)
     db.session.commit()
 
+    if created:
+        publish([user1.id, user2.id], 'conversation', {
+            'conversationId': str(conversation_id),
+            'action': 'created'
+        })
+
     return jsonify({
         'conversation': {
-            'id': str(new_conv.id),
-            'created': True
+            'id': str(conversation_id),
+            'created': created
         }
-    }), 201
+    }), 201 if created else 200
 
 
 @messages_bp.route('/api/conversations/<int:conversation_id>/messages', methods=['POST'])
@@ -196,25 +285,30 @@ def send_message(conversation_id):
     )
 
     db.session.add(new_message)
+    db.session.flush()
 
-    # Konuşmanın son mesaj zamanını güncelle
-    conversation.last_message_at = new_message.created_at
+    # Konuşma özeti: son mesaj, önizleme, alıcının okunmamış sayacı
+    recipient_id = record_message(conversation, new_message)
     db.session.commit()
 
+    # Gönderilen mesaj "yazıyor" durumunu bitirir; alıcı bunu message olayından anlar
+    get_presence().stop_typing(conversation_id, sender_id)
+
+    message_data = serialize_message((
+        new_message.id, new_message.content, new_message.sender_id,
+        False, new_message.created_at, sender.name, sender.avatar
+    ))
+
+    # İki katılımcıya da (gönderenin diğer cihazları dahil) push
+    publish([conversation.user1_id, conversation.user2_id], 'message', {
+        'conversationId': str(conversation_id),
+        'message': message_data
+    })
+    publish_unread(recipient_id)
+
     return jsonify({
         'message': 'Mesaj gonderildi',
-        'data': {
-            'id': str(new_message.id),
-            'content': new_message.content,
-            'senderId': str(new_message.sender_id),
-            'isRead': new_message.is_read,
-            'timestamp': new_message.created_at.isoformat(),
-            'sender': {
-                'id': str(sender.id),
-                'name': sender.name,
-                'avatar': sender.avatar
-            }
-        }
+        'data': message_data
     }), 201
 
 
@@ -227,13 +321,25 @@ def mark_as_read(message_id):
         return jsonify({'error': 'user_id gerekli'}), 400
 
     message = Message.query.get_or_404(message_id)
+    conversation = message.conversation
 
     # Sadece mesajın alıcısı işaretleyebilir
     if message.sender_id == user_id:
         return jsonify({'error': 'Kendi mesajinizi okudu olarak isaretleyemezsiniz'}), 403
 
-    message.is_read = True
-    db.session.commit()
+    if conversation.user1_id != user_id and conversation.user2_id != user_id:
+        return jsonify({'error': 'Bu konuşmaya erişim yetkiniz yok'}), 403
+
+    # Watermark bu mesaja (ve öncesindeki tüm mesajlara) kadar ilerler
+    if advance_read_watermark(conversation, user_id, message.id):
+        db.session.commit()
+
+        publish([message.sender_id], 'read', {
+            'conversationId': str(conversation.id),
+            'readerId': str(user_id),
+            'lastReadMessageId': str(message.id)
+        })
+        publish_unread(user_id)
 
     return jsonify({
         'message': 'Mesaj okundu olarak isaretlendi'
@@ -254,9 +360,28 @@ def delete_conversation(conversation_id):
     if conversation.user1_id != user_id and conversation.user2_id != user_id:
         return jsonify({'error': 'Bu konusmayi silme yetkiniz yok'}), 403
 
-    db.session.delete(conversation)
+    # Sadece bu kullanıcı için sil: gizle ve geçmişi temizle (mesajlara dokunmaz)
+    both_hidden = hide_conversation(conversation, user_id)
     db.session.commit()
 
+    if both_hidden:
+        # İki taraf da sildi: küçük konuşmalar tek DELETE ile hemen,
+        # büyükler arka planda parça parça silinir
+        pending = count_up_to(
+            Message.id, [Message.conversation_id == conversation_id], INLINE_PURGE_LIMIT
+        )
+        if pending <= INLINE_PURGE_LIMIT:
+            purge_conversation(conversation_id, chunk_size=INLINE_PURGE_LIMIT)
+        else:
+            submit_job(purge_conversation, conversation_id)
+
+    # Sadece silen kullanıcının cihazlarına
+    publish([user_id], 'conversation', {
+        'conversationId': str(conversation_id),
+        'action': 'deleted'
+    })
+    publish_unread(user_id)
+
     return jsonify({
         'message': 'Konusma silindi'
     }), 200
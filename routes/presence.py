@@ -0,0 +1,113 @@
+# routes/presence.py
+from flask import Blueprint, jsonify, request
+from models import db, Conversation, User
+from conversation_service import other_participant, conversation_partners, partners_by_user
+from event_hub import publish
+from presence import get_presence, start_sweeper
+from validation import parse_id
+
+presence_bp = Blueprint('presence', __name__)
+
+
+def publish_expired(offline, stopped):
+    """
+    Süresi dolan çevrimiçi/yazıyor durumlarını ilgili kullanıcılara yayınlar.
+    Çevrimdışı olanların partnerleri tek sorguda okunur.
+    """
+    partners = partners_by_user(offline)
+    for user_id in offline:
+        publish(partners[user_id], 'presence', {
+            'userId': str(user_id),
+            'online': False
+        })
+    for conversation_id, user_id, recipient_id in stopped:
+        publish([recipient_id], 'typing', {
+            'conversationId': str(conversation_id),
+            'userId': str(user_id),
+            'typing': False
+        })
+
+
+def start_presence_sweeper(app):
+    """Süresi dolan durumları arka planda süpürüp yayınlar (istek beklemeden)."""
+    return start_sweeper(app, publish_expired)
+
+
+def read_user_id(data):
+    """Gövdedeki user_id'yi kimliğe çevirir; geçersiz veya aralık dışıysa None."""
+    return parse_id(data.get('user_id'))
+
+
+@presence_bp.route('/api/presence/heartbeat', methods=['POST'])
+def heartbeat():
+    data = request.get_json(silent=True) or {}
+    user_id = read_user_id(data)
+
+    if not user_id:
+        return jsonify({'error': 'Geçerli bir user_id gerekli'}), 400
+
+    tracker = get_presence()
+
+    # Süre yenileme bellekte; veritabanına sadece çevrimiçi olunduğunda gidilir
+    if tracker.heartbeat(user_id):
+        if db.session.get(User, user_id) is None:
+            tracker.go_offline(user_id)
+            return jsonify({'error': 'Kullanıcı bulunamadı'}), 404
+
+        publish(conversation_partners(user_id), 'presence', {
+            'userId': str(user_id),
+            'online': True
+        })
+
+    return jsonify({
+        'online': True,
+        'ttl': tracker.online.ttl
+    }), 200
+
+
+@presence_bp.route('/api/conversations/<int:conversation_id>/typing', methods=['POST'])
+def typing(conversation_id):
+    data = request.get_json(silent=True) or {}
+    user_id = read_user_id(data)
+    is_typing = data.get('typing', True)
+
+    if not user_id:
+        return jsonify({'error': 'Geçerli bir user_id gerekli'}), 400
+
+    # "false" gibi string'ler truthy olduğundan sadece gerçek bool kabul edilir
+    if not isinstance(is_typing, bool):
+        return jsonify({'error': 'typing true veya false olmalı'}), 400
+
+    tracker = get_presence()
+
+    if not is_typing:
+        recipient_id = tracker.typing.get((conversation_id, user_id))
+        if tracker.stop_typing(conversation_id, user_id):
+            publish([recipient_id], 'typing', {
+                'conversationId': str(conversation_id),
+                'userId': str(user_id),
+                'typing': False
+            })
+        return jsonify({'typing': False}), 200
+
+    # Devam eden yazma: erişim başlangıçta kontrol edildi, sadece süre yenilenir
+    recipient_id = tracker.typing.get((conversation_id, user_id))
+    if recipient_id is not None:
+        tracker.start_typing(conversation_id, user_id, recipient_id)
+        return jsonify({'typing': True}), 200
+
+    conversation = Conversation.query.get_or_404(conversation_id)
+
+    # Kullanıcının bu konuşmaya erişimi var mı kontrol et
+    if conversation.user1_id != user_id and conversation.user2_id != user_id:
+        return jsonify({'error': 'Bu konuşmaya erişim yetkiniz yok'}), 403
+
+    recipient_id = other_participant(conversation, user_id)
+    if tracker.start_typing(conversation_id, user_id, recipient_id):
+        publish([recipient_id], 'typing', {
+            'conversationId': str(conversation_id),
+            'userId': str(user_id),
+            'typing': True
+        })
+
+    return jsonify({'typing': True}), 200
@@ -0,0 +1,80 @@
+"""
+routes/stream.py
+----------------
+Server-Sent Events ile gerçek zamanlı olay akışı.
+
+Endpoints:
+- GET /api/stream - Token sahibinin olay akışı (text/event-stream)
+
+Akış mesaj içeriklerini ve okundu bilgilerini taşıdığı için Bearer token
+gerekir; kullanıcı token'dan belirlenir. Eski istemcilerin gönderdiği
+user_id token'ın kullanıcısıyla eşleşmelidir (aksi halde 403).
+
+Olaylar:
+- message: Yeni mesaj     {"conversationId": "1", "message": {...}}
+- read: Okundu bilgisi    {"conversationId": "1", "readerId": "2", "lastReadMessageId": "7"}
+- conversation: Konuşma güncellemesi {"conversationId": "1", "action": "created" | "deleted"}
+- unread: Toplam okunmamış rozeti {"unreadCount": 3}
+- presence: Konuşma partnerinin çevrimiçi durumu {"userId": "2", "online": true}
+- typing: Yazıyor göstergesi {"conversationId": "1", "userId": "2", "typing": true}
+
+Yeniden bağlanırken EventSource son aldığı id'yi Last-Event-ID başlığıyla
+gönderir (veya ?last_event_id=); kaçırılan olaylar önce iletilir. Olay id'leri
+sunucu yeniden başlatılınca 0'dan başlar; önceki id'lerle resume yapılamaz.
+
+Worker'ın akış sınırı (STREAM_MAX_CONNECTIONS) doluysa 503 + Retry-After döner.
+"""
+
+from flask import Blueprint, Response, jsonify, request, current_app
+from event_hub import get_event_hub, format_event, CLOSED, DEFAULT_HEARTBEAT_INTERVAL, StreamLimitReached
+from routes.auth import token_required
+
+stream_bp = Blueprint('stream', __name__)
+
+
+def read_last_event_id():
+    value = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+@stream_bp.route('/api/stream', methods=['GET'])
+@token_required
+def stream(current_user):
+    user_id = current_user.id
+
+    requested_id = request.args.get('user_id', type=int)
+    if requested_id is not None and requested_id != user_id:
+        return jsonify({'error': 'Başka kullanıcının akışı açılamaz'}), 403
+
+    hub = get_event_hub()
+    heartbeat = current_app.config.get('STREAM_HEARTBEAT_INTERVAL', DEFAULT_HEARTBEAT_INTERVAL)
+    try:
+        subscription = hub.subscribe(user_id, read_last_event_id())
+    except StreamLimitReached:
+        response = jsonify({'error': 'Akış bağlantı sınırı dolu, lütfen tekrar deneyin'})
+        response.headers['Retry-After'] = str(int(heartbeat) or 1)
+        return response, 503
+
+    def generate():
+        try:
+            # İstemcinin yeniden bağlanma aralığı (ms)
+            yield f'retry: {heartbeat * 1000}\n\n'
+            while not subscription.closed:
+                event = subscription.get(timeout=heartbeat)
+                if event is CLOSED:
+                    break
+                if event is None:
+                    # Boşta bağlantıyı ve ara proxy'leri canlı tut
+                    yield ': heartbeat\n\n'
+                    continue
+                yield format_event(event)
+        finally:
+            hub.unsubscribe(subscription)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx tamponlamasını kapat
+    return response
@@ -0,0 +1,112 @@
+"""
+routes/users.py
+---------------
+Toplu kullanıcı sorgusu (multi-get).
+
+İstemciler listelerdeki yazarları ve konuşma partnerlerini kompakt profil
+kartları olarak çözer. Kimlikler tekilleştirilir, önce süreç içi kart
+cache'ine (user_cache.py) bakılır ve sadece ıskalananlar tek bir IN
+sorgusuyla okunur. Kartlar istenen sırada döner; bulunamayan kimlikler
+'missing' listesindedir.
+
+Cevap gövdesinden güçlü (strong) ETag üretilir; aynı kart kümesi için
+If-None-Match eşleşirse GET 304 Not Modified döner.
+
+Endpoints:
+- GET  /api/users?ids=1,2,3  - Kısa listeler (maks. 100)
+- POST /api/users/lookup     - Uzun listeler, gövde: {"ids": [...]} (maks. 500)
+"""
+
+from flask import Blueprint, jsonify, request
+from models import db, User
+from serializers import USER_CARD_COLUMNS, serialize_user_card
+from feed_cache import compute_etag
+from user_cache import get_user_cache
+from validation import parse_id
+
+users_bp = Blueprint('users', __name__)
+
+# Konfigürasyon
+MAX_GET_IDS = 100  # URL uzunluğu sınırı; daha uzun listeler POST ile
+MAX_LOOKUP_IDS = 500
+
+
+def parse_ids(values, limit):
+    """
+    Kimlik listesini doğrular ve sırayı koruyarak tekilleştirir.
+
+    Returns:
+        tuple: (ids, error_response) - hata yoksa error_response None
+    """
+    if not values:
+        return None, (jsonify({'error': 'ids gerekli'}), 400)
+
+    ids = []
+    for value in values:
+        user_id = parse_id(value)
+        if user_id is None:
+            return None, (jsonify({'error': f'Geçersiz kullanıcı kimliği: {value}'}), 400)
+        ids.append(user_id)
+
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > limit:
+        return None, (jsonify({'error': f'Maksimum kimlik sayısı: {limit}'}), 400)
+
+    return ids, None
+
+
+def load_cards(user_ids):
+    """
+    Kartları cache'ten, ıskalananları tek IN sorgusuyla veritabanından okur.
+
+    Returns:
+        dict: {user_id: kart} (bulunamayanlar yok)
+    """
+    cache = get_user_cache()
+    cards, missing = cache.get_many(user_ids)
+    if missing:
+        versions = cache.versions(missing)
+        rows = db.session.execute(
+            db.select(*USER_CARD_COLUMNS).where(User.id.in_(missing))
+        ).all()
+        loaded = {row.id: serialize_user_card(row) for row in rows}
+        cache.set_many(loaded, versions)
+        cards.update(loaded)
+    return cards
+
+
+def cards_response(user_ids):
+    cards = load_cards(user_ids)
+    response = jsonify({
+        'users': [cards[user_id] for user_id in user_ids if user_id in cards],
+        'missing': [str(user_id) for user_id in user_ids if user_id not in cards]
+    })
+    response.set_etag(compute_etag(response.get_data()))
+    return response.make_conditional(request)
+
+
+@users_bp.route('/api/users', methods=['GET'])
+def get_users():
+    raw = request.args.get('ids', '')
+    values = [value.strip() for value in raw.split(',') if value.strip()]
+
+    user_ids, error = parse_ids(values, MAX_GET_IDS)
+    if error:
+        return error
+
+    return cards_response(user_ids)
+
+
+@users_bp.route('/api/users/lookup', methods=['POST'])
+def lookup_users():
+    data = request.get_json(silent=True) or {}
+    values = data.get('ids')
+
+    if values is not None and not isinstance(values, list):
+        return jsonify({'error': 'ids listesi gerekli'}), 400
+
+    user_ids, error = parse_ids(values, MAX_LOOKUP_IDS)
+    if error:
+        return error
+
+    return cards_response(user_ids)
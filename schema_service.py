@@ -0,0 +1,275 @@
+"""
+schema_service.py
+-----------------
+Mevcut (eski şemalı) veritabanlarının modellere yükseltilmesi.
+
+db.create_all() sadece eksik tabloları oluşturur; var olan tablolara kolon,
+indeks veya unique kısıt eklemez. Sayaç, watermark, soft delete, yorum
+thread'i, konuşma özeti ve şifre kolonları sonradan eklendiği için bu
+değişikliklerden önce oluşturulmuş bir campus.db'de feed, mesaj ve auth
+endpoint'leri "no such column" ile düşer. Bu yüzden:
+
+- Uygulama açılışta şemayı kontrol eder (schema_problems); eksik kolon veya
+  unique kısıt varsa istek almadan SchemaOutdated ile durur
+- upgrade_schema() idempotent yükseltmedir; birden çok kez çalıştırılabilir:
+    1. Eksik tablolar (create_all) ve kolonlar (ALTER TABLE ... ADD COLUMN)
+    2. Konuşma çiftlerinin normalizasyonu (user1_id < user2_id, tekrar
+       eden çiftlerin mesajları tek konuşmada birleştirilir)
+    3. Okuma watermark'ları eski messages.is_read bayrağından
+    4. messages tablosu AUTOINCREMENT ile yeniden kurulur (arşivlenen
+       mesajların id'leri tekrar kullanılmaz; is_read kolonu düşer)
+    5. Tekrarlayan beğeniler silinir; eksik indeksler ve unique kısıtlar
+       (unique indeks olarak) oluşturulur
+    6. Backfill: post sayaçları, konuşma özetleri ve okunmamış sayaçlar,
+       timeline'lar ve mesaj arama (FTS5) indeksi
+
+Eski şemada şifre yoktu; yükseltilen kullanıcıların password_hash'i boştur
+ve şifre belirlenene kadar giriş yapamazlar.
+
+Kullanım (açılış kontrolü komut için kapatılır):
+    SCHEMA_CHECK=0 flask --app main upgrade-db
+"""
+
+import warnings
+from collections import defaultdict
+from sqlalchemy import inspect, text, literal
+from sqlalchemy.exc import SAWarning
+from models import db, Conversation, Message
+
+import conversation_service
+import counter_service
+import search_service
+import timeline_service
+
+
+class SchemaOutdated(Exception):
+    """Veritabanı şeması modellerin gerisinde; upgrade-db çalıştırılmalı."""
+
+
+def _inspector():
+    return inspect(db.session.connection())
+
+
+def _index_names():
+    # Reflection ifade indekslerini (ix_mentors_rating_id) atlar; isimler sqlite_master'dan
+    return set(db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+
+
+def _unique_names(inspector, table_name):
+    """Tablodaki unique kısıt adları ve (unique indeks olarak eklenenler için) tüm indeks adları."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', SAWarning)
+        names = {constraint['name'] for constraint in inspector.get_unique_constraints(table_name)}
+    return names | _index_names()
+
+
+def _unique_constraints(table):
+    return [
+        constraint for constraint in table.constraints
+        if isinstance(constraint, db.UniqueConstraint) and constraint.name
+    ]
+
+
+def schema_problems():
+    """
+    Modellerde olup veritabanında olmayan kolon ve unique kısıtlar.
+
+    Returns:
+        list: 'tablo.kolon' / 'tablo:kısıt' biçiminde eksikler (boşsa şema güncel)
+    """
+    inspector = _inspector()
+    tables = set(inspector.get_table_names())
+    problems = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        problems.extend(f'{table.name}.{column.name}' for column in table.columns if column.name not in existing)
+        uniques = _unique_names(inspector, table.name)
+        problems.extend(
+            f'{table.name}:{constraint.name}' for constraint in _unique_constraints(table)
+            if constraint.name not in uniques
+        )
+    return problems
+
+
+def check_schema():
+    """Şema eskiyse SchemaOutdated yükseltir (uygulama açılışı)."""
+    problems = schema_problems()
+    if problems:
+        raise SchemaOutdated(
+            'Veritabanı şeması eski (eksik: ' + ', '.join(problems) + '). '
+            'Yükseltmek için: SCHEMA_CHECK=0 flask --app main upgrade-db '
+            '(veya veritabanını silip python seed_data.py)'
+        )
+
+
+def _column_ddl(column):
+    """ALTER TABLE ... ADD COLUMN için kolon tanımı; NOT NULL kolonlar sabit varsayılan alır."""
+    dialect = db.session.get_bind().dialect
+    ddl = f'{column.name} {column.type.compile(dialect=dialect)}'
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if default is not None:
+        value = literal(default, column.type).compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+        ddl += f' DEFAULT {value}'
+    if not column.nullable and default is not None:
+        ddl += ' NOT NULL'
+    return ddl
+
+
+def add_missing_columns():
+    """
+    Eksik kolonları ALTER TABLE ... ADD COLUMN ile ekler.
+
+    Returns:
+        set: Eklenen 'tablo.kolon' adları
+    """
+    inspector = _inspector()
+    added = set()
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column)}'))
+                added.add(f'{table.name}.{column.name}')
+    return added
+
+
+def normalize_conversation_pairs():
+    """
+    Konuşmaları (küçük id, büyük id) çiftine çevirir; aynı çiftin birden çok
+    konuşması varsa mesajlar en eski konuşmaya taşınır ve diğerleri silinir.
+
+    Returns:
+        int: Birleştirilen (silinen) konuşma sayısı
+    """
+    rows = db.session.execute(
+        db.select(Conversation.id, Conversation.user1_id, Conversation.user2_id).order_by(Conversation.id)
+    ).all()
+    by_pair = defaultdict(list)
+    for conversation_id, user1_id, user2_id in rows:
+        by_pair[conversation_service.participant_pair(user1_id, user2_id)].append(conversation_id)
+
+    merged = 0
+    for keep_id, *duplicate_ids in by_pair.values():
+        if duplicate_ids:
+            db.session.execute(
+                db.update(Message).where(Message.conversation_id.in_(duplicate_ids)).values(conversation_id=keep_id)
+            )
+            db.session.execute(db.delete(Conversation).where(Conversation.id.in_(duplicate_ids)))
+            merged += len(duplicate_ids)
+
+    # SQLite SET ifadelerini eski değerlerle hesaplar: takas tek UPDATE
+    db.session.execute(text(
+        'UPDATE conversations SET user1_id = user2_id, user2_id = user1_id WHERE user1_id > user2_id'
+    ))
+    return merged
+
+
+def backfill_read_watermarks(use_is_read):
+    """
+    Watermark'ları doldurur: eski is_read bayrağı varsa katılımcıya gelen en
+    büyük okunmuş mesaj id'si, yoksa tüm mevcut mesajlar okunmuş sayılır.
+    """
+    read_filter = ' AND m.is_read = 1' if use_is_read else ''
+    for reader, sender in (('user1', 'user2'), ('user2', 'user1')):
+        db.session.execute(text(
+            f'UPDATE conversations SET {reader}_last_read_message_id = COALESCE(('
+            f'SELECT MAX(m.id) FROM messages m WHERE m.conversation_id = conversations.id '
+            f'AND m.sender_id = conversations.{sender}_id{read_filter}), 0)'
+        ))
+
+
+def _has_autoincrement(table_name):
+    sql = db.session.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table_name}
+    ).scalar()
+    return 'AUTOINCREMENT' in (sql or '').upper()
+
+
+def rebuild_messages_table():
+    """
+    messages tablosunu model tanımıyla (AUTOINCREMENT, FTS trigger'ları)
+    yeniden kurar ve satırları kopyalar. Model dışı kolonlar (is_read) düşer.
+
+    Returns:
+        bool: Tablo yeniden kuruldu mu
+    """
+    if _has_autoincrement('messages'):
+        return False
+
+    for name in db.session.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'messages' AND sql IS NOT NULL"
+    )).scalars():
+        db.session.execute(text(f'DROP INDEX {name}'))
+    for trigger in ('messages_fts_insert', 'messages_fts_delete', 'messages_fts_update'):
+        db.session.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    db.session.execute(text('DROP TABLE IF EXISTS messages_fts'))
+    db.session.execute(text('ALTER TABLE messages RENAME TO messages_legacy'))
+
+    # after_create olayları FTS tablosunu ve trigger'ları da kurar
+    Message.__table__.create(db.session.connection())
+    columns = ', '.join(column.name for column in Message.__table__.columns)
+    db.session.execute(text(f'INSERT INTO messages ({columns}) SELECT {columns} FROM messages_legacy'))
+    db.session.execute(text('DROP TABLE messages_legacy'))
+    return True
+
+
+def dedupe_post_likes():
+    """Aynı (post, kullanıcı) çiftinin tekrarlayan beğenilerini siler (en eskisi kalır)."""
+    return db.session.execute(text(
+        'DELETE FROM post_likes WHERE id NOT IN '
+        '(SELECT MIN(id) FROM post_likes GROUP BY post_id, user_id)'
+    )).rowcount
+
+
+def create_missing_indexes():
+    """Eksik indeksleri ve unique kısıtları (unique indeks olarak) oluşturur."""
+    connection = db.session.connection()
+    inspector = _inspector()
+    for table in db.metadata.sorted_tables:
+        existing = _index_names()
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+        uniques = _unique_names(inspector, table.name)
+        for constraint in _unique_constraints(table):
+            if constraint.name not in uniques:
+                columns = ', '.join(column.name for column in constraint.columns)
+                db.session.execute(text(f'CREATE UNIQUE INDEX {constraint.name} ON {table.name} ({columns})'))
+
+
+def upgrade_schema():
+    """
+    Veritabanını modellere yükseltir ve türetilmiş verileri yeniden hesaplar.
+    İdempotenttir; güncel bir veritabanında sadece backfill'ler çalışır.
+
+    Returns:
+        dict: Adım özetleri
+    """
+    db.create_all()
+    message_columns = {column['name'] for column in _inspector().get_columns('messages')}
+
+    added = add_missing_columns()
+    merged = normalize_conversation_pairs()
+    if 'conversations.user1_last_read_message_id' in added:
+        backfill_read_watermarks(use_is_read='is_read' in message_columns)
+    rebuilt = rebuild_messages_table()
+    duplicate_likes = dedupe_post_likes()
+    create_missing_indexes()
+    db.session.commit()
+
+    # Türetilmiş veriler mevcut servislerin reconcile/rebuild fonksiyonlarıyla
+    counter_service.reconcile_post_counters()
+    conversation_service.reconcile_conversations()
+    timelines = timeline_service.rebuild_all()
+    indexed = search_service.rebuild_message_search()
+
+    return {
+        'added_columns': sorted(added),
+        'merged_conversations': merged,
+        'rebuilt_messages': rebuilt,
+        'duplicate_likes': duplicate_likes,
+        'timeline_entries': timelines,
+        'indexed_messages': indexed,
+    }
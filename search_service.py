@@ -0,0 +1,127 @@
+"""
+search_service.py
+-----------------
+SQLite FTS5 ile mesaj geçmişinde tam metin arama.
+
+messages_fts tablosu messages'a bağlı bir external-content FTS5 indeksidir
+(models.MESSAGE_SEARCH_DDL); içerik kopyalanmaz, trigger'lar her mesaj
+yazımında/silinmesinde indeksi günceller. Arama:
+
+- Sadece kullanıcının katılımcısı olduğu konuşmalarda, silmediği mesajlarda yapılır
+- bm25 ile sıralanır (düşük = daha alakalı)
+- Eşleşen bölümü <mark> ile işaretlenmiş snippet olarak döndürür
+- (rank, id) üzerinden cursor ile sayfalanır
+
+Kullanıcı girdisi doğrudan MATCH sözdizimine verilmez: her kelime tırnaklı
+bir önek terimine çevrilir (örn. hackathon takim -> "hackathon"* "takim"*).
+
+Mevcut veritabanları için indeks yeniden oluşturma:
+    flask --app main rebuild-message-search
+"""
+
+from sqlalchemy import select, func, table, column, literal_column, tuple_, or_, case, text
+from models import db, Message, Conversation, User, MESSAGE_SEARCH_DDL
+from pagination import encode_cursor, decode_cursor_payload, invalid_cursor
+
+# Konfigürasyon
+SNIPPET_TOKENS = 12
+MAX_QUERY_TERMS = 10
+
+messages_fts = table('messages_fts', column('rowid'))
+
+
+def build_match_query(q):
+    """
+    Kullanıcı arama metnini güvenli bir FTS5 MATCH ifadesine çevirir.
+
+    Returns:
+        str: MATCH ifadesi; aranacak kelime yoksa None
+    """
+    terms = [term.replace('"', '""') for term in q.split()][:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def decode_search_cursor(cursor):
+    """Arama cursor'ını (rank, message_id) olarak çözer."""
+    rank, message_id = decode_cursor_payload(cursor, 2)
+    try:
+        return float(rank), int(message_id)
+    except (ValueError, TypeError):
+        invalid_cursor()
+
+
+def search_messages(user_id, q, limit=20, cursor=None):
+    """
+    Kullanıcının konuşmalarında mesaj arar.
+
+    Args:
+        user_id (int): Arayan kullanıcı
+        q (str): Arama metni
+        limit (int): Sayfa boyutu
+        cursor (str): Önceki sayfanın next_cursor değeri
+
+    Returns:
+        tuple: (rows, meta) - rows alaka sırasında arama sonuçları
+    """
+    limit = max(limit, 1)
+    match = build_match_query(q)
+    if match is None:
+        return [], {'next_cursor': None, 'has_more': False}
+
+    fts_table = literal_column('messages_fts')
+    ranked = select(
+        Message.id.label('id'),
+        Message.conversation_id.label('conversation_id'),
+        Message.sender_id.label('sender_id'),
+        Message.created_at.label('created_at'),
+        User.name.label('sender_name'),
+        User.avatar.label('sender_avatar'),
+        func.snippet(fts_table, 0, '<mark>', '</mark>', '…', SNIPPET_TOKENS).label('snippet'),
+        func.bm25(fts_table).label('rank'),
+    ).select_from(messages_fts).join(
+        Message, Message.id == messages_fts.c.rowid
+    ).join(
+        Conversation, Conversation.id == Message.conversation_id
+    ).join(
+        User, User.id == Message.sender_id
+    ).where(
+        fts_table.op('MATCH')(match),
+        or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id),
+        # Kullanıcının sildiği geçmiş aranmaz
+        Message.id > case(
+            (Conversation.user1_id == user_id, Conversation.user1_cleared_message_id),
+            else_=Conversation.user2_cleared_message_id
+        )
+    ).subquery()
+
+    query = select(ranked)
+    if cursor:
+        query = query.where(tuple_(ranked.c.rank, ranked.c.id) > tuple_(*decode_search_cursor(cursor)))
+
+    rows = db.session.execute(
+        query.order_by(ranked.c.rank, ranked.c.id).limit(limit + 1)
+    ).all()
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor([items[-1].rank, items[-1].id])
+
+    return items, {'next_cursor': next_cursor, 'has_more': next_cursor is not None}
+
+
+def rebuild_message_search():
+    """
+    FTS tablosunu ve trigger'ları (yoksa) oluşturur ve indeksi messages
+    tablosundan yeniden kurar.
+
+    Returns:
+        int: İndekslenen mesaj sayısı
+    """
+    for statement in MESSAGE_SEARCH_DDL:
+        db.session.execute(text(statement))
+    db.session.execute(text("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')"))
+    db.session.commit()
+    return db.session.query(func.count(Message.id)).scalar()
@@ -0,0 +1,323 @@
+"""
+serializers.py
+--------------
+Post, yorum, mesaj, konuşma ve mentor cevapları için ortak serileştirme katmanı.
+
+Liste endpoint'leri tam ORM nesneleri yerine kolon-projeksiyonlu sorgular
+çalıştırır (örn. post + yazar + topluluk + etkinlik tek JOIN'de) ve dönen
+satırları (Row tuple) doğrudan JSON sözlüğüne çevirir. Böylece identity map,
+attribute instrumentation ve ilişki lazy load'ları liste yolundan çıkar.
+
+Her varlık için:
+- *_COLUMNS: Sorguda seçilecek etiketli kolonlar (sıra önemlidir)
+- *_query(): JOIN'leri kurulmuş projeksiyon sorgusu
+- serialize_*(row): Satırı cevap sözlüğüne çevirir
+
+Serileştirme fonksiyonları satırı pozisyonel olarak açar; bu nedenle aynı
+sözlük biçimi oluşturma anında (create_post, send_message, ...) düz bir
+tuple ile de üretilebilir.
+
+Performans ölçümü için: python bench_serializers.py
+"""
+
+from sqlalchemy import case, or_
+from models import db, User, Post, Community, Event, Comment, Message, Mentor, Conversation
+
+# ========== AUTHOR ==========
+
+def serialize_author(user_id, name, avatar):
+    """Yazar/gönderen bloğu: {'id', 'name', 'avatar'}."""
+    return {'id': str(user_id), 'name': name, 'avatar': avatar}
+
+
+# ========== USER CARD ==========
+
+USER_CARD_COLUMNS = (
+    User.id.label('id'),
+    User.name.label('name'),
+    User.avatar.label('avatar'),
+    User.department.label('department'),
+    User.year.label('year'),
+)
+
+
+def serialize_user_card(row):
+    """USER_CARD_COLUMNS sırasındaki satırı kompakt profil kartına çevirir."""
+    user_id, name, avatar, department, year = row
+    return {
+        **serialize_author(user_id, name, avatar),
+        'department': department,
+        'year': year
+    }
+
+
+# ========== POST ==========
+
+POST_COLUMNS = (
+    Post.id.label('id'),
+    Post.type.label('type'),
+    Post.content.label('content'),
+    Post.created_at.label('created_at'),
+    Post.like_count.label('like_count'),
+    Post.comment_count.label('comment_count'),
+    Post.media_type.label('media_type'),
+    Post.media_url.label('media_url'),
+    User.id.label('author_id'),
+    User.name.label('author_name'),
+    User.avatar.label('author_avatar'),
+    Community.id.label('community_id'),
+    Community.name.label('community_name'),
+    Community.avatar.label('community_avatar'),
+    Event.id.label('event_id'),
+    Event.title.label('event_title'),
+    Event.date.label('event_date'),
+    Event.image.label('event_image'),
+)
+
+
+def post_query():
+    """Post + yazar + topluluk + etkinlik projeksiyon sorgusu (tek JOIN)."""
+    return db.session.query(*POST_COLUMNS).join(
+        User, User.id == Post.user_id
+    ).outerjoin(
+        Community, Community.id == Post.community_id
+    ).outerjoin(
+        Event, Event.id == Post.event_id
+    )
+
+
+def serialize_post(row, is_liked=False):
+    """
+    POST_COLUMNS sırasındaki satırı feed post sözlüğüne çevirir.
+
+    Args:
+        row (tuple): post_query() satırı
+        is_liked (bool): İsteği yapan kullanıcı postu beğenmiş mi
+
+    Returns:
+        dict: Post cevabı
+    """
+    (post_id, post_type, content, created_at, like_count, comment_count,
+     media_type, media_url, author_id, author_name, author_avatar,
+     community_id, community_name, community_avatar,
+     event_id, event_title, event_date, event_image) = row
+
+    data = {
+        'id': str(post_id),
+        'type': post_type,
+        'author': serialize_author(author_id, author_name, author_avatar),
+        'content': content,
+        'timestamp': created_at.isoformat(),
+        'likes': like_count,
+        'comments': comment_count,
+        'isLiked': is_liked,
+        'mediaType': media_type,
+        'mediaUrl': media_url
+    }
+
+    if community_id is not None:
+        data['community'] = {
+            'id': str(community_id),
+            'name': community_name,
+            'avatar': community_avatar
+        }
+
+    if event_id is not None:
+        data['event'] = {
+            'id': str(event_id),
+            'title': event_title,
+            'date': event_date.isoformat(),
+            'image': event_image
+        }
+
+    return data
+
+
+# ========== COMMENT ==========
+
+COMMENT_COLUMNS = (
+    Comment.id.label('id'),
+    Comment.content.label('content'),
+    Comment.created_at.label('created_at'),
+    User.id.label('author_id'),
+    User.name.label('author_name'),
+    User.avatar.label('author_avatar'),
+    Comment.parent_id.label('parent_id'),
+)
+
+
+def comment_query():
+    """Yorum + yazar projeksiyon sorgusu."""
+    return db.session.query(*COMMENT_COLUMNS).join(User, User.id == Comment.user_id)
+
+
+def serialize_comment(row):
+    """COMMENT_COLUMNS sırasındaki satırı yorum sözlüğüne çevirir."""
+    comment_id, content, created_at, author_id, author_name, author_avatar, parent_id = row
+    return {
+        'id': str(comment_id),
+        'content': content,
+        'timestamp': created_at.isoformat(),
+        'author': serialize_author(author_id, author_name, author_avatar),
+        'parentId': str(parent_id) if parent_id is not None else None
+    }
+
+
+# ========== MESSAGE ==========
+
+# Mesaj, alıcının okuma watermark'ına kadar ise okunmuştur
+MESSAGE_RECIPIENT_WATERMARK = case(
+    (Message.sender_id == Conversation.user1_id, Conversation.user2_last_read_message_id),
+    else_=Conversation.user1_last_read_message_id
+)
+
+MESSAGE_COLUMNS = (
+    Message.id.label('id'),
+    Message.content.label('content'),
+    Message.sender_id.label('sender_id'),
+    (Message.id <= MESSAGE_RECIPIENT_WATERMARK).label('is_read'),
+    Message.created_at.label('created_at'),
+    User.name.label('sender_name'),
+    User.avatar.label('sender_avatar'),
+)
+
+
+def message_query():
+    """Mesaj + gönderen projeksiyon sorgusu (isRead konuşma watermark'ından)."""
+    return db.session.query(*MESSAGE_COLUMNS).join(
+        User, User.id == Message.sender_id
+    ).join(
+        Conversation, Conversation.id == Message.conversation_id
+    )
+
+
+def serialize_message(row):
+    """MESSAGE_COLUMNS sırasındaki satırı mesaj sözlüğüne çevirir."""
+    message_id, content, sender_id, is_read, created_at, sender_name, sender_avatar = row
+    return {
+        'id': str(message_id),
+        'content': content,
+        'senderId': str(sender_id),
+        'isRead': bool(is_read),
+        'timestamp': created_at.isoformat(),
+        'sender': serialize_author(sender_id, sender_name, sender_avatar)
+    }
+
+
+def serialize_search_result(row):
+    """search_service.search_messages() satırını arama sonucu sözlüğüne çevirir."""
+    return {
+        'id': str(row.id),
+        'conversationId': str(row.conversation_id),
+        'snippet': row.snippet,
+        'senderId': str(row.sender_id),
+        'timestamp': row.created_at.isoformat(),
+        'sender': serialize_author(row.sender_id, row.sender_name, row.sender_avatar)
+    }
+
+
+# ========== CONVERSATION ==========
+
+def conversation_query(user_id):
+    """
+    Kullanıcının gelen kutusu projeksiyon sorgusu.
+
+    Diğer katılımcı tek bir JOIN ile gelir; son mesaj ve okunmamış sayı
+    konuşma satırındaki özet kolonlarından okunur. Kullanıcının sildiği
+    (gizlediği) konuşmalar listelenmez. Kolonlar isteği yapan
+    kullanıcıya göre seçildiği için sorgu user_id ile kurulur.
+    """
+    is_user1 = Conversation.user1_id == user_id
+    other_id = case((is_user1, Conversation.user2_id), else_=Conversation.user1_id)
+    unread_count = case(
+        (is_user1, Conversation.user1_unread_count), else_=Conversation.user2_unread_count
+    )
+    hidden = case((is_user1, Conversation.user1_hidden), else_=Conversation.user2_hidden)
+
+    return db.session.query(
+        Conversation.id.label('id'),
+        User.id.label('other_id'),
+        User.name.label('other_name'),
+        User.avatar.label('other_avatar'),
+        Conversation.last_message_id.label('last_message_id'),
+        Conversation.last_message_preview.label('last_message_preview'),
+        Conversation.last_message_sender_id.label('last_message_sender_id'),
+        Conversation.last_message_at.label('last_message_at'),
+        unread_count.label('unread_count'),
+        Conversation.created_at.label('created_at'),
+    ).join(
+        User, User.id == other_id
+    ).filter(
+        or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id),
+        hidden == False
+    )
+
+
+def serialize_conversation(row, online=False):
+    """
+    conversation_query() satırını gelen kutusu sözlüğüne çevirir.
+
+    online: Diğer katılımcının presence durumu (bellekteki tracker'dan)
+    """
+    (conversation_id, other_id, other_name, other_avatar, last_message_id,
+     preview, last_sender_id, last_message_at, unread_count, created_at) = row
+    return {
+        'id': str(conversation_id),
+        'otherUser': {**serialize_author(other_id, other_name, other_avatar), 'online': online},
+        'lastMessage': {
+            'id': str(last_message_id),
+            'content': preview,
+            'timestamp': last_message_at.isoformat(),
+            'senderId': str(last_sender_id)
+        } if last_message_id is not None else None,
+        'unreadCount': unread_count,
+        'lastMessageAt': (last_message_at or created_at).isoformat()
+    }
+
+
+# ========== MENTOR ==========
+
+MENTOR_COLUMNS = (
+    Mentor.id.label('id'),
+    User.name.label('name'),
+    User.avatar.label('avatar'),
+    Mentor.title.label('title'),
+    Mentor.company.label('company'),
+    Mentor.availability.label('availability'),
+    Mentor.rating.label('rating'),
+    Mentor.sessions_completed.label('sessions_completed'),
+    Mentor.bio.label('bio'),
+    Mentor.response_time.label('response_time'),
+)
+
+
+def mentor_query():
+    """Mentor + kullanıcı projeksiyon sorgusu."""
+    return db.session.query(*MENTOR_COLUMNS).join(User, User.id == Mentor.user_id)
+
+
+def serialize_mentor(row, expertise, is_following):
+    """
+    MENTOR_COLUMNS sırasındaki satırı mentor sözlüğüne çevirir.
+
+    Args:
+        row (tuple): mentor_query() satırı
+        expertise (list): Uzmanlık alanları
+        is_following (bool): İsteği yapan kullanıcı mentoru takip ediyor mu
+    """
+    (mentor_id, name, avatar, title, company, availability, rating,
+     sessions_completed, bio, response_time) = row
+    return {
+        'id': str(mentor_id),
+        'name': name,
+        'avatar': avatar,
+        'title': title,
+        'company': company,
+        'expertise': expertise,
+        'availability': availability,
+        'rating': rating,
+        'sessionsCompleted': sessions_completed,
+        'bio': bio,
+        'responseTime': response_time,
+        'isFollowing': is_following
+    }
@@ -0,0 +1,192 @@
+"""
+session_service.py
+------------------
+Oturumlar: kısa ömürlü access token'lar için döndürülen (rotating) refresh
+token'lar.
+
+Access token (JWT) ACCESS_TOKEN_TTL (15 dk) geçerlidir ve oturum kimliğini
+(sid) taşır; doğrulaması veritabanına gitmez. Oturumu sürdürmek için istemci
+refresh token'ı kullanır:
+
+- Refresh token rastgele bir değerdir; tabloda sadece SHA-256 özeti saklanır
+- Her kullanımda döndürülür: eski token iptal edilir (replaced_by_id) ve aynı
+  oturumda yenisi verilir
+- Döndürülmüş bir token tekrar kullanılırsa (çalınmış olabilir) oturumun
+  tamamı iptal edilir
+- Oturum iptali (logout): oturumun aktif token'ı yerine yenisi konmadan
+  iptal edilir. "İptal edilmiş oturum" = revoked_at dolu ve replaced_by_id
+  boş bir token'ı olan oturum
+
+İptal edilen oturumların access token'ları süreleri dolana kadar
+revocation.py'deki Bloom filtresiyle reddedilir.
+
+Süresi dolmuş token'ların temizliği:
+    flask --app main purge-refresh-tokens
+"""
+
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update, delete, exists
+from models import db, RefreshToken
+
+# Konfigürasyon
+DEFAULT_ACCESS_TOKEN_TTL = 15 * 60  # saniye
+DEFAULT_REFRESH_TOKEN_TTL = 30 * 24 * 3600  # saniye
+
+
+class InvalidRefreshToken(Exception):
+    """
+    Refresh token bulunamadı, süresi doldu veya iptal edildi.
+
+    revoked_token: Tekrar kullanım nedeniyle oturumu iptal edilen token
+    satırı (yoksa None); çağıran süreç içi iptal listesini günceller.
+    """
+
+    def __init__(self, message, revoked_token=None):
+        super().__init__(message)
+        self.revoked_token = revoked_token
+
+
+def hash_token(raw_token):
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+def access_token_ttl():
+    return current_app.config.get('ACCESS_TOKEN_TTL', DEFAULT_ACCESS_TOKEN_TTL)
+
+
+def create_refresh_token(user_id, session_id=None):
+    """
+    Yeni refresh token oluşturur (flush edilir, commit çağırana aittir).
+
+    Args:
+        user_id (int): Kullanıcı
+        session_id (str): Döndürmede mevcut oturum; verilmezse yeni oturum
+
+    Returns:
+        tuple: (ham token, RefreshToken satırı)
+    """
+    raw_token = secrets.token_urlsafe(32)
+    ttl = current_app.config.get('REFRESH_TOKEN_TTL', DEFAULT_REFRESH_TOKEN_TTL)
+    token = RefreshToken(
+        user_id=user_id,
+        token_hash=hash_token(raw_token),
+        session_id=session_id or secrets.token_hex(16),
+        expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+    )
+    db.session.add(token)
+    db.session.flush()
+    return raw_token, token
+
+
+def find_refresh_token(raw_token):
+    return db.session.execute(
+        select(RefreshToken).where(RefreshToken.token_hash == hash_token(raw_token))
+    ).scalar()
+
+
+def rotate_refresh_token(raw_token):
+    """
+    Refresh token'ı tek kullanımlık olarak tüketir ve yerine yenisini verir.
+
+    Eski token'ın iptali koşullu bir UPDATE'tir; aynı token'la eşzamanlı iki
+    istekten sadece biri başarılı olur.
+
+    Returns:
+        tuple: (yeni ham token, yeni RefreshToken satırı)
+
+    Raises:
+        InvalidRefreshToken: Token geçersiz; tekrar kullanımda oturum iptal edilir
+    """
+    token = find_refresh_token(raw_token)
+    if token is None:
+        raise InvalidRefreshToken('Geçersiz refresh token')
+
+    if token.revoked_at is not None:
+        if token.replaced_by_id is not None:
+            # Döndürülmüş token tekrar kullanıldı: oturumu tamamen kapat
+            revoke_session(token.session_id)
+            db.session.commit()
+            raise InvalidRefreshToken('Refresh token iptal edilmiş', revoked_token=token)
+        raise InvalidRefreshToken('Refresh token iptal edilmiş')
+
+    if token.expires_at <= datetime.utcnow():
+        raise InvalidRefreshToken('Refresh token süresi doldu')
+
+    new_raw_token, new_token = create_refresh_token(token.user_id, token.session_id)
+    claimed = db.session.execute(
+        update(RefreshToken).where(
+            RefreshToken.id == token.id,
+            RefreshToken.revoked_at.is_(None)
+        ).values(revoked_at=datetime.utcnow(), replaced_by_id=new_token.id)
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        raise InvalidRefreshToken('Refresh token zaten kullanıldı')
+
+    return new_raw_token, new_token
+
+
+def revoke_session(session_id):
+    """Oturumun aktif refresh token'ını iptal eder; yeni access token alınamaz."""
+    db.session.execute(
+        update(RefreshToken).where(
+            RefreshToken.session_id == session_id,
+            RefreshToken.revoked_at.is_(None)
+        ).values(revoked_at=datetime.utcnow())
+    )
+
+
+def revoke_user_sessions(user_id):
+    """
+    Kullanıcının tüm açık oturumlarını iptal eder.
+
+    Returns:
+        list: İptal edilen oturum kimlikleri
+    """
+    session_ids = db.session.execute(
+        select(RefreshToken.session_id).where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None)
+        ).distinct()
+    ).scalars().all()
+    for session_id in session_ids:
+        revoke_session(session_id)
+    return session_ids
+
+
+def session_revoked_criteria():
+    return [RefreshToken.revoked_at.isnot(None), RefreshToken.replaced_by_id.is_(None)]
+
+
+def is_session_revoked(session_id):
+    """Oturum iptal edilmiş mi (tek indeksli EXISTS sorgusu)?"""
+    return db.session.execute(
+        select(exists().where(RefreshToken.session_id == session_id, *session_revoked_criteria()))
+    ).scalar()
+
+
+def recently_revoked_sessions(since):
+    """since'ten sonra iptal edilen oturum kimlikleri (revocation filtresi için)."""
+    return db.session.execute(
+        select(RefreshToken.session_id).where(
+            RefreshToken.revoked_at >= since, *session_revoked_criteria()
+        ).distinct()
+    ).scalars().all()
+
+
+def purge_expired_refresh_tokens():
+    """
+    Süresi dolmuş refresh token'ları siler. Zincirdeki eski token'lar yenilerinden
+    önce dolduğu için replaced_by_id boşta kalmaz.
+
+    Returns:
+        int: Silinen token sayısı
+    """
+    deleted = db.session.execute(
+        delete(RefreshToken).where(RefreshToken.expires_at < datetime.utcnow())
+    ).rowcount
+    db.session.commit()
+    return deleted
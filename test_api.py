@@ -102,6 +102,14 @@ def test_posts(user_id):
     else:
         print_test("Get feed", "FAIL", response.json())
 
+    # Test 2b: Get feed with cursor
+    print(f"{Colors.YELLOW}Test 2b: Get feed (cursor){Colors.END}")
+    response = requests.get(f'{BASE_URL}/api/feed?user_id={user_id}&cursor=&limit=5')
+    if response.status_code == 200 and 'next_cursor' in response.json():
+        print_test("Get feed (cursor)", "PASS", response.json())
+    else:
+        print_test("Get feed (cursor)", "FAIL", response.json())
+
     # Test 3: Like post
     print(f"{Colors.YELLOW}Test 3: Like post{Colors.END}")
     response = requests.post(
@@ -169,6 +177,46 @@ def test_comments(user_id, post_id):
     return comment_id
 
 
+def test_batch(user_id):
+    print(f"\n{Colors.BLUE}=== BATCH TESTS ==={Colors.END}\n")
+
+    # Test 1: Batch create posts
+    print(f"{Colors.YELLOW}Test 1: Batch create posts{Colors.END}")
+    response = requests.post(f'{BASE_URL}/api/posts/batch', json={
+        'posts': [
+            {'user_id': user_id, 'content': 'Batch post 1', 'type': 'text'},
+            {'user_id': user_id, 'content': 'Batch post 2', 'type': 'text'}
+        ]
+    })
+    if response.status_code == 200 and response.json()['succeeded'] == 2:
+        data = response.json()
+        post_ids = [result['id'] for result in data['results']]
+        print_test("Batch create posts", "PASS", data)
+    else:
+        print_test("Batch create posts", "FAIL", response.json())
+        return
+
+    # Test 2: Batch like
+    print(f"{Colors.YELLOW}Test 2: Batch like{Colors.END}")
+    response = requests.post(f'{BASE_URL}/api/likes/batch', json={
+        'likes': [{'post_id': post_id, 'user_id': user_id} for post_id in post_ids]
+    })
+    if response.status_code == 200 and response.json()['failed'] == 0:
+        print_test("Batch like", "PASS", response.json())
+    else:
+        print_test("Batch like", "FAIL", response.json())
+
+    # Test 3: Batch comments
+    print(f"{Colors.YELLOW}Test 3: Batch comments{Colors.END}")
+    response = requests.post(f'{BASE_URL}/api/comments/batch', json={
+        'comments': [{'post_id': post_id, 'user_id': user_id, 'content': 'Batch yorum'} for post_id in post_ids]
+    })
+    if response.status_code == 200 and response.json()['failed'] == 0:
+        print_test("Batch comments", "PASS", response.json())
+    else:
+        print_test("Batch comments", "FAIL", response.json())
+
+
 def test_communities(user_id):
     print(f"\n{Colors.BLUE}=== COMMUNITY TESTS ==={Colors.END}\n")
 
@@ -363,6 +411,7 @@ def main():
         if post_id:
             test_comments(user_id, post_id)
 
+        test_batch(user_id)
         test_communities(user_id)
         test_events(user_id)
         test_mentors(user_id)
@@ -0,0 +1,277 @@
+# test_stream.py
+# /api/stream SSE akışının mesaj, okundu bilgisi, heartbeat, Last-Event-ID
+# resume ve presence/typing davranışını doğrular. Geçici bir veritabanını
+# seed_data.py ile doldurup onun üzerinde çalışır:
+#   python test_stream.py   (veya: pytest test_stream.py)
+import atexit
+import json
+import os
+import shutil
+import tempfile
+
+# Testler geçici bir SQLite dosyasında çalışır (instance/campus.db'ye dokunulmaz);
+# main import edilmeden önce ayarlanmalı
+TEST_DIR = tempfile.mkdtemp(prefix='campus-test-')
+atexit.register(shutil.rmtree, TEST_DIR, ignore_errors=True)
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(TEST_DIR, 'campus.db'))
+
+from main import app
+from presence import ExpiringStore, PresenceTracker, init_presence, get_presence
+from event_hub import EventHub, CLOSED, StreamLimitReached, get_event_hub
+from seed_data import seed
+
+SENDER_ID = 1
+RECIPIENT_ID = 2
+EMAILS = {SENDER_ID: 'sezer@test.com', RECIPIENT_ID: 'ahmet@test.com'}
+
+# Testler aynı kullanıcıyla art arda akış açar; stream bucket'ı buna göre ayarlı değil
+app.config['RATE_LIMIT_ENABLED'] = False
+
+
+def setup_module():
+    seed()
+
+
+def auth_header(client, user_id):
+    token = client.post('/api/auth/login', json={
+        'email': EMAILS[user_id], 'password': 'test123'
+    }).get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def open_stream(client, user_id, last_event_id=None):
+    headers = auth_header(client, user_id)
+    if last_event_id:
+        headers['Last-Event-ID'] = str(last_event_id)
+    response = client.get('/api/stream', headers=headers, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    return response, iter(response.response)
+
+
+def read_event(chunks, event_type=None):
+    """Heartbeat ve retry bloklarını (ve istenmeyen türleri) atlayarak sıradaki olayı döndürür."""
+    for chunk in chunks:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith(('retry:', ':')):
+            continue
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        if event_type and fields['event'] != event_type:
+            continue
+        return int(fields['id']), fields['event'], json.loads(fields['data'])
+
+
+def get_conversation(client):
+    return client.post('/api/conversations', json={
+        'user1_id': SENDER_ID, 'user2_id': RECIPIENT_ID
+    }).get_json()['conversation']['id']
+
+
+def test_stream_delivers_messages_and_receipts():
+    app.config['STREAM_HEARTBEAT_INTERVAL'] = 0.1
+    client = app.test_client()
+    conversation_id = get_conversation(client)
+
+    response, chunks = open_stream(client, RECIPIENT_ID)
+    client.post(f'/api/conversations/{conversation_id}/messages', json={
+        'sender_id': SENDER_ID, 'content': 'Stream testi'
+    })
+    event_id, event_type, data = read_event(chunks)
+    response.close()
+
+    assert event_type == 'message'
+    assert data['conversationId'] == conversation_id
+    assert data['message']['content'] == 'Stream testi'
+
+    response, chunks = open_stream(client, SENDER_ID)
+    client.get(f'/api/conversations/{conversation_id}/messages?user_id={RECIPIENT_ID}')
+    _, event_type, data = read_event(chunks)
+    response.close()
+
+    assert event_type == 'read'
+    assert data['readerId'] == str(RECIPIENT_ID)
+    assert data['lastReadMessageId']
+
+
+def test_stream_resumes_from_last_event_id():
+    app.config['STREAM_HEARTBEAT_INTERVAL'] = 0.1
+    client = app.test_client()
+    conversation_id = get_conversation(client)
+
+    response, chunks = open_stream(client, RECIPIENT_ID)
+    client.post(f'/api/conversations/{conversation_id}/messages', json={
+        'sender_id': SENDER_ID, 'content': 'Resume 1'
+    })
+    last_event_id, _, _ = read_event(chunks, 'message')
+    response.close()
+
+    # Bağlantı kapalıyken gönderilen mesajlar yeniden bağlanınca gelir
+    for content in ('Resume 2', 'Resume 3'):
+        client.post(f'/api/conversations/{conversation_id}/messages', json={
+            'sender_id': SENDER_ID, 'content': content
+        })
+
+    response, chunks = open_stream(client, RECIPIENT_ID, last_event_id)
+    missed = [read_event(chunks, 'message'), read_event(chunks, 'message')]
+    response.close()
+
+    assert [data['message']['content'] for _, _, data in missed] == ['Resume 2', 'Resume 3']
+    assert all(event_id > last_event_id for event_id, _, _ in missed)
+
+
+def test_stream_pushes_unread_badge():
+    app.config['STREAM_HEARTBEAT_INTERVAL'] = 0.1
+    client = app.test_client()
+    conversation_id = get_conversation(client)
+    before = client.get(f'/api/messages/unread-count?user_id={RECIPIENT_ID}').get_json()['unreadCount']
+
+    response, chunks = open_stream(client, RECIPIENT_ID)
+    client.post(f'/api/conversations/{conversation_id}/messages', json={
+        'sender_id': SENDER_ID, 'content': 'Rozet testi'
+    })
+    _, _, data = read_event(chunks, 'unread')
+    response.close()
+
+    assert data['unreadCount'] == before + 1
+
+
+def test_presence_and_typing_events():
+    app.config['STREAM_HEARTBEAT_INTERVAL'] = 0.1
+    client = app.test_client()
+    conversation_id = get_conversation(client)
+
+    response, chunks = open_stream(client, RECIPIENT_ID)
+    client.post('/api/presence/heartbeat', json={'user_id': SENDER_ID})
+    _, _, presence = read_event(chunks, 'presence')
+    client.post(f'/api/conversations/{conversation_id}/typing', json={'user_id': SENDER_ID})
+    _, _, typing = read_event(chunks, 'typing')
+    client.post(f'/api/conversations/{conversation_id}/typing', json={
+        'user_id': SENDER_ID, 'typing': False
+    })
+    _, _, stopped = read_event(chunks, 'typing')
+    response.close()
+
+    assert presence == {'userId': str(SENDER_ID), 'online': True}
+    assert typing['typing'] and typing['conversationId'] == conversation_id
+    assert not stopped['typing']
+
+    inbox = client.get(f'/api/conversations?user_id={RECIPIENT_ID}&cursor=&limit=100').get_json()['conversations']
+    assert {conv['id']: conv for conv in inbox}[conversation_id]['otherUser']['online']
+
+    # Aralık dışı kimlik 500 değil 400; typing sadece gerçek bool kabul eder
+    assert client.post('/api/presence/heartbeat', json={'user_id': 2 ** 63}).status_code == 400
+    for value in ('false', 0, None):
+        assert client.post(f'/api/conversations/{conversation_id}/typing', json={
+            'user_id': SENDER_ID, 'typing': value
+        }).status_code == 400, value
+
+
+def test_presence_expiry_is_pushed_without_requests():
+    app.config['STREAM_HEARTBEAT_INTERVAL'] = 0.1
+    app.config['PRESENCE_SWEEP_INTERVAL'] = 0.05
+    original = app.extensions['presence']
+    now = [1000.0]
+    init_presence(app, PresenceTracker(presence_ttl=5, clock=lambda: now[0]))
+    client = app.test_client()
+    get_conversation(client)
+
+    try:
+        response, chunks = open_stream(client, RECIPIENT_ID)
+        # "1" ve 1 aynı presence kaydıdır; geçersiz kimlik 400
+        client.post('/api/presence/heartbeat', json={'user_id': str(SENDER_ID)})
+        _, _, online = read_event(chunks, 'presence')
+        assert client.post('/api/presence/heartbeat', json={'user_id': SENDER_ID}).status_code == 200
+        with app.app_context():
+            assert len(get_presence().online) == 1
+        assert client.post('/api/presence/heartbeat', json={'user_id': 'abc'}).status_code == 400
+        assert client.post('/api/presence/heartbeat', json={}).status_code == 400
+
+        # Başka istek olmadan arka plan süpürücüsü çevrimdışı olayını yayınlar
+        now[0] += 10
+        _, _, offline = read_event(chunks, 'presence')
+        response.close()
+    finally:
+        app.extensions['presence'] = original
+        app.config['PRESENCE_SWEEP_INTERVAL'] = 1
+
+    assert online == {'userId': str(SENDER_ID), 'online': True}
+    assert offline == {'userId': str(SENDER_ID), 'online': False}
+
+
+def test_stream_requires_token_owner():
+    client = app.test_client()
+    assert client.get(f'/api/stream?user_id={RECIPIENT_ID}').status_code == 401
+    headers = auth_header(client, SENDER_ID)
+    assert client.get(f'/api/stream?user_id={RECIPIENT_ID}', headers=headers).status_code == 403
+
+
+def test_hub_close_and_bounded_history():
+    hub = EventHub(backlog=2, history_users=2)
+    subscription = hub.subscribe(1)
+    # Kapanış heartbeat zaman aşımından (None) ayırt edilir
+    assert subscription.get(timeout=0.01) is None
+    hub.close()
+    assert subscription.get(timeout=0.01) is CLOSED
+
+    for user_id in (1, 2, 3):
+        for _ in range(3):
+            hub.publish([user_id], 'message', {})
+    assert list(hub._history) == [2, 3]
+    assert all(len(history) == 2 for history in hub._history.values())
+
+
+def test_stream_connections_are_capped():
+    hub = EventHub(max_connections=1)
+    first = hub.subscribe(1)
+    try:
+        hub.subscribe(2)
+        assert False, 'sınırdaki bağlantı kabul edildi'
+    except StreamLimitReached:
+        pass
+    hub.unsubscribe(first)
+    hub.unsubscribe(first)  # ikinci çağrı sayacı düşürmez
+    assert hub.connection_count() == 0
+    hub.unsubscribe(hub.subscribe(2))
+
+    client = app.test_client()
+    headers = auth_header(client, SENDER_ID)
+    with app.app_context():
+        live = get_event_hub()
+    limit = live.max_connections
+    live.max_connections = live.connection_count()
+    try:
+        response = client.get('/api/stream', headers=headers)
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+    finally:
+        live.max_connections = limit
+
+
+def test_expiring_store_drops_stale_keys():
+    now = [1000.0]
+    store = ExpiringStore(ttl=5, clock=lambda: now[0])
+    assert store.touch('a') and store.touch('b')
+    assert not store.touch('a')
+
+    now[0] += 3
+    store.touch('a')
+    now[0] += 3
+    assert 'a' in store and 'b' not in store
+    assert store.sweep() == [('b', None)]
+
+    now[0] += 100
+    assert store.sweep() == [('a', None)] and len(store) == 0
+
+
+if __name__ == '__main__':
+    setup_module()
+    test_stream_delivers_messages_and_receipts()
+    test_stream_resumes_from_last_event_id()
+    test_stream_pushes_unread_badge()
+    test_presence_and_typing_events()
+    test_presence_expiry_is_pushed_without_requests()
+    test_stream_requires_token_owner()
+    test_hub_close_and_bounded_history()
+    test_stream_connections_are_capped()
+    test_expiring_store_drops_stale_keys()
+    print("[OK] Stream testleri gecti")
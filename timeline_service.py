@@ -0,0 +1,235 @@
+"""
+timeline_service.py
+-------------------
+Kullanıcı başına materialize edilmiş ana sayfa akışı (fan-out-on-write).
+
+Bir post oluşturulduğunda, postun topluluğundaki tüm üye ve takipçilerin
+timeline'ına tek bir INSERT ... SELECT ile yazılır. Böylece /api/feed her
+istekte posts tablosunu taramak yerine kullanıcının önceden sıralanmış
+timeline'ından bir dilim okur.
+
+Her kullanıcının timeline'ı TIMELINE_MAX_DEPTH kayıtla sınırlıdır; fazlası
+yazma sırasında kırpılır.
+"""
+
+from flask import current_app
+from sqlalchemy import select, union, insert, delete, func, literal
+from models import db, Post, TimelineEntry, community_members, community_followers
+
+# Konfigürasyon
+DEFAULT_MAX_DEPTH = 500
+
+
+def get_max_depth():
+    """Kullanıcı başına tutulacak maksimum timeline kaydı sayısı."""
+    return current_app.config.get('TIMELINE_MAX_DEPTH', DEFAULT_MAX_DEPTH)
+
+
+def community_audience(community_id):
+    """
+    Topluluğun üye ve takipçilerinin user_id'lerini döndüren SELECT.
+
+    Args:
+        community_id (int): Topluluk ID'si
+
+    Returns:
+        Select: Tekilleştirilmiş user_id listesi (UNION)
+    """
+    return union(
+        select(community_members.c.user_id).where(community_members.c.community_id == community_id),
+        select(community_followers.c.user_id).where(community_followers.c.community_id == community_id)
+    ).subquery()
+
+
+def trim_timelines(user_ids):
+    """
+    Verilen kullanıcıların timeline'larını maksimum derinliğe kırpar.
+
+    Tek bir DELETE ile, her kullanıcı için en yeni TIMELINE_MAX_DEPTH kayıt
+    dışındakileri siler (ROW_NUMBER() OVER (PARTITION BY user_id ...)).
+
+    Args:
+        user_ids: user_id listesi veya user_id döndüren bir SELECT
+    """
+    ranked = select(
+        TimelineEntry.id,
+        func.row_number().over(
+            partition_by=TimelineEntry.user_id,
+            order_by=(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc())
+        ).label('rn')
+    ).where(TimelineEntry.user_id.in_(user_ids)).subquery()
+
+    db.session.execute(
+        delete(TimelineEntry).where(
+            TimelineEntry.id.in_(select(ranked.c.id).where(ranked.c.rn > get_max_depth()))
+        )
+    )
+
+
+def fan_out_post(post):
+    """
+    Yeni postu topluluğun tüm üye ve takipçilerinin timeline'ına ekler.
+
+    Post flush edilmiş olmalıdır (id ve created_at dolu). Commit çağıran
+    tarafa bırakılır, böylece post ve timeline kayıtları tek transaction'da
+    yazılır.
+
+    Args:
+        post (Post): Flush edilmiş post
+
+    Returns:
+        list: Timeline'ına yazılan kullanıcıların ID'leri
+    """
+    if not post.community_id:
+        return []
+
+    audience = community_audience(post.community_id)
+    user_ids = db.session.execute(select(audience.c.user_id)).scalars().all()
+    if not user_ids:
+        return []
+
+    db.session.execute(
+        insert(TimelineEntry).from_select(
+            ['user_id', 'post_id', 'created_at'],
+            select(audience.c.user_id, literal(post.id), literal(post.created_at))
+        ).prefix_with('OR IGNORE')
+    )
+    trim_timelines(user_ids)
+
+    return user_ids
+
+
+def fan_out_posts(posts):
+    """
+    Toplu oluşturulan postları timeline'lara yazar.
+
+    Her topluluğun izleyici kitlesi bir kez hesaplanır, tüm timeline kayıtları
+    tek bir executemany INSERT ile eklenir ve etkilenen timeline'lar bir kez
+    kırpılır.
+
+    Args:
+        posts (list): id, community_id ve created_at alanları olan nesneler
+
+    Returns:
+        set: Timeline'ına yazılan kullanıcıların ID'leri
+    """
+    audiences = {}
+    entries = []
+    for post in posts:
+        if not post.community_id:
+            continue
+        if post.community_id not in audiences:
+            audience = community_audience(post.community_id)
+            audiences[post.community_id] = db.session.execute(
+                select(audience.c.user_id)
+            ).scalars().all()
+        entries.extend(
+            {'user_id': user_id, 'post_id': post.id, 'created_at': post.created_at}
+            for user_id in audiences[post.community_id]
+        )
+
+    if not entries:
+        return set()
+
+    db.session.execute(insert(TimelineEntry.__table__).prefix_with('OR IGNORE'), entries)
+    user_ids = set(entry['user_id'] for entry in entries)
+    trim_timelines(list(user_ids))
+
+    return user_ids
+
+
+def backfill_user(user_id, community_id):
+    """
+    Kullanıcı bir topluluğu takip etmeye başladığında, topluluğun son
+    postlarını kullanıcının timeline'ına ekler.
+
+    Args:
+        user_id (int): Takip eden kullanıcı
+        community_id (int): Takip edilen topluluk
+    """
+    recent_posts = select(
+        literal(user_id), Post.id, Post.created_at
+    ).where(
+        Post.community_id == community_id,
+        Post.deleted_at.is_(None)
+    ).order_by(Post.created_at.desc(), Post.id.desc()).limit(get_max_depth())
+
+    db.session.execute(
+        insert(TimelineEntry).from_select(
+            ['user_id', 'post_id', 'created_at'], recent_posts
+        ).prefix_with('OR IGNORE')
+    )
+    trim_timelines([user_id])
+
+
+def remove_community(user_id, community_id):
+    """
+    Kullanıcı topluluğu takipten çıktığında, topluluğun postlarını
+    kullanıcının timeline'ından kaldırır. Kullanıcı hâlâ topluluğun üyesi
+    ise timeline'a dokunulmaz.
+
+    Args:
+        user_id (int): Takibi bırakan kullanıcı
+        community_id (int): Takibi bırakılan topluluk
+    """
+    is_member = db.session.execute(
+        select(community_members.c.user_id).where(
+            community_members.c.user_id == user_id,
+            community_members.c.community_id == community_id
+        ).limit(1)
+    ).first() is not None
+
+    if is_member:
+        return
+
+    db.session.execute(
+        delete(TimelineEntry).where(
+            TimelineEntry.user_id == user_id,
+            TimelineEntry.post_id.in_(select(Post.id).where(Post.community_id == community_id))
+        )
+    )
+
+
+def post_audience(post_id):
+    """
+    Postu timeline'ında tutan kullanıcıların ID'lerini döndürür.
+
+    Args:
+        post_id (int): Post ID'si
+
+    Returns:
+        list: user_id listesi
+    """
+    return db.session.execute(
+        select(TimelineEntry.user_id).where(TimelineEntry.post_id == post_id)
+    ).scalars().all()
+
+
+def rebuild_all():
+    """
+    Tüm timeline'ları mevcut üyelik/takip verisinden yeniden oluşturur.
+
+    Fan-out öncesinde oluşturulmuş veriler (örn. seed_data.py) için kullanılır.
+
+    Returns:
+        int: Yazılan timeline kaydı sayısı
+    """
+    db.session.execute(delete(TimelineEntry))
+
+    memberships = union(
+        select(community_members.c.user_id, community_members.c.community_id),
+        select(community_followers.c.user_id, community_followers.c.community_id)
+    ).subquery()
+
+    db.session.execute(
+        insert(TimelineEntry).from_select(
+            ['user_id', 'post_id', 'created_at'],
+            select(memberships.c.user_id, Post.id, Post.created_at).join(
+                Post, Post.community_id == memberships.c.community_id
+            ).where(Post.deleted_at.is_(None))
+        ).prefix_with('OR IGNORE')
+    )
+    trim_timelines(select(TimelineEntry.user_id).distinct())
+    db.session.commit()
+
+    return db.session.query(func.count(TimelineEntry.id)).scalar()
@@ -0,0 +1,149 @@
+"""
+token_cache.py
+--------------
+token_required için doğrulanmış token cache'i.
+
+Her yetkili istek JWT'yi çözüp imzasını doğruluyor ve kullanıcıyı SQLite'tan
+okuyordu. Cache, token'ın SHA-256 özetini anahtar olarak kullanır ve
+kullanıcının hafif bir anlık görüntüsünü (UserSnapshot) tutar; isabette ne
+JWT çözülür ne de veritabanına gidilir. Canlı ORM nesnesi tutulmaz: snapshot
+istekler ve thread'ler arasında güvenle paylaşılır.
+
+- Kayıt, token'ın exp zamanından ve TOKEN_CACHE_TTL'den hangisi önce
+  gelirse o zaman düşer; süresi dolmuş token cache'ten asla kabul edilmez.
+- Geçersizleştirme kullanıcı başına versiyon sayacıyla yapılır: profil
+  değiştiğinde sayaç artar ve eski versiyonla kaydedilmiş snapshot'lar
+  bir sonraki kullanımda ıskalanır. Versiyon kullanıcı sorgusundan ÖNCE
+  okunur (version()) ve set()'e verilir; sorgu sırasında profil değişirse
+  snapshot eski versiyonla yazılır ve düşer. Backend paylaşımlıysa (örn. Redis
+  sarmalayıcısı) sayaç tüm worker'larda görünür.
+- İsabet/ıskalama sayıları stats() ile okunur.
+- Cache oturum iptalini atlamaz: token_required isabette de snapshot'taki
+  session_id'yi revocation filtresine sorar.
+
+Backend feed_cache ile aynı arayüzdür (get/set/get_counter/incr);
+varsayılan süreç içi LRU + TTL MemoryBackend'dir.
+"""
+
+import hashlib
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from feed_cache import MemoryBackend
+
+# Konfigürasyon
+DEFAULT_TTL = 300  # saniye
+DEFAULT_MAX_ENTRIES = 10000
+
+# session_id: token'ın oturumu (iptal kontrolü ve logout için)
+UserSnapshot = namedtuple('UserSnapshot', ['id', 'name', 'email', 'avatar', 'created_at', 'session_id'])
+
+
+def snapshot_user(user, session_id=None):
+    """ORM kullanıcısından cache'lenebilir snapshot üretir."""
+    return UserSnapshot(user.id, user.name, user.email, user.avatar, user.created_at, session_id)
+
+
+class TokenCache:
+    """Token özeti -> kullanıcı snapshot'ı cache'i."""
+
+    def __init__(self, backend, ttl=DEFAULT_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _key(self, token):
+        return 'token:' + hashlib.sha256(token.encode()).hexdigest()
+
+    def _version(self, user_id):
+        return self.backend.get_counter(f'user:ver:{user_id}')
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, token):
+        """Token daha önce doğrulanmışsa snapshot'ı döndürür, yoksa None."""
+        entry = self.backend.get(self._key(token))
+        if entry is not None:
+            snapshot, expires_at, version = entry
+            if expires_at > time.time() and version == self._version(snapshot.id):
+                self._count(True)
+                return snapshot
+        self._count(False)
+        return None
+
+    def version(self, user_id):
+        """Kullanıcının geçerli versiyonu; set() için kullanıcı sorgusundan önce okunur."""
+        return self._version(user_id)
+
+    def user_id(self, token):
+        """
+        Token daha önce doğrulanmış ve süresi dolmamışsa kullanıcı kimliği,
+        yoksa None. Sadece kimlik gerektiğinden (hız sınırı) versiyon
+        kontrol edilmez ve isabet istatistiklerine sayılmaz.
+        """
+        entry = self.backend.get(self._key(token))
+        if entry is not None and entry[1] > time.time():
+            return entry[0].id
+        return None
+
+    def set(self, token, user, expires_at=None, session_id=None, version=None):
+        """
+        Doğrulanmış token'ı cache'e yazar.
+
+        Args:
+            token (str): Ham JWT
+            user (User): Doğrulanmış kullanıcı
+            expires_at (float): Token'ın exp değeri (unix zamanı); yoksa sadece TTL
+            session_id (str): Token'ın oturum kimliği (sid)
+            version (int): Kullanıcı sorgusundan önce okunan versiyon; yoksa şimdiki
+
+        Returns:
+            UserSnapshot: Kullanıcının snapshot'ı
+        """
+        snapshot = snapshot_user(user, session_id)
+        if expires_at is None:
+            expires_at = float('inf')
+        if version is None:
+            version = self._version(user.id)
+        ttl = min(self.ttl, expires_at - time.time())
+        if ttl > 0:
+            self.backend.set(self._key(token), (snapshot, expires_at, version), ttl)
+        return snapshot
+
+    def invalidate_user(self, user_id):
+        """Kullanıcının tüm cache'li token'larını geçersiz kılar."""
+        self.backend.incr(f'user:ver:{user_id}')
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+def init_token_cache(app, backend=None):
+    """
+    Token cache'ini uygulamaya bağlar.
+
+    Args:
+        app (Flask): Uygulama
+        backend: Opsiyonel cache backend'i; verilmezse MemoryBackend
+    """
+    if backend is None:
+        backend = MemoryBackend(app.config.get('TOKEN_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+    app.extensions['token_cache'] = TokenCache(backend, app.config.get('TOKEN_CACHE_TTL', DEFAULT_TTL))
+
+
+def get_token_cache():
+    return current_app.extensions['token_cache']
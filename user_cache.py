@@ -0,0 +1,93 @@
+"""
+user_cache.py
+-------------
+Toplu kullanıcı sorgusu (/api/users) için süreç içi profil kartı cache'i.
+
+İstemciler feed, yorum ve mesaj listelerindeki yazarları kart olarak
+çözmek için aynı "sıcak" kullanıcıları tekrar tekrar ister. Cache,
+serileştirilmiş kartı kullanıcı kimliğiyle tutar; isteğin sadece ıskalanan
+kullanıcıları tek bir IN sorgusuyla okunur.
+
+- Kayıt USER_CACHE_TTL saniye yaşar; LRU sınırı USER_CACHE_MAX_ENTRIES
+- Geçersizleştirme kullanıcı başına versiyon sayacıyla yapılır (token_cache
+  ile aynı yöntem): profil değiştiğinde sayaç artar ve eski kart bir sonraki
+  okumada ıskalanır. Backend paylaşımlıysa sayaç tüm worker'larda görünür.
+
+Backend feed_cache ile aynı arayüzdür (get/set/get_counter/incr);
+varsayılan süreç içi LRU + TTL MemoryBackend'dir.
+"""
+
+from flask import current_app
+from feed_cache import MemoryBackend
+
+# Konfigürasyon
+DEFAULT_TTL = 60  # saniye
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class UserCardCache:
+    """Kullanıcı kimliği -> profil kartı cache'i."""
+
+    def __init__(self, backend, ttl=DEFAULT_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    def _version(self, user_id):
+        return self.backend.get_counter(f'user:card:ver:{user_id}')
+
+    def get_many(self, user_ids):
+        """
+        Cache'teki kartları döndürür.
+
+        Args:
+            user_ids (list): Kullanıcı kimlikleri (int)
+
+        Returns:
+            tuple: ({user_id: kart}, ıskalanan kimlikler listesi)
+        """
+        found, missing = {}, []
+        for user_id in user_ids:
+            entry = self.backend.get(f'user:card:{user_id}')
+            if entry is not None and entry[1] == self._version(user_id):
+                found[user_id] = entry[0]
+            else:
+                missing.append(user_id)
+        return found, missing
+
+    def set_many(self, cards, versions):
+        """
+        Veritabanından okunan kartları cache'e yazar.
+
+        versions, sorgudan ÖNCE okunan sürümlerdir; sorgu sırasında profil
+        değişirse kart eski sürümle yazılır ve bir sonraki okumada düşer.
+
+        Args:
+            cards (dict): {user_id: kart}
+            versions (dict): {user_id: sorgu öncesi sürüm}
+        """
+        for user_id, card in cards.items():
+            self.backend.set(f'user:card:{user_id}', (card, versions[user_id]), self.ttl)
+
+    def versions(self, user_ids):
+        return {user_id: self._version(user_id) for user_id in user_ids}
+
+    def invalidate(self, user_id):
+        """Kullanıcının cache'li kartını geçersiz kılar."""
+        self.backend.incr(f'user:card:ver:{user_id}')
+
+
+def init_user_cache(app, backend=None):
+    """
+    Profil kartı cache'ini uygulamaya bağlar.
+
+    Args:
+        app (Flask): Uygulama
+        backend: Opsiyonel cache backend'i; verilmezse MemoryBackend
+    """
+    if backend is None:
+        backend = MemoryBackend(app.config.get('USER_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+    app.extensions['user_cache'] = UserCardCache(backend, app.config.get('USER_CACHE_TTL', DEFAULT_TTL))
+
+
+def get_user_cache():
+    return current_app.extensions['user_cache']
@@ -0,0 +1,33 @@
+"""
+validation.py
+-------------
+İstek gövdesi ve parametrelerindeki kimliklerin doğrulanması.
+
+SQLite INTEGER 64-bit işaretlidir; daha büyük bir Python int'i sorguya bind
+edilirken OverflowError verir ve istek 500 ile düşer. Kimlikler bu yüzden
+veritabanına gitmeden önce 1..MAX_ID aralığında doğrulanır; geçersiz değerler
+endpoint'te 400 (veya batch'lerde öğe hatası) olur.
+"""
+
+MAX_ID = 2 ** 63 - 1  # SQLite INTEGER üst sınırı
+
+
+def parse_id(value):
+    """
+    Değeri pozitif bir kimliğe çevirir.
+
+    int ve tam sayı string'leri kabul edilir; bool, kesirli sayı ve aralık
+    dışı değerler reddedilir.
+
+    Returns:
+        int: Kimlik; geçersizse None
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float) and not value.is_integer():
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return value if 1 <= value <= MAX_ID else None